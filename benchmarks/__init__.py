@@ -0,0 +1 @@
+"""Offline benchmarks for ebel_rest, run against the stand-in server in ebel_rest/testing.py."""
@@ -0,0 +1,319 @@
+"""Run the benchmark suite and compare the results with a stored baseline.
+
+Usage
+-----
+    $ python -m benchmarks.run                                  # run and compare with benchmarks/baseline.json
+    $ python -m benchmarks.run --edges 50000 --save baseline.json
+    $ python -m benchmarks.run --only graph. export.
+    $ python -m benchmarks.run --only memory.
+
+Memory benchmarks report the size of the Python objects a function returns, measured with tracemalloc.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from typing import Callable, Dict
+
+from ebel_rest import query, statistics
+from ebel_rest.manager import core
+from ebel_rest.manager.core import Client, Graph, Connector, connect
+from ebel_rest.manager.export import Exporter
+from ebel_rest.testing import StandInServer, SyntheticKG
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+BENCHMARKS: Dict[str, Callable] = {}
+MEMORY_BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark. The decorated function gets the context and returns the function to be timed."""
+    def decorator(setup: Callable):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def memory_benchmark(name: str):
+    """Register a memory benchmark. The decorated function gets the context and returns the function whose result
+    is measured."""
+    def decorator(setup: Callable):
+        MEMORY_BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+class Context:
+    """Shared state of the benchmarks: synthetic knowledge graph, stand-in server and graphs built from it."""
+
+    def __init__(self, server: StandInServer, tmp_dir: str):
+        self.server = server
+        self.kg = server.kg
+        self.tmp_dir = tmp_dir
+        rows = [self.kg.graph_row(edge) for edge in self.kg.edges]
+        half, quarter = len(rows) // 2, len(rows) // 4
+        self.graph_a = self.graph(rows[:half + quarter])
+        self.graph_b = self.graph(rows[quarter:])
+
+    @staticmethod
+    def graph(rows: list) -> Graph:
+        graph = Graph()
+        graph.function_name = 'benchmark'
+        graph._data = core.strip_metadata(rows)
+        return graph
+
+
+@benchmark('client.call_overhead')
+def bench_call_overhead(ctx: Context):
+    pmid = ctx.kg.pmids[0]
+    return lambda: query.pmid(pmid)
+
+
+@benchmark('client.large_result.interned')
+def bench_large_result_interned(ctx: Context):
+    def fetch():
+        Connector.session.intern_strings = True
+        try:
+            return query.belish('? ? ?')
+        finally:
+            Connector.session.intern_strings = False
+    return fetch
+
+
+@benchmark('client.large_result.slim')
+def bench_large_result_slim(ctx: Context):
+    return lambda: query.belish('? ? ?', slim=True)
+
+
+@benchmark('client.statistics')
+def bench_statistics(ctx: Context):
+    return statistics.summarize
+
+
+@benchmark('client.large_result')
+def bench_large_result(ctx: Context):
+    return lambda: query.belish('? ? ?')
+
+
+for _name, _operator in [('union', '__add__'), ('intersection', '__and__'), ('difference', '__sub__'),
+                         ('symmetric_difference', '__xor__'), ('equality', '__eq__')]:
+    benchmark(f'graph.{_name}')(lambda ctx, op=_operator: lambda: getattr(ctx.graph_a, op)(ctx.graph_b))
+
+
+@benchmark('graph.len')
+def bench_len(ctx: Context):
+    return lambda: len(ctx.graph_a)
+
+
+@benchmark('table.table')
+def bench_table(ctx: Context):
+    return lambda: ctx.graph_a.table
+
+
+@benchmark('table.table_all_columns')
+def bench_table_all_columns(ctx: Context):
+    return lambda: ctx.graph_a.table_all_columns
+
+
+@benchmark('table.data')
+def bench_data(ctx: Context):
+    return lambda: ctx.graph_a.data
+
+
+@benchmark('convert.edgelist_frame')
+def bench_edgelist_frame(ctx: Context):
+    return lambda: ctx.graph(ctx.graph_a._data).to_edgelist_frame()
+
+
+for _library, _method in [('networkx', 'to_networkx'), ('igraph', 'to_igraph')]:
+    @benchmark(f'convert.{_library}')
+    def bench_convert(ctx: Context, library=_library, method=_method):
+        try:
+            __import__(library)
+        except ImportError:
+            return None
+        return lambda: getattr(ctx.graph(ctx.graph_a._data), method)()
+
+
+@benchmark('convert.shared')
+def bench_shared(ctx: Context):
+    return lambda: ctx.graph(ctx.graph_a._data).share().unlink()
+
+
+@benchmark('render.as_graph')
+def bench_render(ctx: Context):
+    if shutil.which('dot') is None:
+        return None
+    core.pics_path = ctx.tmp_dir
+    graph = ctx.graph(ctx.graph_a._data[:200])
+    return lambda: graph._render_graph(False, False)
+
+
+for _format, _delim in [('lst', ' '), ('sif', '\t'), ('csv', ','), ('json', ',')]:
+    @benchmark(f'export.{_format}')
+    def bench_export(ctx: Context, output_format=_format, delim=_delim):
+        def export():
+            exporter = Exporter(os.path.join(ctx.tmp_dir, f'graph.{output_format}'), output_format,
+                                graph_delim=delim, mapping_path=os.path.join(ctx.tmp_dir, 'map.tsv'))
+            return exporter.export()
+        return export
+
+
+for _suffix, _intern in [('', False), ('.interned', True)]:
+    @memory_benchmark(f'memory.graph{_suffix}')
+    def bench_memory_graph(ctx: Context, intern_strings=_intern):
+        def fetch():
+            Connector.session.intern_strings = intern_strings
+            try:
+                return query.belish('? ? ?')
+            finally:
+                Connector.session.intern_strings = False
+        return fetch
+
+    @memory_benchmark(f'memory.export{_suffix}')
+    def bench_memory_export(ctx: Context, intern_strings=_intern):
+        def fetch():
+            Connector.session.intern_strings = intern_strings
+            try:
+                return Client().apply_api_function('export_full')
+            finally:
+                Connector.session.intern_strings = False
+        return fetch
+
+
+@memory_benchmark('memory.graph.slim')
+def bench_memory_graph_slim(ctx: Context):
+    return lambda: query.belish('? ? ?', slim=True)
+
+
+@benchmark('export.csv.parallel')
+def bench_export_parallel(ctx: Context):
+    def export():
+        exporter = Exporter(os.path.join(ctx.tmp_dir, 'graph.csv'), 'csv',
+                            mapping_path=os.path.join(ctx.tmp_dir, 'map.tsv'), workers=4)
+        return exporter.export()
+    return export
+
+
+def measure(func: Callable, repeat: int) -> float:
+    """Best wall time of `repeat` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_memory(func: Callable) -> int:
+    """Bytes allocated by func which are still held by its result."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        held = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return held
+
+
+def run(n_nodes: int, n_edges: int, repeat: int, only: list = None) -> dict:
+    kg = SyntheticKG(n_nodes=n_nodes, n_edges=n_edges)
+    settings = {k: v for k, v in vars(Connector).items() if not k.startswith('_')}
+    results = {}
+    memory = {}
+    with StandInServer(kg) as server, tempfile.TemporaryDirectory() as tmp_dir:
+        connect(server.user, server.password, server.url, server.db_name)
+        ctx = Context(server, tmp_dir)
+        try:
+            for name, setup in BENCHMARKS.items():
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                func = setup(ctx)
+                if func is None:
+                    print(f"{name:<32} skipped", file=sys.stderr)
+                    continue
+                results[name] = measure(func, repeat)
+                print(f"{name:<32} {results[name] * 1000:10.2f} ms", file=sys.stderr)
+
+            for name, setup in MEMORY_BENCHMARKS.items():
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                memory[name] = measure_memory(setup(ctx))
+                print(f"{name:<32} {memory[name] / 2 ** 20:10.2f} MiB", file=sys.stderr)
+        finally:
+            Connector.session.close()
+            for k, v in settings.items():
+                setattr(Connector, k, v)
+
+    return {
+        'meta': {'nodes': n_nodes, 'edges': n_edges, 'repeat': repeat, 'python': platform.python_version()},
+        'results': results,
+        'memory': memory,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Return the names of benchmarks which are slower than the baseline by more than the tolerance."""
+    if current['meta']['edges'] != baseline['meta']['edges'] or current['meta']['nodes'] != baseline['meta']['nodes']:
+        print("Baseline was recorded with a different knowledge graph size, comparison skipped.", file=sys.stderr)
+        return []
+
+    regressions = []
+    print(f"\n{'benchmark':<32} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, seconds in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = seconds / base if base else float('inf')
+        flag = ' REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"{name:<32} {base * 1000:10.2f}ms {seconds * 1000:10.2f}ms {ratio:8.2f}{flag}")
+        if flag:
+            regressions.append(name)
+
+    for name, size in current.get('memory', {}).items():
+        base = baseline.get('memory', {}).get(name)
+        if base is None:
+            continue
+        ratio = size / base if base else float('inf')
+        flag = ' REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"{name:<32} {base / 2 ** 20:9.2f}MiB {size / 2 ** 20:9.2f}MiB {ratio:8.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=2000, help="Number of nodes of the synthetic KG.")
+    parser.add_argument('--edges', type=int, default=10000, help="Number of edges of the synthetic KG.")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of runs per benchmark, the best is reported.")
+    parser.add_argument('--only', nargs='*', help="Only run benchmarks starting with one of these prefixes.")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline results to compare with.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before a regression.")
+    parser.add_argument('--save', nargs='?', const=BASELINE_PATH, help="Save the results, e.g. as new baseline.")
+    args = parser.parse_args(argv)
+
+    current = run(args.nodes, args.edges, args.repeat, args.only)
+
+    if args.save:
+        with open(args.save, 'w') as results_file:
+            json.dump(current, results_file, indent=2, sort_keys=True)
+        return 0
+
+    if args.baseline and os.path.isfile(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare(current, json.load(baseline_file), args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
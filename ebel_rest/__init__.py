@@ -1,10 +1,23 @@
 """Top-level package for eBEL API client."""
+import importlib
 
 from ebel_rest.manager.core import connect
+from ebel_rest.manager.session import Session
 from ebel_rest.manager.export import export_graph, Exporter
 from ebel_rest.manager import export, query, statistics
 
+# Submodules which depend on pandas are only imported on first access
+LAZY_SUBMODULES = {'local_statistics': 'ebel_rest.manager.local_statistics'}
+
 
 __author__ = """Christian Ebeling"""
 __email__ = 'Christian.Ebeling@scai.fraunhofer.de'
 __version__ = '1.0.25'
+
+
+def __getattr__(name):
+    if name in LAZY_SUBMODULES:
+        module = importlib.import_module(LAZY_SUBMODULES[name])
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,247 @@
+"""Command line interface for exports, cache warming and batch queries.
+
+Connection settings can be given as options or with the environment variables EBEL_REST_USER, EBEL_REST_PASSWORD,
+EBEL_REST_SERVER and EBEL_REST_DB.
+
+Examples
+--------
+    $ ebel-rest export graph.csv csv --mapping-path map.csv
+    $ ebel-rest --cache-dir ~/.ebel_rest/cache warm queries.jsonl --workers 8
+    $ ebel-rest batch pmid pmids.txt results.parquet --workers 4
+    $ ebel-rest --record workload.jsonl.gz --timing warm queries.jsonl
+    $ ebel-rest --replay workload.jsonl.gz --latency 0.05 --timing warm queries.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+from ebel_rest.defaults import cache_path
+from ebel_rest.manager import query, statistics
+from ebel_rest.manager.cache import ResponseCache
+from ebel_rest.manager.core import connect
+from ebel_rest.manager.export import export_graph
+from ebel_rest.manager.progress import tqdm_progress
+from ebel_rest.manager.transport import RecordingTransport, ReplayTransport
+
+# Functions which can be run from query specs
+SPEC_FUNCTIONS = {
+    **{f'query.{func.__name__}': func for func in (
+        query.annotation, query.last_author, query.pmid, query.list_pmids, query.subgraph,
+        query.causal_correlative_by_gene, query.path, query.paths, query.belish, query.find_contradictions, query.sql,
+    )},
+    **{f'statistics.{func.__name__}': func for func in (
+        statistics.summarize, statistics.publication_by_year, statistics.publication_by_number_of_statements,
+        statistics.last_author_by_number_of_publications, statistics.last_author_by_number_of_statements,
+        statistics.namespace_by_count, statistics.node_namespace_order_by_count,
+        statistics.node_namespace_order_by_namespace, statistics.edges, statistics.nodes, statistics.total_bel_nodes,
+        statistics.total_bel_edges, statistics.total_publications, statistics.subgraphs,
+    )},
+}
+
+
+class Timer:
+    """Collects the elapsed time of named tasks."""
+
+    def __init__(self):
+        self.timings = []
+
+    def run(self, name: str, func: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings.append((name, time.perf_counter() - start))
+
+    def summary(self) -> str:
+        if not self.timings:
+            return "No tasks were run."
+        elapsed = [t for _, t in self.timings]
+        slowest_name, slowest = max(self.timings, key=lambda x: x[1])
+        return (f"tasks: {len(elapsed)}, total: {sum(elapsed):.3f}s, mean: {sum(elapsed) / len(elapsed):.3f}s, "
+                f"max: {slowest:.3f}s ({slowest_name})")
+
+
+def resolve_spec(spec: dict) -> Tuple[str, Callable, list, dict]:
+    """Resolve a query spec like {"function": "query.pmid", "args": [30310104]} to the library function."""
+    name = spec.get('function', '')
+    func = SPEC_FUNCTIONS.get(name)
+    if func is None:
+        raise ValueError(f"Unknown function {name!r}, must be one of {', '.join(SPEC_FUNCTIONS)}")
+    return name, func, list(spec.get('args', [])), dict(spec.get('kwargs', {}))
+
+
+def read_specs(path: str) -> List[dict]:
+    """Read query specs from a JSON list or a file with one JSON object per line."""
+    with open(path, encoding='utf-8') as spec_file:
+        content = spec_file.read().strip()
+    if content.startswith('['):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def read_batch_input(path: str) -> List[List[str]]:
+    """Read tab separated query arguments, one query per line."""
+    with open(path, encoding='utf-8') as input_file:
+        return [line.rstrip('\n').split('\t') for line in input_file if line.strip()]
+
+
+def write_frame(df, path: str):
+    """Write a DataFrame to Parquet or CSV depending on the file extension."""
+    if path.endswith('.parquet'):
+        df.to_parquet(path)
+    else:
+        df.to_csv(path, sep='\t' if path.endswith(('.tsv', '.txt')) else ',')
+
+
+def run_export(args, timer: Timer):
+    graph_file, map_file = timer.run('export', export_graph,
+                                     graph_path=args.graph_path,
+                                     output_file_format=args.output_file_format,
+                                     graph_delim=args.graph_delim,
+                                     mapping_path=args.mapping_path,
+                                     map_delim=args.map_delim,
+                                     progress=tqdm_progress('export') if args.progress else None,
+                                     workers=args.workers) or (None, None)
+    print(f"graph: {graph_file}\nmapping: {map_file}")
+
+
+def run_warm(args, timer: Timer):
+    specs = [resolve_spec(spec) for spec in read_specs(args.specs)]
+    failed = 0
+
+    def warm(spec):
+        name, func, func_args, func_kwargs = spec
+        return timer.run(name, func, *func_args, **func_kwargs)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(warm, spec) for spec in specs]
+        for spec, future in zip(specs, futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{spec[0]}{tuple(spec[2])} failed: {e}", file=sys.stderr)
+
+    print(f"warmed: {len(specs) - failed}, failed: {failed}")
+    return 1 if failed else 0
+
+
+def run_batch(args, timer: Timer):
+    import pandas as pd
+
+    inputs = read_batch_input(args.input)
+
+    def run_query(arguments):
+        if args.query_type == 'pmid':
+            graph = query.pmid(int(arguments[0]))
+        elif args.query_type == 'annotation':
+            graph = query.annotation(*arguments[:2])
+        else:
+            graph = query.path(arguments[0], arguments[1], args.min_edges, args.max_edges)
+        return graph._data
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(timer.run, '\t'.join(arguments), run_query, arguments) for arguments in inputs]
+        frames = []
+        for arguments, future in zip(inputs, futures):
+            try:
+                df = pd.DataFrame(future.result())
+            except Exception as e:
+                failed += 1
+                print(f"{args.query_type}{tuple(arguments)} failed: {e}", file=sys.stderr)
+                continue
+            df.insert(0, 'query', '\t'.join(arguments))
+            frames.append(df)
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    write_frame(df, args.output)
+    print(f"queries: {len(inputs) - failed}, failed: {failed}, edges: {len(df)}, output: {args.output}")
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='ebel-rest', description="Command line client for an e(BE:L) server.")
+    parser.add_argument('--user', default=os.environ.get('EBEL_REST_USER'), help="Database username.")
+    parser.add_argument('--password', default=os.environ.get('EBEL_REST_PASSWORD'), help="Database password.")
+    parser.add_argument('--server', default=os.environ.get('EBEL_REST_SERVER'), help="Server URL.")
+    parser.add_argument('--db', dest='db_name', default=os.environ.get('EBEL_REST_DB'), help="Database name.")
+    parser.add_argument('--cache-dir', nargs='?', const=cache_path, default=None,
+                        help=f"Cache responses in this directory (default if no value is given: {cache_path}).")
+    parser.add_argument('--cache-ttl', type=float, default=24 * 3600, help="Cache time to live in seconds.")
+    parser.add_argument('--print-url', action='store_true', help="Print the URL of each API call.")
+    parser.add_argument('--timing', action='store_true', help="Print a summary of the task timings.")
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument('--record', metavar='ARCHIVE', help="Record all requests and responses in an archive.")
+    transport.add_argument('--replay', metavar='ARCHIVE', help="Answer all requests from a recorded archive.")
+    parser.add_argument('--latency', type=float, default=0, help="Simulated latency in seconds for --replay.")
+    parser.add_argument('--bandwidth', type=float, default=None,
+                        help="Simulated bandwidth in bytes per second for --replay.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export = subparsers.add_parser('export', help="Export the knowledge graph.")
+    export.add_argument('graph_path', help="Write file path.")
+    export.add_argument('output_file_format', choices=['lst', 'sif', 'json', 'csv'], help="Graph export format.")
+    export.add_argument('--graph-delim', default=',', help="Delimiter of the graph file.")
+    export.add_argument('--mapping-path', default=None, help="File path of the node mapping file.")
+    export.add_argument('--map-delim', default=',', help="Delimiter of the mapping file.")
+    export.add_argument('--progress', action='store_true', help="Show the download progress (requires tqdm).")
+    export.add_argument('--workers', type=int, default=None,
+                        help="Number of processes writing lst, sif and csv graph files.")
+    export.set_defaults(handler=run_export)
+
+    warm = subparsers.add_parser('warm', help="Warm the response cache from a file of query specs.")
+    warm.add_argument('specs', help='JSON lines file with specs like {"function": "query.pmid", "args": [1]}.')
+    warm.add_argument('--workers', type=int, default=4, help="Number of parallel requests.")
+    warm.set_defaults(handler=run_warm)
+
+    batch = subparsers.add_parser('batch', help="Run a batch of queries and write the edges to Parquet or CSV.")
+    batch.add_argument('query_type', choices=['pmid', 'annotation', 'path'])
+    batch.add_argument('input', help="File with tab separated arguments for one query per line.")
+    batch.add_argument('output', help="Output file (.parquet, .csv or .tsv).")
+    batch.add_argument('--workers', type=int, default=4, help="Number of parallel requests.")
+    batch.add_argument('--min-edges', type=int, default=1, help="Minimum path length for path queries.")
+    batch.add_argument('--max-edges', type=int, default=4, help="Maximum path length for path queries.")
+    batch.set_defaults(handler=run_batch)
+
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    missing = [name for name in ('user', 'password', 'server', 'db_name') if getattr(args, name) is None]
+    if missing:
+        parser.error(f"missing connection settings: {', '.join(missing)}")
+
+    if args.command == 'warm' and args.cache_dir is None:
+        args.cache_dir = cache_path
+
+    cache = ResponseCache(ttl=args.cache_ttl, directory=args.cache_dir) if args.cache_dir else None
+    if args.record:
+        transport = RecordingTransport(args.record)
+    elif args.replay:
+        transport = ReplayTransport(args.replay, latency=args.latency, bandwidth=args.bandwidth)
+    else:
+        transport = None
+    connect(args.user, args.password, args.server, args.db_name, print_url=args.print_url, cache=cache,
+            transport=transport)
+
+    timer = Timer()
+    try:
+        status = args.handler(args, timer)
+    finally:
+        if transport is not None:
+            transport.close()
+    if args.timing:
+        print(timer.summary(), file=sys.stderr)
+    return status or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
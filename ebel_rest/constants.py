@@ -1,2 +1,48 @@
 INDEX = 'index'
 BEL = 'bel'
+
+# Projection for direct SQL queries on BEL relations which only returns the edge IDs
+EDGE_ID_PROJECTION = "@rid.asString() as edge_id"
+
+# Projection for direct SQL queries on BEL relations which only returns the edge ID, relation and subject and object
+SLIM_EDGE_PROJECTION = ", ".join([
+    EDGE_ID_PROJECTION,
+    "@class as relation",
+    "pmid",
+    "out.bel as subject_bel",
+    "in.bel as object_bel",
+    "out.@rid.asString() as subject_id",
+    "in.@rid.asString() as object_id",
+    "out.@class as subject_class",
+    "in.@class as object_class",
+])
+
+# Projection of the remaining columns of the server side graph functions: evidence, citation and involved genes
+EDGE_DETAIL_PROJECTION = ", ".join([
+    "out.involved_genes as subject_involved_genes",
+    "out.involved_other as subject_involved_other",
+    "in.involved_genes as object_involved_genes",
+    "in.involved_other as object_involved_other",
+    "annotation",
+    "citation.last_author as last_author",
+    "citation.pub_date as publication_date",
+    "citation.title as title",
+    "evidence",
+])
+
+# Projection for direct SQL queries on BEL relations which returns the same columns as the server side graph functions
+GRAPH_EDGE_PROJECTION = f"{SLIM_EDGE_PROJECTION}, {EDGE_DETAIL_PROJECTION}"
+
+# Relations derived from the parent classes 'causal' and 'correlative'
+CAUSAL_RELATIONS = ('causes_no_change', 'decreases', 'directly_decreases', 'directly_increases', 'increases',
+                    'rate_limiting_step_of', 'regulates')
+CORRELATIVE_RELATIONS = ('negative_correlation', 'no_correlation', 'positive_correlation')
+
+# Pairs of relations which contradict each other if they connect the same subject and object
+OPPOSITE_RELATIONS = (
+    ('increases', 'decreases'),
+    ('increases', 'directly_decreases'),
+    ('directly_increases', 'decreases'),
+    ('directly_increases', 'directly_decreases'),
+    ('positive_correlation', 'negative_correlation'),
+)
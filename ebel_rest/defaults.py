@@ -7,4 +7,5 @@ PROJECT = '.ebel_rest'
 PROJECT_PATH = os.path.join(HOME, PROJECT)
 
 pics_path = os.path.join(PROJECT_PATH, 'pics/algorithms/')
-os.makedirs(pics_path, exist_ok=True)
+cache_path = os.path.join(PROJECT_PATH, 'cache')
+terms_path = os.path.join(PROJECT_PATH, 'terms')
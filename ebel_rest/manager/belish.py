@@ -0,0 +1,323 @@
+"""Client side parser for BELish statements.
+
+BELish statements are BEL statements in which "?" serves as a wild card, e.g. 'p(?) causal p(HGNC:"ACE2")'. Parsing
+them locally allows malformed statements to be rejected before a server call is made, equivalent statements to be
+normalised to one canonical key and simple statements to be compiled to direct SQL.
+"""
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Union
+
+from ebel_rest.constants import GRAPH_EDGE_PROJECTION
+
+WILDCARD = '?'
+
+FUNCTIONS = {
+    'abundance': 'a',
+    'activity': 'act',
+    'biologicalProcess': 'bp',
+    'cellSecretion': 'sec',
+    'cellSurfaceExpression': 'surf',
+    'complexAbundance': 'complex',
+    'compositeAbundance': 'composite',
+    'degradation': 'deg',
+    'fragment': 'frag',
+    'fromLoc': 'fromLoc',
+    'fusion': 'fus',
+    'geneAbundance': 'g',
+    'list': 'list',
+    'location': 'loc',
+    'microRNAAbundance': 'm',
+    'molecularActivity': 'ma',
+    'pathology': 'path',
+    'populationAbundance': 'pop',
+    'products': 'products',
+    'proteinAbundance': 'p',
+    'proteinModification': 'pmod',
+    'reactants': 'reactants',
+    'reaction': 'rxn',
+    'rnaAbundance': 'r',
+    'toLoc': 'toLoc',
+    'translocation': 'tloc',
+    'variant': 'var',
+}
+SHORT_FUNCTIONS = set(FUNCTIONS.values())
+
+# Node classes in the knowledge graph for functions which can be the subject or object of a statement
+NODE_CLASSES = {
+    'a': 'abundance',
+    'act': 'activity',
+    'bp': 'biological_process',
+    'complex': 'complex',
+    'composite': 'composite',
+    'deg': 'degradation',
+    'g': 'gene',
+    'm': 'micro_rna',
+    'path': 'pathology',
+    'pop': 'population',
+    'p': 'protein',
+    'r': 'rna',
+    'rxn': 'reaction',
+    'sec': 'cell_secretion',
+    'surf': 'cell_surface_expression',
+    'tloc': 'translocation',
+}
+
+RELATION_ABBREVIATIONS = {
+    '->': 'increases',
+    '-|': 'decreases',
+    '=>': 'directly_increases',
+    '=|': 'directly_decreases',
+    '--': 'association',
+    'pos': 'positive_correlation',
+    'neg': 'negative_correlation',
+    'cnc': 'causes_no_change',
+    'reg': 'regulates',
+    ':>': 'translated_to',
+    '>>': 'transcribed_to',
+}
+
+RELATIONS = {
+    # parent classes
+    'bel_relation', 'causal', 'correlative', 'genomic', 'other', 'compiled', 'deprecated',
+    # relation types
+    'acts_in', 'analogous_to', 'association', 'biomarker_for', 'causes_no_change', 'decreases',
+    'directly_decreases', 'directly_increases', 'equivalent_to', 'has_component', 'has_components',
+    'has_fragment', 'has_location', 'has_member', 'has_members', 'has_modification', 'has_product',
+    'has_reactant', 'has_variant', 'includes', 'increases', 'is_a', 'negative_correlation', 'no_correlation',
+    'orthologous', 'positive_correlation', 'prognostic_biomarker_for', 'rate_limiting_step_of', 'regulates',
+    'sub_process_of', 'transcribed_to', 'translated_to', 'translocates',
+}
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+)
+    |(?P<string>"(?:[^"\\]|\\.)*")
+    |(?P<symbol>->|-\||=>|=\||--|:>|>>)
+    |(?P<punct>[(),:?])
+    |(?P<ident>[^\s(),:?"]+)
+''', re.VERBOSE)
+
+
+class NamespaceArgument(NamedTuple):
+    """A namespace:name argument, e.g. HGNC:"ACE2". The name can be a wild card."""
+    namespace: str
+    name: str
+
+    def __str__(self):
+        if self.name == WILDCARD:
+            return f'{self.namespace}:{WILDCARD}'
+        escaped = self.name.replace('"', '\\"')
+        return f'{self.namespace}:"{escaped}"'
+
+
+class Term(NamedTuple):
+    """A BEL term with its (short) function name and arguments."""
+    function: str
+    arguments: tuple
+
+    def __str__(self):
+        return f"{self.function}({', '.join(str(arg) for arg in self.arguments)})"
+
+
+class BelishPattern(NamedTuple):
+    """A parsed BELish statement."""
+    subject: Union[Term, str]
+    relation: str
+    object: Union[Term, str]
+
+    @property
+    def key(self) -> str:
+        """Canonical form of the statement. Equivalent statements have the same key."""
+        return f"{self.subject} {self.relation} {self.object}"
+
+    def __str__(self):
+        return self.key
+
+
+def _camel_to_snake(name: str) -> str:
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+def _tokenize(statement: str) -> List[tuple]:
+    tokens = []
+    pos = 0
+    while pos < len(statement):
+        match = TOKEN_PATTERN.match(statement, pos)
+        if match is None:
+            raise ValueError(f"Unexpected character {statement[pos]!r} at position {pos}")
+        if match.lastgroup != 'space':
+            tokens.append((match.lastgroup, match.group(), pos))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.tokens = _tokenize(statement)
+        self.index = 0
+
+    def _peek(self, offset: int = 0) -> Optional[tuple]:
+        if self.index + offset < len(self.tokens):
+            return self.tokens[self.index + offset]
+        return None
+
+    def _next(self, expected: str = None) -> tuple:
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of statement{f', expected {expected!r}' if expected else ''}")
+        if expected is not None and token[1] != expected:
+            raise ValueError(f"Expected {expected!r} at position {token[2]}, found {token[1]!r}")
+        self.index += 1
+        return token
+
+    def parse(self) -> BelishPattern:
+        subject = self._node()
+        relation = self._relation()
+        obj = self._node()
+        if self._peek() is not None:
+            token = self._peek()
+            raise ValueError(f"Unexpected {token[1]!r} at position {token[2]}")
+        return BelishPattern(subject, relation, obj)
+
+    def _node(self) -> Union[Term, str]:
+        token = self._peek()
+        if token is not None and token[1] == WILDCARD:
+            self._next()
+            return WILDCARD
+        return self._term()
+
+    def _term(self) -> Term:
+        kind, value, pos = self._next()
+        if kind != 'ident':
+            raise ValueError(f"Expected BEL function at position {pos}, found {value!r}")
+        if value in FUNCTIONS:
+            function = FUNCTIONS[value]
+        elif value in SHORT_FUNCTIONS:
+            function = value
+        else:
+            raise ValueError(f"Unknown BEL function {value!r} at position {pos}")
+
+        self._next('(')
+        arguments = []
+        if self._peek() is not None and self._peek()[1] != ')':
+            arguments.append(self._argument())
+            while self._peek() is not None and self._peek()[1] == ',':
+                self._next()
+                arguments.append(self._argument())
+        self._next(')')
+        return Term(function, tuple(arguments))
+
+    def _argument(self):
+        if self._peek() is None:
+            raise ValueError("Unexpected end of statement")
+        kind, value, pos = self._peek()
+        following = self._peek(1)
+        if kind == 'ident' and following is not None and following[1] == '(':
+            return self._term()
+
+        self._next()
+        if kind == 'ident' and following is not None and following[1] == ':':
+            self._next()
+            name_kind, name, name_pos = self._next()
+            if name_kind == 'string':
+                name = name[1:-1].replace('\\"', '"')
+            elif name_kind != 'ident' and name != WILDCARD:
+                raise ValueError(f"Expected name at position {name_pos}, found {name!r}")
+            return NamespaceArgument(value, name)
+
+        if kind in ('ident', 'string') or value == WILDCARD:
+            return value
+        raise ValueError(f"Unexpected {value!r} at position {pos}")
+
+    def _relation(self) -> str:
+        kind, value, pos = self._next()
+        if value == WILDCARD:
+            return WILDCARD
+        if kind == 'symbol' or value in RELATION_ABBREVIATIONS:
+            return RELATION_ABBREVIATIONS[value]
+        if kind == 'ident':
+            relation = _camel_to_snake(value)
+            if relation in RELATIONS:
+                return relation
+        raise ValueError(f"Unknown relation {value!r} at position {pos}")
+
+
+@lru_cache(maxsize=1024)
+def parse(statement: str) -> BelishPattern:
+    """Parse and validate a BELish statement.
+
+    Parameters
+    ----------
+    statement: str
+        BEL like statement in which "?" serve as wild cards. Example: 'p(?) causal p(?)'
+
+    Raises
+    ------
+    ValueError
+        If the statement is malformed or uses unknown functions or relations.
+
+    Returns
+    -------
+    BelishPattern
+    """
+    return _Parser(statement).parse()
+
+
+def canonical(statement: str) -> str:
+    """Return the canonical key of a BELish statement."""
+    return parse(statement).key
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _node_conditions(node: Union[Term, str], direction: str) -> Optional[List[str]]:
+    """SQL conditions for a subject (out) or object (in) node, or None if the node can't be compiled."""
+    if node == WILDCARD:
+        return []
+
+    if node.function not in NODE_CLASSES or len(node.arguments) > 1:
+        return None
+
+    conditions = [f"{direction} INSTANCEOF {_quote(NODE_CLASSES[node.function])}"]
+    if node.arguments and node.arguments[0] != WILDCARD:
+        argument = node.arguments[0]
+        if not isinstance(argument, NamespaceArgument):
+            return None
+        conditions.append(f"{direction}.namespace = {_quote(argument.namespace)}")
+        if argument.name != WILDCARD:
+            conditions.append(f"{direction}.name = {_quote(argument.name)}")
+    return conditions
+
+
+@lru_cache(maxsize=1024)
+def _compile(key: str) -> Optional[str]:
+    pattern = parse(key)
+    subject_conditions = _node_conditions(pattern.subject, 'out')
+    object_conditions = _node_conditions(pattern.object, 'in')
+    if subject_conditions is None or object_conditions is None:
+        return None
+
+    edge_class = 'bel_relation' if pattern.relation == WILDCARD else pattern.relation
+    sql = f"SELECT {GRAPH_EDGE_PROJECTION} FROM {edge_class}"
+    conditions = subject_conditions + object_conditions
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    return sql
+
+
+def to_sql(statement: str) -> Optional[str]:
+    """Compile a BELish statement to an equivalent direct SQL query.
+
+    Only statements in which subject and object are wild cards or terms with a single namespace argument
+    (e.g. 'p(HGNC:"ACE2")' or 'p(?)') can be compiled. Compiled queries are cached by the canonical key of the
+    statement, so equivalent statements share a cache entry.
+
+    Returns
+    -------
+    str or None
+        The SQL query or None if the statement can't be compiled.
+    """
+    return _compile(canonical(statement))
@@ -0,0 +1,141 @@
+"""Client side cache for responses of the API."""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from ebel_rest.defaults import cache_path
+
+
+class ResponseCache:
+    """Cache for raw response bodies with a time to live, held in memory and optionally on disk.
+
+    Each entry can carry validators, e.g. the ETag and Last-Modified headers of the response or a version of the
+    knowledge graph. Expired entries are kept until they are displaced, so a :class:`ebel_rest.manager.session.Session`
+    can revalidate them with the server and :meth:`refresh` them instead of downloading the body again.
+
+    Parameters
+    ----------
+    ttl: float
+        Time to live of a cache entry in seconds. If None, entries never expire.
+    directory: str
+        Directory in which responses are stored, so the cache can be shared between processes and warmed by
+        scheduled jobs. If None, responses are only held in memory. Use :data:`ebel_rest.defaults.cache_path` for the
+        default location.
+    max_entries: int
+        Maximum number of responses held in memory. The least recently used responses are dropped first.
+    """
+
+    def __init__(self, ttl: Optional[float] = 3600, directory: str = None, max_entries: int = 256):
+        self.ttl = ttl
+        self.directory = directory
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, body: bytes = None) -> str:
+        """Cache key of a request."""
+        digest = hashlib.sha256(url.encode('utf-8'))
+        if body:
+            digest.update(body)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _entry(self, key: str) -> Optional[tuple]:
+        """Return stored_at, body and validators of an entry, expired or not."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                stored_at = os.path.getmtime(path)
+                with open(path, 'rb') as cache_file:
+                    body = cache_file.read()
+            except FileNotFoundError:
+                return None
+            try:
+                with open(f"{path}.validators") as validators_file:
+                    validators = json.load(validators_file)
+            except (FileNotFoundError, ValueError):
+                validators = {}
+            self._remember(key, body, stored_at, validators)
+            return stored_at, body, validators
+
+        return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached response body or None if there is no valid entry."""
+        entry = self._entry(key)
+        if entry is None or self._expired(entry[0]):
+            return None
+        return entry[1]
+
+    def stale(self, key: str) -> Optional[Tuple[bytes, dict]]:
+        """Return the body and validators of an entry even if it is expired, None if there is no entry."""
+        entry = self._entry(key)
+        return None if entry is None else entry[1:]
+
+    def set(self, key: str, body: bytes, validators: dict = None):
+        """Store a response body with the validators used to revalidate it once it is expired."""
+        stored_at = time.time()
+        validators = validators or {}
+        self._remember(key, body, stored_at, validators)
+
+        if self.directory is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as cache_file:
+                cache_file.write(body)
+            os.replace(tmp_path, path)
+            # Written after the body, so validators are never paired with an older body which they don't describe
+            with open(tmp_path, 'w') as validators_file:
+                json.dump(validators, validators_file)
+            os.replace(tmp_path, f"{path}.validators")
+
+    def refresh(self, key: str):
+        """Restart the time to live of an entry, e.g. after the server confirmed that it is unchanged."""
+        stored_at = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory[key] = (stored_at,) + entry[1:]
+
+        if self.directory is not None:
+            try:
+                os.utime(self._path(key), (stored_at, stored_at))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, key: str, body: bytes, stored_at: float, validators: dict):
+        with self._lock:
+            self._memory[key] = (stored_at, body, validators)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+
+        if self.directory is not None and os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for file_name in files:
+                    os.remove(os.path.join(root, file_name))
+
+    def __len__(self) -> int:
+        return len(self._memory)
@@ -2,9 +2,16 @@
 import os
 import csv
 import json
-from typing import Tuple
+import shutil
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 
 from ebel_rest.manager.core import Client
+from ebel_rest.manager.session import Session
+from ebel_rest.manager.progress import CancellationToken, ProgressCallback
+from ebel_rest.manager.profiling import profiled
 from ebel_rest.constants import BEL, INDEX
 
 
@@ -13,6 +20,10 @@ def export_graph(graph_path: str,
                  graph_delim: str = ',',
                  mapping_path: str = None,
                  map_delim: str = ',',
+                 session: Session = None,
+                 progress: ProgressCallback = None,
+                 cancel: CancellationToken = None,
+                 workers: int = None,
                  ) -> Tuple[str, str]:
     """Exports the Knowledge Graph to an output file.
 
@@ -33,36 +44,116 @@ def export_graph(graph_path: str,
         A one-character string used to separate fields in the mapping file. It defaults to ','
     graph_delim: {'\t', ',', ' '}
         A one-character string used to separate fields in the graph file. It defaults to ','
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    progress: Callable[[Progress], None]
+        Called with the progress of the download, e.g. :func:`ebel_rest.manager.progress.tqdm_progress`.
+    cancel: CancellationToken
+        Token to abort the export.
+    workers: int
+        Number of processes used to write 'lst', 'sif' and 'csv' graph files, at most one per available CPU. If None
+        or 1, or if the graph has less than :attr:`Exporter.min_parallel_edges` edges, the file is written in this
+        process.
 
     Raises
     ------
     ValueError
         If output_file_format is not one of the following formats: 'lst', 'csv', 'tsv', 'txt', 'json'.
         If 'sif' is the output_file_format and delimiter is not one of the following formats: '\t', ',', ' '.
+    CancelledError
+        If the export was cancelled.
 
     Returns
     -------
     path: str
         The path to which the file was written to.
     """
-    exp = Exporter(graph_path, output_file_format, graph_delim, mapping_path, map_delim)
+    exp = Exporter(graph_path, output_file_format, graph_delim, mapping_path, map_delim, session=session,
+                   progress=progress, cancel=cancel, workers=workers)
     return exp.export()
 
 
+def _triples(edges: List[tuple]) -> dict:
+    """Groups (out index, relation, in index) tuples by out node and relation."""
+    triples = dict()
+    for out_node, relation, in_node in edges:
+        if out_node not in triples:
+            triples[out_node] = {relation: [in_node]}
+
+        elif relation not in triples[out_node]:
+            triples[out_node][relation] = [in_node]
+
+        else:
+            triples[out_node][relation].append(in_node)
+
+    return triples
+
+
+def _cpu_count() -> int:
+    """Number of CPUs this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    """Context of the process pool which writes in parallel.
+
+    Forking is only safe while this process has no other threads, such as those of the thread pool of a session, so
+    the workers are started with forkserver (or spawn) otherwise.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if 'fork' in methods and threading.active_count() == 1:
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _write_partition(path: str, output_file_format: str, graph_delim: str, edges: list) -> str:
+    """Writes one partition of the indexed edges as a 'lst', 'sif' or 'csv' file. Runs in a worker process."""
+    with open(path, 'w') as graph_file:
+        if output_file_format == 'lst':
+            csv.writer(graph_file, delimiter=" ").writerows(edges)
+        else:
+            graph_writer = csv.writer(graph_file, delimiter=graph_delim or ',')
+            for out_node, relations in _triples(edges).items():
+                for rel_type, in_nodes in relations.items():
+                    graph_writer.writerow([out_node, rel_type] + in_nodes)
+    return path
+
+
 class Exporter:
-    """Class for handling export requests."""
+    """Class for handling export requests.
+
+    With workers > 1, 'lst', 'sif' and 'csv' graph files of at least `min_parallel_edges` edges are written by a
+    process pool. The edges are mapped to node indices and partitioned in this process: edge lists by position, SIF
+    and CSV files by the index of the out node, so all edges of a node are grouped by the same worker. Each worker
+    only receives and writes its own partition (see :func:`_write_partition`) and the partial files are concatenated
+    in partition order. Smaller graphs are written in this process, because starting the pool takes longer than
+    writing them. Workers which aren't forked import the main module, so scripts which export in parallel need an
+    ``if __name__ == '__main__':`` guard.
+    """
+
+    min_parallel_edges = 50000
 
     def __init__(self,
                  graph_path: str,
                  output_file_format: str,
                  graph_delim: str = ',',
                  mapping_path: str = None,
-                 map_delim: str = ',',):
+                 map_delim: str = ',',
+                 session: Session = None,
+                 progress: ProgressCallback = None,
+                 cancel: CancellationToken = None,
+                 workers: int = None):
         self.graph_path = graph_path
         self.output_file_format = output_file_format
         self.graph_delim = graph_delim
         self.mapping_path = mapping_path
         self.map_delim = map_delim
+        self.session = session
+        self.progress = progress
+        self.cancel = cancel
+        self.workers = workers
         self.odb_results = None
         self.mapping_dict = None
 
@@ -76,6 +167,7 @@ class Exporter:
         else:
             return None
 
+    @profiled('export.write_results')
     def write_results(self, set_graph_file_format: str = None, set_graph_file_delim: str = None) -> Tuple[str, str]:
         """Write the retrieved data to file.
 
@@ -98,8 +190,14 @@ class Exporter:
             self.graph_delim = set_graph_file_delim
 
         self._check_params()
+        self._check_cancelled()
 
-        if self.output_file_format in ['sif', 'csv']:
+        workers = min(self.workers or 1, _cpu_count())
+        if workers > 1 and self.output_file_format in ['lst', 'sif', 'csv'] \
+                and len(self.odb_results) >= self.min_parallel_edges:
+            graph_file = self._write_parallel(workers)
+
+        elif self.output_file_format in ['sif', 'csv']:
             prepared_sif_data = self._prepare_sif_csv()
             graph_file = self._write_sif_csv_file(graph_data=prepared_sif_data)
 
@@ -110,16 +208,20 @@ class Exporter:
         else:
             graph_file = self._write_json()
 
+        self._check_cancelled()
         map_file = self._write_mapping()
 
         return graph_file, map_file
 
+    @profiled('export.get_data')
     def get_data(self) -> bool:
         """Retrieve the requested data from the OrientDB database."""
         # Set which API function to call
         api_func = "export_full" if self.output_file_format == 'json' else 'export_slim'
 
-        self.odb_results = Client().apply_api_function(api_func).data  # raw data
+        client = Client(session=self.session).apply_api_function(api_func, progress=self.progress, cancel=self.cancel)
+        self.odb_results = client.data  # raw data
+        self._check_cancelled()
         self.mapping_dict = self._create_mapping()  # Integer mappings
 
         if not self.odb_results or not self.mapping_dict:
@@ -127,6 +229,11 @@ class Exporter:
 
         return True
 
+    def _check_cancelled(self):
+        """Raises CancelledError if the export was cancelled."""
+        if self.cancel is not None:
+            self.cancel.raise_if_cancelled()
+
     def _check_params(self):
         """Checks the passed parameters."""
         if self.output_file_format not in ['lst', 'sif', 'json', 'csv']:
@@ -135,6 +242,7 @@ class Exporter:
         if self.output_file_format == 'sif' and self.graph_delim not in ['\t', ' ']:
             raise ValueError("Delimiter for a SIF must be either tab-separated ('\t') or space-separated (' ')")
 
+    @profiled('export.prepare')
     def _prepare_edge_list(self) -> list:
         """Prepares edge list data for export."""
         edges = []
@@ -145,6 +253,7 @@ class Exporter:
 
         return edges
 
+    @profiled('export.write')
     def _write_edge_list_file(self, graph_data: list) -> str:
         """Method for writing edge list graph data to file."""
         with open(self.graph_path, 'w') as graph_file:
@@ -153,11 +262,13 @@ class Exporter:
 
         return self.graph_path
 
+    @profiled('export.write')
     def _write_json(self) -> str:
         with open(self.graph_path, 'w') as graph_file:
             json.dump(self.odb_results, fp=graph_file)
         return self.graph_path
 
+    @profiled('export.write_mapping')
     def _write_mapping(self) -> str:
         """Method for writing mapping file."""
         if self.mapping_path is None:  # If no provided path for map file, create one...
@@ -173,27 +284,52 @@ class Exporter:
 
         return self.mapping_path
 
+    @profiled('export.prepare')
     def _prepare_sif_csv(self) -> dict:
         """Method for preparing relation tuples and mappings for CSV and SIF files."""
         # Create a set of nodes and generate a mapping of RIDs to integers
 
-        triples = dict()
-        for rel in self.odb_results:
-            out_node = self.mapping_dict[rel['out_rid']][INDEX]
-            relation = rel['relation']
-            in_node = self.mapping_dict[rel['in_rid']][INDEX]
-
-            if out_node not in triples:
-                triples[out_node] = {relation: [in_node]}
-
-            elif relation not in triples[out_node]:
-                triples[out_node][relation] = [in_node]
-
-            else:
-                triples[out_node][relation].append(in_node)
+        return _triples(self._indexed_edges())
+
+    def _indexed_edges(self) -> List[tuple]:
+        """Returns the edges as (out index, relation, in index) tuples."""
+        mapping = self.mapping_dict
+        return [(mapping[rel['out_rid']][INDEX], rel['relation'], mapping[rel['in_rid']][INDEX])
+                for rel in self.odb_results]
+
+    @profiled('export.write_parallel')
+    def _write_parallel(self, workers: int) -> str:
+        """Writes the graph file with a process pool, one partial file per worker."""
+        if self.output_file_format == 'lst':
+            edges = self._prepare_edge_list()
+            size = -(-len(edges) // workers)
+            partitions = [edges[i * size:(i + 1) * size] for i in range(workers)]
+        else:
+            partitions = [[] for _ in range(workers)]
+            for edge in self._indexed_edges():
+                partitions[edge[0] % workers].append(edge)
+
+        part_paths = [f"{self.graph_path}.part{i}" for i in range(workers)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context()) as executor:
+                futures = [executor.submit(_write_partition, path, self.output_file_format, self.graph_delim, edges)
+                           for path, edges in zip(part_paths, partitions)]
+                for future in futures:
+                    future.result()
+                    self._check_cancelled()
+
+            with open(self.graph_path, 'wb') as graph_file:
+                for path in part_paths:
+                    with open(path, 'rb') as part_file:
+                        shutil.copyfileobj(part_file, graph_file)
+        finally:
+            for path in part_paths:
+                if os.path.exists(path):
+                    os.remove(path)
 
-        return triples
+        return self.graph_path
 
+    @profiled('export.write')
     def _write_sif_csv_file(self, graph_data: dict) -> str:
         """Method for writing SIF or CSV graph data to file."""
         with open(self.graph_path, 'w') as graph_file:
@@ -206,6 +342,7 @@ class Exporter:
 
         return self.graph_path
 
+    @profiled('export.mapping')
     def _create_mapping(self) -> dict:
         """Generates a mapping dict of rids to integers"""
         nodes = dict()
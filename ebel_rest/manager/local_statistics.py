@@ -0,0 +1,218 @@
+"""Compute knowledge graph statistics locally from a Graph or a saved export.
+
+The methods of :class:`LocalStatistics` mirror the functions in :mod:`ebel_rest.manager.statistics`, but instead of
+calling a server side function they are calculated with pandas group-bys over edges that are already in memory or
+on disk. This allows statistics on subgraphs and offline work. The columns are named like those of the server side
+functions.
+"""
+import os
+import json
+from typing import Union, Iterable
+
+import numpy as np
+import pandas as pd
+
+from ebel_rest.manager.core import Client, Statistics
+
+NAMESPACE_PATTERN = r'^\s*\w+\(\s*([A-Za-z][\w.\-]*)\s*:'
+
+EXPORT_COLUMN_MAPPING = {
+    'out_rid': 'subject_id',
+    'in_rid': 'object_id',
+    'out_bel': 'subject_bel',
+    'in_bel': 'object_bel',
+    'out_class': 'subject_class',
+    'in_class': 'object_class',
+}
+
+
+class LocalStatistics:
+    """Statistics calculated from locally available edges.
+
+    Parameters
+    ----------
+    source: Graph, Client, list, pandas.DataFrame or str
+        The edges to use. Can be a Graph (or any Client) returned by a query, a list of edge dictionaries, a
+        DataFrame or a path to a file created by :func:`ebel_rest.export_graph` ('json') or a CSV/TSV/Parquet
+        file with one edge per row.
+    """
+
+    def __init__(self, source: Union[Client, list, pd.DataFrame, str]):
+        self.frame = self._normalize(self._load(source))
+
+    @staticmethod
+    def _load(source) -> pd.DataFrame:
+        """Read the source into a DataFrame with one row per edge."""
+        if isinstance(source, pd.DataFrame):
+            return source.copy()
+
+        if isinstance(source, Client):
+            return pd.DataFrame(source._data or [])
+
+        if isinstance(source, (str, os.PathLike)):
+            path = str(source)
+            extension = os.path.splitext(path)[1].lower()
+            if extension == '.json':
+                with open(path, encoding='utf-8') as json_file:
+                    return pd.DataFrame(json.load(json_file))
+            elif extension == '.parquet':
+                return pd.read_parquet(path)
+            elif extension in ('.tsv', '.txt'):
+                return pd.read_csv(path, sep='\t')
+            elif extension == '.csv':
+                return pd.read_csv(path)
+            raise ValueError("File must be one of the following formats: 'json', 'csv', 'tsv', 'txt', 'parquet'")
+
+        if isinstance(source, Iterable):
+            return pd.DataFrame(list(source))
+
+        raise TypeError("source must be a Graph, list of edges, pandas.DataFrame or file path")
+
+    @staticmethod
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """Harmonize column names of exports and query results and add derived columns."""
+        df = df.rename(columns={k: v for k, v in EXPORT_COLUMN_MAPPING.items() if v not in df.columns})
+
+        if 'edge_id' in df.columns:
+            df = df.drop_duplicates('edge_id')
+
+        for so in ('subject', 'object'):
+            if f'{so}_id' not in df.columns and f'{so}_bel' in df.columns:
+                df[f'{so}_id'] = df[f'{so}_bel']
+            if f'{so}_namespace' not in df.columns and f'{so}_bel' in df.columns:
+                df[f'{so}_namespace'] = df[f'{so}_bel'].astype(str).str.extract(NAMESPACE_PATTERN, expand=False)
+
+        if 'year' not in df.columns and 'publication_date' in df.columns:
+            df['year'] = pd.to_numeric(df['publication_date'].astype(str).str.extract(r'(\d{4})', expand=False))
+
+        return df.reset_index(drop=True)
+
+    def _require(self, *columns):
+        missing = [col for col in columns if col not in self.frame.columns]
+        if missing:
+            raise ValueError(f"Edges are missing the following columns: {', '.join(missing)}")
+
+    @property
+    def _nodes(self) -> pd.DataFrame:
+        """Unique nodes with their class and namespace."""
+        parts = []
+        for so in ('subject', 'object'):
+            cols = [col for col in (f'{so}_id', f'{so}_class', f'{so}_namespace') if col in self.frame.columns]
+            part = self.frame[cols]
+            parts.append(part.rename(columns={col: col.split('_', 1)[1] for col in cols}))
+        return pd.concat(parts, ignore_index=True).drop_duplicates('id')
+
+    @property
+    def _publications(self) -> pd.DataFrame:
+        """Unique publications with their metadata."""
+        self._require('pmid')
+        return self.frame.dropna(subset=['pmid']).drop_duplicates('pmid')
+
+    @staticmethod
+    def _as_statistics(df: pd.DataFrame, function_name: str) -> Statistics:
+        stats = Statistics()
+        stats.function_name = function_name
+        stats._data = json.loads(df.to_json(orient='records'))
+        return stats
+
+    @staticmethod
+    def _count(df: pd.DataFrame, by: Union[str, list], name: str, sort_by: Union[str, list] = None) -> pd.DataFrame:
+        """Count the rows of each group and sort by count (default) or given columns."""
+        counts = df.groupby(by, dropna=True).size().reset_index(name=name)
+        if sort_by is None:
+            return counts.sort_values(name, ascending=False, kind='stable').reset_index(drop=True)
+        return counts.sort_values(sort_by, kind='stable').reset_index(drop=True)
+
+    def summarize(self) -> Statistics:
+        """Returns summary statistics on the graph."""
+        df = pd.DataFrame({
+            'metric': ['number_of_statements',
+                       'number_of_nodes',
+                       'number_of_publications',
+                       'number_of_last_authors',
+                       'number_of_namespaces'],
+            'value': [len(self.frame),
+                      len(self._nodes),
+                      self.frame['pmid'].nunique() if 'pmid' in self.frame.columns else 0,
+                      self.frame['last_author'].nunique() if 'last_author' in self.frame.columns else 0,
+                      self._nodes['namespace'].nunique() if 'namespace' in self._nodes else 0],
+        })
+        return self._as_statistics(df, 'local_statistics_summarize')
+
+    def publication_by_year(self) -> Statistics:
+        """Returns statistics on the number of publications per year."""
+        self._require('year')
+        pubs = self._publications.dropna(subset=['year']).astype({'year': np.int64})
+        pubs = pubs.rename(columns={'year': 'publication_year'})
+        df = self._count(pubs, 'publication_year', 'number_of_publications', sort_by='publication_year')
+        return self._as_statistics(df, 'local_statistics_publication_by_year')
+
+    def publication_by_number_of_statements(self) -> Statistics:
+        """Returns statistics on the number of statements per publication."""
+        self._require('pmid')
+        df = self._count(self.frame, 'pmid', 'number_of_statements')
+        meta_cols = [col for col in ('last_author', 'title', 'journal', 'publication_date')
+                     if col in self.frame.columns]
+        if meta_cols:
+            df = df.merge(self._publications[['pmid'] + meta_cols], on='pmid', how='left')
+            df = df[['pmid'] + meta_cols + ['number_of_statements']]
+        return self._as_statistics(df, 'local_statistics_publication_by_number_of_statements')
+
+    def last_author_by_number_of_publications(self) -> Statistics:
+        """Returns statistics on the number of publications per author."""
+        self._require('last_author')
+        df = self._count(self._publications, 'last_author', 'number_of_publications')
+        return self._as_statistics(df, 'local_statistics_last_author_by_number_of_publications')
+
+    def last_author_by_number_of_statements(self) -> Statistics:
+        """Returns statistics on the number of statements per author."""
+        self._require('last_author')
+        df = self._count(self.frame, 'last_author', 'number_of_bel_statements')
+        return self._as_statistics(df, 'local_statistics_last_author_by_number_of_statements')
+
+    def namespace_by_count(self) -> Statistics:
+        """Returns the number of nodes for each namespace."""
+        df = self._count(self._nodes, 'namespace', 'number_of_nodes')
+        return self._as_statistics(df, 'local_statistics_namespace_count')
+
+    def node_namespace_order_by_count(self) -> Statistics:
+        """Returns the frequency of each node type and namespace in order of count."""
+        self._require('subject_class', 'object_class')
+        df = self._count(self._nodes.rename(columns={'class': 'node_class'}), ['node_class', 'namespace'], 'count')
+        return self._as_statistics(df, 'local_statistics_node_namespace_order_by_count')
+
+    def node_namespace_order_by_namespace(self) -> Statistics:
+        """Returns the frequency of each node type and namespace in order of namespace."""
+        self._require('subject_class', 'object_class')
+        df = self._count(self._nodes.rename(columns={'class': 'node_class'}), ['node_class', 'namespace'], 'count',
+                         sort_by=['namespace', 'node_class'])
+        return self._as_statistics(df, 'local_statistics_node_namespace_order_by_namespace')
+
+    def edges(self) -> Statistics:
+        """Returns statistics on the frequency of each edge type."""
+        self._require('relation')
+        df = self._count(self.frame.rename(columns={'relation': 'edge_class'}), 'edge_class', 'number_of_edges')
+        df = df[['number_of_edges', 'edge_class']]
+        return self._as_statistics(df, 'local_statistics_edges')
+
+    def nodes(self) -> Statistics:
+        """Returns statistics on the frequency of each node type."""
+        self._require('subject_class', 'object_class')
+        df = self._count(self._nodes.rename(columns={'class': 'node_class'}), 'node_class', 'number_of_nodes')
+        df = df[['number_of_nodes', 'node_class']]
+        return self._as_statistics(df, 'local_statistics_nodes')
+
+    def total_bel_nodes(self) -> Statistics:
+        """Returns the total number of nodes."""
+        df = pd.DataFrame({'number_of_bel_nodes': [len(self._nodes)]})
+        return self._as_statistics(df, 'local_statistics_total_bel_nodes')
+
+    def total_bel_edges(self) -> Statistics:
+        """Returns the total number of edges."""
+        df = pd.DataFrame({'number_of_stmts': [len(self.frame)]})
+        return self._as_statistics(df, 'local_statistics_total_stmts')
+
+    def total_publications(self) -> Statistics:
+        """Returns the total number of publications."""
+        total = self.frame['pmid'].nunique() if 'pmid' in self.frame.columns else 0
+        return self._as_statistics(pd.DataFrame({'number_of_pubs': [total]}), 'local_statistics_total_publications')
@@ -0,0 +1,236 @@
+"""Local SQLite mirror of the BEL relations of a knowledge graph.
+
+The first :meth:`Mirror.sync` pulls all edges page by page, later syncs only fetch the edges whose record ID is
+above the highest one of their cluster in the mirror. Removed edges are found on demand by comparing the IDs of all
+edges. Queries by PMID, annotation, subgraph, last author and gene can then be answered locally by attaching the
+mirror to a session.
+
+The edges are pulled with direct SQL and the projection of the graph functions instead of `export_full`, whose
+rows lack the involved genes, classes and citation of the edges needed to answer these queries. Paging by record ID
+also lets an interrupted pull resume instead of starting over with one large response.
+
+Example
+-------
+    >>> session = connect(user, password, server, db_name)
+    >>> mirror = Mirror('kg.sqlite', session=session)
+    >>> mirror.sync()
+    {'added': 1234567, 'removed': 0}
+    >>> session.mirror = mirror
+    >>> query.pmid(30310104)  # Answered from kg.sqlite
+"""
+import json
+import time
+import sqlite3
+import threading
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from ebel_rest.constants import CAUSAL_RELATIONS, CORRELATIVE_RELATIONS, EDGE_ID_PROJECTION, GRAPH_EDGE_PROJECTION
+from ebel_rest.manager import query, sql_tools, ss_functions
+from ebel_rest.manager.session import Session
+
+EDGE_CLASS = 'bel_relation'
+EDGE_IDS_SQL = f"SELECT {EDGE_ID_PROJECTION} FROM {EDGE_CLASS}"
+EDGES_SQL = f"SELECT {GRAPH_EDGE_PROJECTION} FROM {EDGE_CLASS}"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS edge (
+    edge_id TEXT PRIMARY KEY,
+    pmid INTEGER,
+    last_author TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edge_gene (
+    edge_id TEXT NOT NULL,
+    gene TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edge_annotation (
+    edge_id TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS edge_pmid ON edge (pmid);
+CREATE INDEX IF NOT EXISTS edge_last_author ON edge (last_author);
+CREATE INDEX IF NOT EXISTS edge_gene_gene ON edge_gene (gene);
+CREATE INDEX IF NOT EXISTS edge_gene_edge_id ON edge_gene (edge_id);
+CREATE INDEX IF NOT EXISTS edge_annotation_name ON edge_annotation (namespace, name);
+CREATE INDEX IF NOT EXISTS edge_annotation_value ON edge_annotation (name);
+CREATE INDEX IF NOT EXISTS edge_annotation_edge_id ON edge_annotation (edge_id);
+"""
+
+
+class Mirror:
+    """Indexed local copy of all BEL relations in a SQLite database.
+
+    Parameters
+    ----------
+    path: str
+        Path of the SQLite database. It is created if it doesn't exist. Use ':memory:' for a temporary mirror.
+    session: Session
+        Session used for syncing. Defaults to the session created by :func:`ebel_rest.connect`.
+    """
+
+    def __init__(self, path: str, session: Session = None):
+        self.path = path
+        self.session = session
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def __len__(self) -> int:
+        """Number of edges in the mirror."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM edge").fetchone()[0]
+
+    @property
+    def last_sync(self) -> Optional[float]:
+        """Time of the last sync as seconds since the epoch, None if the mirror was never synced."""
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return float(row[0]) if row else None
+
+    def sync(self, page_size: int = 10000, batch_size: int = 500, check_removed: bool = False) -> Dict[str, int]:
+        """Update the mirror to the current state of the knowledge graph.
+
+        New edges are fetched with a record ID cursor per cluster, starting above the highest record ID of the
+        cluster in the mirror, and from the highest cluster on for new clusters. Each page or batch of edges is
+        committed on its own and the mirror is only locked while it is written, so queries are answered during a
+        sync. If a sync fails, the next one continues after the last committed page.
+
+        Parameters
+        ----------
+        page_size: int
+            Number of records fetched per request while pulling edges or IDs.
+        batch_size: int
+            Number of missing edges fetched per request if check_removed is True.
+        check_removed: bool
+            If True, the IDs of all edges are fetched to delete the removed edges from the mirror. This also fetches
+            missing edges below the highest record IDs, e.g. of clusters which were empty during earlier syncs.
+
+        Returns
+        -------
+        dict
+            Number of 'added' and 'removed' edges.
+        """
+        added = removed = 0
+        for sql_query in self._new_edge_queries():
+            rows = query.iter_sql(sql_query, page_size=page_size, cursor='rid', session=self.session)
+            while True:
+                page = list(islice(rows, page_size))  # Fetched without holding the lock
+                if not page:
+                    break
+                added += self._insert(page)
+
+        if check_removed:
+            with self._lock:
+                local_ids = {row[0] for row in self._connection.execute("SELECT edge_id FROM edge")}
+            remote_ids = {row['edge_id'] for row in query.iter_sql(EDGE_IDS_SQL, page_size=page_size, cursor='rid',
+                                                                   session=self.session)}
+            removed = self._delete(local_ids - remote_ids)
+            missing = sorted(remote_ids - local_ids, key=sql_tools.rid_key)
+            for start in range(0, len(missing), batch_size):
+                batch = missing[start:start + batch_size]
+                sql_query = f"{EDGES_SQL} WHERE @rid IN [{', '.join(batch)}]"
+                added += self._insert(query.sql(sql_query, session=self.session).data)
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)",
+                                     (str(time.time()),))
+        return {'added': added, 'removed': removed}
+
+    def _new_edge_queries(self) -> List[str]:
+        """Return the queries of the edges above the highest record ID of each cluster in the mirror."""
+        with self._lock:
+            edge_ids = [row[0] for row in self._connection.execute("SELECT edge_id FROM edge")]
+        if not edge_ids:
+            return [EDGES_SQL]
+
+        highest = {}
+        for cluster, position in map(sql_tools.rid_key, edge_ids):
+            highest[cluster] = max(highest.get(cluster, position), position)
+        clusters = sorted(highest)
+        queries = [f"{EDGES_SQL} WHERE @rid > #{cluster}:{highest[cluster]} AND @rid < #{cluster + 1}:0"
+                   for cluster in clusters[:-1]]
+        queries.append(f"{EDGES_SQL} WHERE @rid > #{clusters[-1]}:{highest[clusters[-1]]}")
+        return queries
+
+    def _insert(self, rows: List[dict]) -> int:
+        """Insert or replace the rows in one transaction."""
+        inserted = 0
+        with self._lock, self._connection:
+            for row in rows:
+                edge_id = row['edge_id']
+                self._connection.execute("INSERT OR REPLACE INTO edge (edge_id, pmid, last_author, record) "
+                                         "VALUES (?, ?, ?, ?)",
+                                         (edge_id, row.get('pmid'), row.get('last_author'), json.dumps(row)))
+                for table in ('edge_gene', 'edge_annotation'):
+                    self._connection.execute(f"DELETE FROM {table} WHERE edge_id = ?", (edge_id,))
+                genes = set(row.get('subject_involved_genes') or []) | set(row.get('object_involved_genes') or [])
+                self._connection.executemany("INSERT INTO edge_gene (edge_id, gene) VALUES (?, ?)",
+                                             [(edge_id, gene) for gene in genes])
+                annotations = [(edge_id, namespace, str(name))
+                               for namespace, names in (row.get('annotation') or {}).items()
+                               for name in (names if isinstance(names, list) else [names])]
+                self._connection.executemany("INSERT INTO edge_annotation (edge_id, namespace, name) VALUES (?, ?, ?)",
+                                             annotations)
+                inserted += 1
+        return inserted
+
+    def _delete(self, edge_ids: Iterable[str]) -> int:
+        params = [(edge_id,) for edge_id in edge_ids]
+        with self._lock, self._connection:
+            for table in ('edge', 'edge_gene', 'edge_annotation'):
+                self._connection.executemany(f"DELETE FROM {table} WHERE edge_id = ?", params)
+        return len(params)
+
+    def _select(self, condition: str, params: tuple) -> List[dict]:
+        with self._lock:
+            rows = self._connection.execute(f"SELECT record FROM edge WHERE {condition} ORDER BY rowid", params)
+            return [json.loads(record) for record, in rows]
+
+    def answer(self, function_name: str, *args) -> Optional[List[dict]]:
+        """Return the result of an API function from the mirror or None if the mirror can't answer it.
+
+        Answers bel_by_pmid, bel_by_annotation, bel_by_subgraph, bel_causal_correlative_by_gene and
+        bel_by_last_author without edge class, node class and namespace filters.
+        """
+        args = [str(arg) for arg in args]
+        if function_name == ss_functions.BEL_BY_PMID and len(args) == 1 and args[0].isdigit():
+            return self._select("pmid = ?", (int(args[0]),))
+
+        if function_name == ss_functions.BEL_BY_ANNOTATION and 1 <= len(args) <= 2:
+            namespace, name = (args + [''])[:2]
+            if name:
+                return self._select("edge_id IN (SELECT edge_id FROM edge_annotation WHERE namespace = ? AND "
+                                    "name = ?)", (namespace, name))
+            return self._select("edge_id IN (SELECT edge_id FROM edge_annotation WHERE namespace = ?)", (namespace,))
+
+        if function_name == ss_functions.BEL_BY_SUBGRAPH and len(args) == 1:
+            return self._select("edge_id IN (SELECT edge_id FROM edge_annotation WHERE name = ?)", (args[0],))
+
+        if function_name == ss_functions.BEL_CAUSAL_CORRELATIVE_BY_GENE and len(args) == 1:
+            relations = CAUSAL_RELATIONS + CORRELATIVE_RELATIONS
+            return self._select(f"edge_id IN (SELECT edge_id FROM edge_gene WHERE gene = ?) AND "
+                                f"json_extract(record, '$.relation') IN ({', '.join('?' * len(relations))})",
+                                (args[0], *relations))
+
+        if function_name == ss_functions.BEL_BY_LAST_AUTHOR and args and not any(args[1:]):
+            return self._select("last_author = ?", (args[0],))
+
+        return None
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> 'Mirror':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,245 @@
+"""Opt-in profiling of the stages of API calls, graph operations, rendering and exports.
+
+Profiling is off by default and costs one global lookup per stage. It is enabled for a block with :class:`Profiler`
+or for the whole process with the environment variable EBEL_REST_PROFILE. If the variable is '1', a report is
+printed to stderr at exit, any other value is used as path to which the collapsed stacks are written in addition.
+
+Example
+-------
+    >>> with Profiler(memory=True) as profiler:
+    ...     graph = query.belish('p(HGNC:?) increases ?')
+    ...     graph.table
+    >>> print(profiler.report())
+    >>> profiler.write_collapsed('profile.folded')  # e.g. flamegraph.pl profile.folded > profile.svg
+"""
+import os
+import sys
+import time
+import atexit
+import cProfile
+import functools
+import threading
+import tracemalloc
+import contextlib
+from typing import Callable, Dict, List, Optional
+
+PROFILE_ENV = 'EBEL_REST_PROFILE'
+
+_active = None
+_null_stage = contextlib.nullcontext()
+
+
+class StageStats:
+    """Accumulated measurements of one stage, identified by its stack of stage names."""
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.children_wall = 0.0
+        self.memory_peak = 0
+
+    @property
+    def self_wall(self) -> float:
+        """Wall time not spent in nested stages."""
+        return max(self.wall - self.children_wall, 0.0)
+
+
+class _MemoryFrame:
+    """Traced memory at the start of an open stage and its peak so far."""
+    __slots__ = ('start', 'peak')
+
+    def __init__(self, start: int):
+        self.start = start
+        self.peak = start
+
+
+class Profiler:
+    """Collects wall and CPU time of the stages run while it is active.
+
+    Stages of all threads are collected. Nested stages are recorded with their full stack, e.g.
+    'client.request;session.network'.
+
+    Parameters
+    ----------
+    memory: bool
+        If True, the tracemalloc peak of each stage is recorded. Tracing memory slows down all allocations.
+    cpu_profile: bool
+        If True, the calling thread is also profiled with cProfile, see :attr:`stats`.
+    """
+
+    def __init__(self, memory: bool = False, cpu_profile: bool = False):
+        self.memory = memory
+        self.cpu_profile = cpu_profile
+        self.stages: Dict[tuple, StageStats] = {}
+        self.stats = None
+        self._profile = None
+        self._started_tracemalloc = False
+        self._previous = None
+        self._local = threading.local()
+        self._memory_frames: List[_MemoryFrame] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'Profiler':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> 'Profiler':
+        """Activate the profiler."""
+        global _active
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.cpu_profile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._previous, _active = _active, self
+        return self
+
+    def stop(self):
+        """Deactivate the profiler and restore the previously active one."""
+        global _active
+        _active = self._previous
+        if self._profile is not None:
+            import pstats
+
+            self._profile.disable()
+            self.stats = pstats.Stats(self._profile)
+            self._profile = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Measure a stage. Use :func:`stage` in library code, which does nothing if no profiler is active."""
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(name)
+        key = tuple(stack)
+        memory = self._open_memory_frame() if self.memory and tracemalloc.is_tracing() else None
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            peak = self._close_memory_frame(memory) if memory is not None else 0
+            stack.pop()
+            with self._lock:
+                stats = self.stages.setdefault(key, StageStats())
+                stats.calls += 1
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.memory_peak = max(stats.memory_peak, peak)
+                if len(key) > 1:
+                    self.stages.setdefault(key[:-1], StageStats()).children_wall += wall
+
+    def _fold_peak(self):
+        """Add the tracemalloc peak since the last reset to the running peaks of all open stages."""
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._memory_frames:
+            frame.peak = max(frame.peak, peak)
+
+    def _open_memory_frame(self) -> '_MemoryFrame':
+        with self._lock:
+            # The enclosing stages keep their peak, the counter is reset for the new stage
+            self._fold_peak()
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            frame = _MemoryFrame(tracemalloc.get_traced_memory()[0])
+            self._memory_frames.append(frame)
+        return frame
+
+    def _close_memory_frame(self, frame: '_MemoryFrame') -> int:
+        """Return the peak of the stage above its start, the enclosing stages get max(their peak, this peak)."""
+        with self._lock:
+            self._fold_peak()
+            self._memory_frames.remove(frame)
+        return frame.peak - frame.start
+
+    def report(self, sort: str = 'wall') -> str:
+        """Return a table with calls, wall, self and CPU time and memory peak per stage.
+
+        Parameters
+        ----------
+        sort: {'wall', 'self', 'cpu', 'calls', 'memory', 'stage'}
+            Column by which the stages are sorted, all but 'stage' in descending order.
+        """
+        keys = {
+            'wall': lambda item: -item[1].wall,
+            'self': lambda item: -item[1].self_wall,
+            'cpu': lambda item: -item[1].cpu,
+            'calls': lambda item: -item[1].calls,
+            'memory': lambda item: -item[1].memory_peak,
+            'stage': lambda item: item[0],
+        }
+        if sort not in keys:
+            raise ValueError(f"sort must be one of {', '.join(keys)}")
+
+        with self._lock:
+            items = sorted(self.stages.items(), key=keys[sort])
+        lines = [f"{'stage':<48} {'calls':>7} {'wall [s]':>10} {'self [s]':>10} {'cpu [s]':>10} {'peak [MiB]':>10}"]
+        for key, stats in items:
+            name = '  ' * (len(key) - 1) + key[-1]
+            lines.append(f"{name:<48} {stats.calls:>7} {stats.wall:>10.4f} {stats.self_wall:>10.4f} "
+                         f"{stats.cpu:>10.4f} {stats.memory_peak / 2 ** 20:>10.2f}")
+        return '\n'.join(lines)
+
+    def collapsed(self) -> List[str]:
+        """Return the stages in the collapsed stack format of flamegraph tools, with self time in microseconds."""
+        with self._lock:
+            return [f"{';'.join(key)} {round(stats.self_wall * 1e6)}" for key, stats in sorted(self.stages.items())]
+
+    def write_collapsed(self, path: str) -> str:
+        """Write the collapsed stacks to a file, e.g. for flamegraph.pl or speedscope, and return its path."""
+        with open(path, 'w') as collapsed_file:
+            collapsed_file.write('\n'.join(self.collapsed()) + '\n')
+        return path
+
+
+def active_profiler() -> Optional[Profiler]:
+    """Return the active profiler or None."""
+    return _active
+
+
+def stage(name: str):
+    """Context manager which measures a stage if a profiler is active."""
+    profiler = _active
+    if profiler is None:
+        return _null_stage
+    return profiler.stage(name)
+
+
+def profiled(name: str) -> Callable:
+    """Decorator which measures each call of the function as stage if a profiler is active."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _profile_process(setting: str):
+    """Profile the whole process and report at exit, used if the environment variable EBEL_REST_PROFILE is set."""
+    profiler = Profiler().start()
+
+    def report():
+        profiler.stop()
+        print(profiler.report(), file=sys.stderr)
+        if setting != '1':
+            profiler.write_collapsed(setting)
+
+    atexit.register(report)
+    return profiler
+
+
+if os.environ.get(PROFILE_ENV):
+    _profile_process(os.environ[PROFILE_ENV])
@@ -0,0 +1,129 @@
+"""Progress reporting and cooperative cancellation of long running API calls.
+
+A progress callback is called with a :class:`Progress` whenever a chunk of the response was received and once more
+after the records were decoded. A :class:`CancellationToken` can be cancelled from any thread; the call then stops
+reading the response, closes the connection and raises :class:`CancelledError`.
+
+Example
+-------
+    >>> token = CancellationToken()
+    >>> exporter = Exporter('graph.json', 'json', progress=tqdm_progress(), cancel=token)
+    >>> threading.Timer(60, token.cancel).start()  # Give up after a minute
+    >>> exporter.export()
+"""
+import time
+import threading
+from typing import Callable, NamedTuple, Optional
+
+
+class CancelledError(Exception):
+    """Raised when a call is aborted by its :class:`CancellationToken`."""
+
+
+class Progress(NamedTuple):
+    """State of a running API call."""
+    bytes_received: int
+    bytes_total: Optional[int]
+    records: int
+    elapsed: float
+    done: bool = False
+
+
+ProgressCallback = Callable[[Progress], None]
+
+
+class CancellationToken:
+    """Flag which is checked by running calls while they receive and process data."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request all calls using this token to stop."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise :class:`CancelledError` if the token was cancelled."""
+        if self._event.is_set():
+            raise CancelledError("Call was cancelled")
+
+
+class Tracker:
+    """Reports the progress of one API call and checks its cancellation token.
+
+    Parameters
+    ----------
+    progress: Callable[[Progress], None]
+        Called with the current progress. If None, progress is not reported.
+    cancel: CancellationToken
+        Token which aborts the call. If None, the call can't be cancelled.
+    """
+
+    def __init__(self, progress: ProgressCallback = None, cancel: CancellationToken = None):
+        self.progress = progress
+        self.cancel = cancel
+        self.start = time.perf_counter()
+        self.bytes_received = 0
+        self.bytes_total = None
+
+    def check(self):
+        """Raise :class:`CancelledError` if the call was cancelled."""
+        if self.cancel is not None:
+            self.cancel.raise_if_cancelled()
+
+    def received(self, bytes_received: int, bytes_total: int = None):
+        """Record the number of bytes received so far, used as chunk callback of the transports."""
+        self.bytes_received = bytes_received
+        self.bytes_total = bytes_total
+        self.check()
+        self._report(0, False)
+
+    def finish(self, records: int):
+        """Report that the response was decoded into the given number of records."""
+        self.check()
+        self._report(records, True)
+
+    def _report(self, records: int, done: bool):
+        if self.progress is not None:
+            self.progress(Progress(self.bytes_received, self.bytes_total, records, time.perf_counter() - self.start,
+                                   done))
+
+
+def tqdm_progress(desc: str = None, **kwargs) -> ProgressCallback:
+    """Return a progress callback which shows the received bytes in a tqdm progress bar.
+
+    In notebooks the widget based bar of tqdm.auto is used. Requires the optional dependency tqdm
+    (`pip install ebel_rest[progress]`).
+
+    Parameters
+    ----------
+    desc: str
+        Description shown in front of the bar.
+    kwargs
+        Passed to the tqdm constructor.
+
+    Returns
+    -------
+    Callable[[Progress], None]
+    """
+    try:
+        from tqdm.auto import tqdm
+    except ImportError:
+        raise ImportError("tqdm is required for progress bars, install it with 'pip install tqdm'") from None
+
+    bar = tqdm(desc=desc, unit='B', unit_scale=True, unit_divisor=1024, **kwargs)
+
+    def update(progress: Progress):
+        if progress.bytes_total is not None and bar.total != progress.bytes_total:
+            bar.total = progress.bytes_total
+        bar.update(progress.bytes_received - bar.n)
+        if progress.records:
+            bar.set_postfix(records=progress.records, refresh=False)
+        if progress.done:
+            bar.close()
+
+    return update
@@ -1,19 +1,207 @@
+import time
+import random
+import weakref
+import threading
+from collections import OrderedDict, defaultdict, deque
+from typing import (Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple, Union, Mapping, Sequence,
+                    TYPE_CHECKING)
+
+from ebel_rest.constants import EDGE_ID_PROJECTION, GRAPH_EDGE_PROJECTION, SLIM_EDGE_PROJECTION
 from ebel_rest.manager.core import Graph, Client
-from ebel_rest.manager import ss_functions
-
-
-def annotation(namespace: str, name: str = '') -> Graph:
+from ebel_rest.manager.session import Session
+from ebel_rest.manager.progress import CancellationToken, ProgressCallback
+from ebel_rest.manager import ss_functions, sql_tools, belish as belish_parser
+
+if TYPE_CHECKING:
+    import numpy as np
+
+PMIDS_SQL = "SELECT pmid FROM bel_relation WHERE pmid IS NOT NULL GROUP BY pmid ORDER BY pmid"
+SAMPLE_BATCH_SIZE = 500
+PATH_MEMO_SIZE = 4096
+PATH_MEMO_TTL = 3600
+PATH_TRAVERSAL_SQL = f"SELECT {GRAPH_EDGE_PROJECTION}, in.name as object_name FROM bel_relation WHERE "
+PATH_TRAVERSAL_MAX_EDGES = 20000
+
+_path_memos = weakref.WeakKeyDictionary()
+
+
+class _PathMemo(MutableMapping):
+    """Memo of the edges of paths, which keeps the `max_entries` most recently used entries for `ttl` seconds."""
+
+    def __init__(self, max_entries: int = PATH_MEMO_SIZE, ttl: Optional[float] = PATH_MEMO_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            stored_at, value = self._entries[key]
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                raise KeyError(key)
+            self._entries.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._entries[key]
+
+    def __iter__(self) -> Iterator:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _check_limits(limit: Optional[int], offset: Optional[int], sample: Optional[int]):
+    for name, value in (('limit', limit), ('offset', offset), ('sample', sample)):
+        if value is not None and (not isinstance(value, int) or value < 0):
+            raise ValueError(f"{name} must be a non-negative integer")
+
+
+def _limited_graph(function_name: str,
+                   args: tuple,
+                   sql_query: Optional[str],
+                   limit: int = None,
+                   offset: int = None,
+                   sample: int = None,
+                   seed: int = None,
+                   session: Session = None,
+                   slim: bool = False) -> Graph:
+    """Call an API function with limit, offset and sample applied to its edges.
+
+    If an equivalent direct SQL query of the form 'SELECT GRAPH_EDGE_PROJECTION FROM <class> [WHERE ...]' is given,
+    limit and offset are pushed down to the server. For a sample only the IDs of the edges are fetched before the
+    sampled edges. Otherwise the function is called and the edges are selected locally, which only :func:`path` and
+    :func:`belish` statements that can't be compiled to SQL rely on. If slim is True, the SQL query is sent with the
+    slim projection even without limits. Calls which the mirror of the session answers are selected locally from
+    its edges ordered by record ID.
+    """
+    limited = limit is not None or offset is not None or sample is not None
+    if limited:
+        _check_limits(limit, offset, sample)
+
+    answered = None
+    if limited or slim:
+        client_session = Client(session=session).session
+        mirror = client_session.mirror if client_session is not None else None
+        answered = mirror.answer(function_name, *args) if mirror is not None else None
+
+    if slim and sql_query is not None:
+        sql_query = sql_tools.with_projection(sql_query, SLIM_EDGE_PROJECTION)
+
+    if not limited:
+        if slim and sql_query is not None and answered is None:
+            graph = Graph(session=session).apply_api_function(ss_functions.DIRECT_SQL, sql_query)
+            graph.function_name = function_name
+            return graph
+        return Graph(session=session).apply_api_function(function_name, *args)
+
+    rng = random.Random(seed)
+
+    if answered is not None:
+        # Answered by the mirror of the session, in the order of the pushed down queries
+        graph = Graph(session=session)
+        graph.function_name = function_name
+        edges = sorted(answered, key=lambda edge: sql_tools.rid_key(edge['edge_id']))[offset or 0:]
+        edges = edges if limit is None else edges[:limit]
+        graph._data = edges if sample is None else rng.sample(edges, min(sample, len(edges)))
+        return graph
+
+    if sql_query is None:
+        graph = Graph(session=session).apply_api_function(function_name, *args)
+        edges = graph.edges[offset or 0:]
+        edges = edges if limit is None else edges[:limit]
+        graph._data = edges if sample is None else rng.sample(edges, min(sample, len(edges)))
+        return graph
+
+    graph = Graph(session=session)
+    if sample is None:
+        page_query = sql_tools.skip_limit_page(sql_tools.order_by_rid(sql_query), offset or 0, limit)
+        graph.apply_api_function(ss_functions.DIRECT_SQL, page_query)
+    else:
+        ids_query = sql_tools.order_by_rid(sql_tools.with_projection(sql_query, EDGE_ID_PROJECTION))
+        if limit is not None or offset:
+            ids_query = sql_tools.skip_limit_page(ids_query, offset or 0, limit)
+        ids = [row['edge_id'] for row in Client(session=session).apply_api_function(ss_functions.DIRECT_SQL,
+                                                                                    ids_query).data]
+        chosen = rng.sample(ids, min(sample, len(ids)))
+        graph._data = []
+        for start in range(0, len(chosen), SAMPLE_BATCH_SIZE):
+            batch = chosen[start:start + SAMPLE_BATCH_SIZE]
+            batch_query = sql_tools.add_condition(sql_query, f"@rid IN [{', '.join(batch)}]")
+            graph._data.extend(Graph(session=session).apply_api_function(ss_functions.DIRECT_SQL, batch_query).data)
+    graph.function_name = function_name
+    return graph
+
+
+def _validate_term(session: Optional[Session], kind: str, term: str, namespace: str = None):
+    """Raise ValueError if the session has a term index which doesn't contain the term."""
+    session = Client(session=session).session
+    if session is not None and session.terms is not None:
+        session.terms.validate(kind, term, namespace)
+
+
+def annotation(namespace: str,
+               name: str = '',
+               limit: int = None,
+               offset: int = None,
+               sample: int = None,
+               seed: int = None,
+               session: Session = None,
+               slim: bool = False) -> Graph:
     """Retrieve a list of BEL statements defined by a given namespace and name/term.
 
     :param str namespace: The namespace of the given name/term/value e.g. 'HGNC' or 'MGI'.
     :param str name: The term or value e.g. a protein symbol or MeSH term.
+    :param int limit: Maximum number of edges to return.
+    :param int offset: Number of edges to skip.
+    :param int sample: Return a random sample of this many edges (after offset and limit are applied).
+    :param int seed: Seed of the random sample.
+    :param Session session: Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    :param bool slim: If True, only the edge IDs, subjects, objects, relations and PMIDs are requested. Evidence,
+        citation, annotation and involved genes are loaded on demand, see
+        :meth:`ebel_rest.manager.core.Graph.load_details`.
     :return: Graph of the results
     :rtype: Graph
+    :raises ValueError: If the session has a term index which doesn't contain the namespace or name.
     """
-    return Graph().apply_api_function(ss_functions.BEL_BY_ANNOTATION, namespace, name)
-
-
-def last_author(author: str, edge_class: str = '', node_class: str = '', exclude_namespace: str = '') -> Graph:
+    _validate_term(session, 'annotation', namespace)
+    if name:
+        _validate_term(session, 'annotation_value', name, namespace)
+    sql_query = None
+    if slim or limit is not None or offset is not None or sample is not None:
+        conditions = ["annotation CONTAINSKEY :namespace"]
+        if name:
+            conditions.append("annotation[:namespace] CONTAINS :name")
+        sql_query = sql_tools.bind_parameters(
+            f"SELECT {GRAPH_EDGE_PROJECTION} FROM bel_relation WHERE {' AND '.join(conditions)}",
+            {'namespace': namespace, **({'name': name} if name else {})})
+
+    return _limited_graph(ss_functions.BEL_BY_ANNOTATION, (namespace, name), sql_query, limit, offset, sample, seed,
+                          session, slim)
+
+
+def last_author(author: str,
+                edge_class: str = '',
+                node_class: str = '',
+                exclude_namespace: str = '',
+                limit: int = None,
+                offset: int = None,
+                sample: int = None,
+                seed: int = None,
+                session: Session = None,
+                slim: bool = False) -> Graph:
     """Retrieve a list of BEL statements defined by a last author and filtered using edge/node classes or
     node namespace.
 
@@ -27,58 +215,231 @@ def last_author(author: str, edge_class: str = '', node_class: str = '', exclude
         Type of node class to include in results. Can be specific (e.g. 'protein') or a parent class (e.g. 'bel').
     exclude_namespace: str
         A namespace to exclude such as 'MGI' to exclude mouse proteins.
+    limit: int
+        Maximum number of edges to return.
+    offset: int
+        Number of edges to skip.
+    sample: int
+        Return a random sample of this many edges (after offset and limit are applied).
+    seed: int
+        Seed of the random sample.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    slim: bool
+        If True, only the edge IDs, subjects, objects, relations and PMIDs are requested. Evidence, citation,
+        annotation and involved genes are loaded on demand, see :meth:`ebel_rest.manager.core.Graph.load_details`.
+
+    Raises
+    ------
+    ValueError
+        If edge_class or node_class is not a valid class name or a limit is negative.
 
     Returns
     -------
     Graph object.
     """
-    return Graph().apply_api_function(ss_functions.BEL_BY_LAST_AUTHOR,
-                                      author,
-                                      edge_class,
-                                      node_class,
-                                      exclude_namespace)
-
-
-def pmid(pmid: int) -> Graph:
+    sql_query = None
+    if slim or limit is not None or offset is not None or sample is not None:
+        for class_name in (edge_class, node_class):
+            if class_name and not class_name.isidentifier():
+                raise ValueError(f"Invalid class name: {class_name!r}")
+        conditions = ["citation.last_author = :author"]
+        if node_class:
+            conditions.append(f"(out INSTANCEOF '{node_class}' OR in INSTANCEOF '{node_class}')")
+        if exclude_namespace:
+            conditions.append("out.namespace <> :namespace AND in.namespace <> :namespace")
+        sql_query = sql_tools.bind_parameters(
+            f"SELECT {GRAPH_EDGE_PROJECTION} FROM {edge_class or 'bel_relation'} WHERE {' AND '.join(conditions)}",
+            {'author': author, **({'namespace': exclude_namespace} if exclude_namespace else {})})
+
+    return _limited_graph(ss_functions.BEL_BY_LAST_AUTHOR, (author, edge_class, node_class, exclude_namespace),
+                          sql_query, limit, offset, sample, seed, session, slim)
+
+
+def pmid(pmid: int,
+         limit: int = None,
+         offset: int = None,
+         sample: int = None,
+         seed: int = None,
+         session: Session = None,
+         slim: bool = False) -> Graph:
     """Retrieve a list of BEL statements extracted from a given PMID.
 
     Parameters
     ----------
     pmid: int
         PubMed ID of a publication.
+    limit: int
+        Maximum number of edges to return.
+    offset: int
+        Number of edges to skip.
+    sample: int
+        Return a random sample of this many edges (after offset and limit are applied).
+    seed: int
+        Seed of the random sample.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    slim: bool
+        If True, only the edge IDs, subjects, objects, relations and PMIDs are requested. Evidence, citation,
+        annotation and involved genes are loaded on demand, see :meth:`ebel_rest.manager.core.Graph.load_details`.
 
     Returns
     -------
     Graph
     """
-    return Graph().apply_api_function(ss_functions.BEL_BY_PMID, pmid)
+    sql_query = f"SELECT {GRAPH_EDGE_PROJECTION} FROM bel_relation WHERE pmid = {int(pmid)}"
+    return _limited_graph(ss_functions.BEL_BY_PMID, (pmid,), sql_query, limit, offset, sample, seed, session, slim)
 
 
-def list_pmids() -> list:
-    """Returns a list of curated PMIDs in the knowledge graph."""
-    return Client().apply_api_function(ss_functions.ALL_PMIDS).table['pmid'].values.tolist()
+def iter_pmids(page_size: int = None, session: Session = None) -> Iterator[int]:
+    """Iterate over the curated PMIDs in the knowledge graph.
+
+    Parameters
+    ----------
+    page_size: int
+        If given, PMIDs are fetched in pages of this size so that only one page is held in memory at a time.
+        Otherwise all PMIDs are fetched in a single call.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+
+    Returns
+    -------
+    Iterator[int]
+    """
+    if page_size is None:
+        for row in Client(session=session).apply_api_function(ss_functions.ALL_PMIDS).data:
+            yield int(row['pmid'])
+        return
 
+    for row in iter_sql(PMIDS_SQL, page_size=page_size, session=session):
+        yield int(row['pmid'])
 
-def subgraph(subgraph_name: str = '') -> Graph:
+
+def list_pmids(as_array: bool = False, page_size: int = None, session: Session = None) -> Union[list, 'np.ndarray']:
+    """Returns a list of curated PMIDs in the knowledge graph.
+
+    Parameters
+    ----------
+    as_array: bool
+        If True, return the PMIDs as an int64 numpy array instead of a list.
+    page_size: int
+        If given, PMIDs are fetched in pages of this size. See :func:`iter_pmids`.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+
+    Returns
+    -------
+    list or numpy.ndarray
+    """
+    pmids = iter_pmids(page_size=page_size, session=session)
+    if as_array:
+        import numpy as np
+        return np.fromiter(pmids, dtype=np.int64)
+    return list(pmids)
+
+
+def subgraph(subgraph_name: str = '',
+             limit: int = None,
+             offset: int = None,
+             sample: int = None,
+             seed: int = None,
+             session: Session = None,
+             slim: bool = False) -> Graph:
     """Retrieve a list of BEL statements with the given subgraph_name in their annotations.
 
     Parameters
     ----------
     subgraph_name: str
         The name of an annotation used for identifying relationships part of a subgraph or pathway.
+    limit: int
+        Maximum number of edges to return.
+    offset: int
+        Number of edges to skip.
+    sample: int
+        Return a random sample of this many edges (after offset and limit are applied).
+    seed: int
+        Seed of the random sample.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    slim: bool
+        If True, only the edge IDs, subjects, objects, relations and PMIDs are requested. Evidence, citation,
+        annotation and involved genes are loaded on demand, see :meth:`ebel_rest.manager.core.Graph.load_details`.
 
     Returns
     -------
     Graph
     """
-    return Graph().apply_api_function(ss_functions.BEL_BY_SUBGRAPH, subgraph_name)
-
-
-def causal_correlative_by_gene(gene_symbol: str) -> Graph:
-    return Graph().apply_api_function(ss_functions.BEL_CAUSAL_CORRELATIVE_BY_GENE, gene_symbol)
+    sql_query = None
+    if slim or limit is not None or offset is not None or sample is not None:
+        sql_query = sql_tools.bind_parameters(
+            f"SELECT {GRAPH_EDGE_PROJECTION} FROM bel_relation WHERE annotation.values() CONTAINS (@this CONTAINS ?)",
+            [subgraph_name])
+
+    return _limited_graph(ss_functions.BEL_BY_SUBGRAPH, (subgraph_name,), sql_query, limit, offset, sample, seed,
+                          session, slim)
+
+
+def causal_correlative_by_gene(gene_symbol: str,
+                               limit: int = None,
+                               offset: int = None,
+                               sample: int = None,
+                               seed: int = None,
+                               session: Session = None,
+                               slim: bool = False) -> Graph:
+    """Retrieve a list of causal and correlative BEL statements with the given gene involved in their subject or
+    object.
 
+    Parameters
+    ----------
+    gene_symbol: str
+        Symbol of the gene, e.g. 'APP'.
+    limit: int
+        Maximum number of edges to return.
+    offset: int
+        Number of edges to skip.
+    sample: int
+        Return a random sample of this many edges (after offset and limit are applied).
+    seed: int
+        Seed of the random sample.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    slim: bool
+        If True, only the edge IDs, subjects, objects, relations and PMIDs are requested. Evidence, citation,
+        annotation and involved genes are loaded on demand, see :meth:`ebel_rest.manager.core.Graph.load_details`.
+
+    Raises
+    ------
+    ValueError
+        If the session has a term index which doesn't contain the gene symbol.
 
-def path(source: str, target: str, min_edges: int = 1, max_edges: int = 4) -> Graph:
+    Returns
+    -------
+    Graph
+    """
+    _validate_term(session, 'gene', gene_symbol)
+    sql_query = None
+    if slim or limit is not None or offset is not None or sample is not None:
+        sql_query = sql_tools.bind_parameters(
+            f"SELECT {GRAPH_EDGE_PROJECTION} FROM bel_relation "
+            "WHERE (@this INSTANCEOF 'causal' OR @this INSTANCEOF 'correlative') "
+            "AND (out.involved_genes CONTAINS :gene OR in.involved_genes CONTAINS :gene)",
+            {'gene': gene_symbol})
+
+    return _limited_graph(ss_functions.BEL_CAUSAL_CORRELATIVE_BY_GENE, (gene_symbol,), sql_query, limit, offset,
+                          sample, seed, session, slim)
+
+
+def path(source: str,
+         target: str,
+         min_edges: int = 1,
+         max_edges: int = 4,
+         limit: int = None,
+         offset: int = None,
+         sample: int = None,
+         seed: int = None,
+         session: Session = None,
+         progress: ProgressCallback = None,
+         cancel: CancellationToken = None) -> Graph:
     """Generates a graph of all paths from a source node to a target node.
 
     Parameters
@@ -91,46 +452,391 @@ def path(source: str, target: str, min_edges: int = 1, max_edges: int = 4) -> Gr
         The minimum number of edges between the source and target nodes. Must be > 1 and < max_edges.
     max_edges: int
         The maximum number of edges between the source and target nodes. Must be > min_edges.
+    limit: int
+        Maximum number of edges to return. Limit, offset and sample are applied locally.
+    offset: int
+        Number of edges to skip.
+    sample: int
+        Return a random sample of this many edges (after offset and limit are applied).
+    seed: int
+        Seed of the random sample.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    progress: Callable[[Progress], None]
+        Called with the :class:`ebel_rest.manager.progress.Progress` of the request.
+    cancel: CancellationToken
+        Token to abort the request.
 
     Returns
     -------
     Graph object
     """
-    num_range = f"{min_edges}-{max_edges}"
+    num_range = _path_range(min_edges, max_edges)
+    graph = Graph(session=session).apply_api_function(ss_functions.BEL_PATH, source, target, num_range,
+                                                      progress=progress, cancel=cancel)
+    if limit is None and offset is None and sample is None:
+        return graph
+
+    _check_limits(limit, offset, sample)
+    edges = graph.edges[offset or 0:]
+    edges = edges if limit is None else edges[:limit]
+    graph._data = edges if sample is None else random.Random(seed).sample(edges, min(sample, len(edges)))
+    return graph
+
+
+def paths(pairs: Iterable[Tuple[str, str]],
+          min_edges: int = 1,
+          max_edges: int = 4,
+          memo: MutableMapping = None,
+          session: Session = None,
+          cancel: CancellationToken = None) -> Graph:
+    """Generates a graph of all paths between many pairs of source and target nodes.
+
+    Each distinct pair is requested once with :func:`path`. The targets of a source with several missing pairs are
+    found with one traversal of the source's neighbourhood with direct SQL instead, unless the neighbourhood has more
+    than `PATH_TRAVERSAL_MAX_EDGES` edges. The requests run concurrently in the thread pool of the session, see
+    :attr:`ebel_rest.manager.session.Session.executor` and its `max_workers`. The edges of each pair are memoized per
+    (source, target, min_edges, max_edges), so later calls with overlapping pairs only request the pairs which
+    weren't requested before. The returned graph holds copies of the memoized edges.
+
+    Parameters
+    ----------
+    pairs: Iterable[Tuple[str, str]]
+        Labels of the source and target nodes.
+    min_edges: int
+        The minimum number of edges between the source and target nodes. Must be > 1 and < max_edges.
+    max_edges: int
+        The maximum number of edges between the source and target nodes. Must be > min_edges.
+    memo: MutableMapping
+        Mapping in which the edges of each pair are memoized. Defaults to a memo shared by all calls with the same
+        session, which keeps the `PATH_MEMO_SIZE` most recently used pairs for the TTL of the session's cache (or
+        `PATH_MEMO_TTL` seconds without cache). Pass an empty dict to request all pairs again.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    cancel: CancellationToken
+        Token to abort the requests.
+
+    Returns
+    -------
+    Graph object
+        Graph of all edges on the paths with the attribute `pairs`, which maps each edge ID to the list of
+        (source, target) pairs whose paths contain the edge.
+    """
+    _path_range(min_edges, max_edges)
+    session = Client(session=session).session
+    if memo is None:
+        if session is None:
+            memo = {}
+        else:
+            memo = _path_memos.setdefault(session, _PathMemo())
+            memo.ttl = session.cache.ttl if session.cache is not None else PATH_MEMO_TTL
+
+    pairs = list(dict.fromkeys((str(source), str(target)) for source, target in pairs))
+    found = {}
+    targets_by_source = defaultdict(list)
+    for pair in pairs:
+        try:
+            found[pair] = memo[(*pair, min_edges, max_edges)]
+        except KeyError:
+            targets_by_source[pair[0]].append(pair[1])
+
+    def fetch(source: str) -> Dict[Tuple[str, str], list]:
+        targets = targets_by_source[source]
+        if len(targets) > 1:
+            by_target = _source_paths(source, targets, min_edges, max_edges, session, cancel)
+            if by_target is not None:
+                return {(source, target): edges for target, edges in by_target.items()}
+        return {(source, target): path(source, target, min_edges=min_edges, max_edges=max_edges, session=session,
+                                       cancel=cancel).edges
+                for target in targets}
+
+    sources = list(targets_by_source)
+    fetched = session.executor.map(fetch, sources) if session is not None else map(fetch, sources)
+    for by_pair in fetched:
+        for pair, edges in by_pair.items():
+            found[pair] = memo[(*pair, min_edges, max_edges)] = tuple(edges)
+
+    graph = Graph(session=session)
+    graph.function_name = ss_functions.BEL_PATH
+    graph._data = []
+    graph.pairs = {}
+    for pair in pairs:
+        for edge in found[pair]:
+            served = graph.pairs.get(edge['edge_id'])
+            if served is None:
+                served = graph.pairs[edge['edge_id']] = []
+                graph._data.append(dict(edge))  # Rendering changes the records, the memoized ones stay intact
+            served.append(pair)
+    return graph
+
+
+def _source_paths(source: str,
+                  targets: List[str],
+                  min_edges: int,
+                  max_edges: int,
+                  session: Optional[Session],
+                  cancel: CancellationToken = None) -> Optional[Dict[str, list]]:
+    """Return the edges of the paths from the source to each target, found in the edges reachable from the source
+    within max_edges - 1 hops, or None if these are more than `PATH_TRAVERSAL_MAX_EDGES`.
+
+    Like the path function, paths don't use an edge twice and may pass the target before they end there.
+    """
+    outgoing = defaultdict(list)
+    expanded = set()
+    frontier = None
+    source_nodes = set()
+    n_edges = 0
+    for depth in range(max_edges):
+        if depth == 0:
+            queries = [sql_tools.bind_parameters(f"{PATH_TRAVERSAL_SQL}out.name = ?", [source])]
+        else:
+            nodes = sorted(frontier - expanded, key=sql_tools.rid_key)
+            queries = [f"{PATH_TRAVERSAL_SQL}out IN [{', '.join(nodes[start:start + SAMPLE_BATCH_SIZE])}]"
+                       for start in range(0, len(nodes), SAMPLE_BATCH_SIZE)]
+        frontier = set()
+        for sql_query in queries:
+            rows = Client(session=session).apply_api_function(ss_functions.DIRECT_SQL, sql_query, cancel=cancel).data
+            n_edges += len(rows)
+            if n_edges > PATH_TRAVERSAL_MAX_EDGES:
+                return None
+            for row in rows:
+                outgoing[row['subject_id']].append(row)
+                expanded.add(row['subject_id'])
+                frontier.add(row['object_id'])
+                if depth == 0:
+                    source_nodes.add(row['subject_id'])
+        if not frontier:
+            break
+
+    incoming = defaultdict(list)
+    for rows in outgoing.values():
+        for row in rows:
+            incoming[row['object_id']].append(row)
+
+    by_target = {}
+    for target in targets:
+        target_nodes = {row['object_id'] for rows in outgoing.values() for row in rows if row['object_name'] == target}
+        # Fewest edges from each node to a target node, to only follow edges which can still reach one
+        hops = dict.fromkeys(target_nodes, 0)
+        queue = deque(target_nodes)
+        while queue:
+            node = queue.popleft()
+            for row in incoming[node]:
+                if row['subject_id'] not in hops:
+                    hops[row['subject_id']] = hops[node] + 1
+                    queue.append(row['subject_id'])
+
+        edges = {}
+
+        def walk(node: str, path_edges: list):
+            if node in target_nodes and len(path_edges) >= min_edges:
+                edges.update((edge['edge_id'], edge) for edge in path_edges)
+            for row in outgoing[node]:
+                if row not in path_edges and len(path_edges) + 1 + hops.get(row['object_id'], max_edges) <= max_edges:
+                    walk(row['object_id'], path_edges + [row])
+
+        for node in source_nodes:
+            walk(node, [])
+        by_target[target] = [{k: v for k, v in edge.items() if k != 'object_name'} for edge in edges.values()]
+    return by_target
+
+
+def _path_range(min_edges: int, max_edges: int) -> str:
+    """Validate the number of edges of a path and return the range argument of the path function."""
     if min_edges > max_edges:
         raise ValueError("min_edges must be a smaller value than max_edges!")
 
     if min_edges < 1:
         raise ValueError("min_edges must a value greater than 1!")
 
-    return Graph().apply_api_function(ss_functions.BEL_PATH, source, target, num_range)
+    return f"{min_edges}-{max_edges}"
 
 
-def belish(statement: str) -> Graph:
+def belish(statement: str,
+           validate: bool = True,
+           use_sql: bool = False,
+           limit: int = None,
+           offset: int = None,
+           sample: int = None,
+           seed: int = None,
+           session: Session = None,
+           slim: bool = False) -> Graph:
     """Retrieve a list of BEL statements that match the given customized BEL statement.
 
     Parameters
     ----------
     statement: str
         BEL like statement in which "?" serve as wild cards. Example: 'p(?) causal p(?)'
+    validate: bool
+        If True, the statement is parsed and validated locally. The BELish helper always receives the statement as
+        it was given. If False, the statement isn't parsed locally unless use_sql is True.
+    use_sql: bool
+        If True, the statement is compiled to a direct SQL query where possible (see
+        :func:`ebel_rest.manager.belish.to_sql`). Statements which can't be compiled are sent to the BELish helper.
+    limit: int
+        Maximum number of edges to return. Limit, offset and sample are pushed down to the server if the statement
+        is parsed locally (validate or use_sql is True) and can be compiled to SQL, otherwise they are applied
+        locally.
+    offset: int
+        Number of edges to skip.
+    sample: int
+        Return a random sample of this many edges (after offset and limit are applied).
+    seed: int
+        Seed of the random sample.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    slim: bool
+        If True, only the edge IDs, subjects, objects, relations and PMIDs are requested. Evidence, citation,
+        annotation and involved genes are loaded on demand, see :meth:`ebel_rest.manager.core.Graph.load_details`. Only
+        applies to statements which can be compiled to SQL, so it requires the statement to be parsed locally.
+
+    Raises
+    ------
+    ValueError
+        If validate or use_sql is True and the statement is malformed, or slim is True and validate and use_sql are
+        False.
 
     Returns
     -------
     Graph
     """
-    return Graph().apply_api_function(ss_functions.BELISH, statement)
+    if slim and not (validate or use_sql):
+        raise ValueError("slim requires the statement to be parsed locally, set validate or use_sql to True")
+
+    limited = any(value is not None for value in (limit, offset, sample))
+    if use_sql or (validate and (limited or slim)):
+        sql_query = belish_parser.to_sql(statement)
+        if sql_query is not None:
+            if limited or slim:
+                return _limited_graph(ss_functions.BELISH, (statement,), sql_query, limit, offset, sample, seed,
+                                      session, slim)
+            return Graph(session=session).apply_api_function(ss_functions.DIRECT_SQL, sql_query)
+
+    if validate:
+        belish_parser.parse(statement)
 
+    return _limited_graph(ss_functions.BELISH, (statement,), None, limit, offset, sample, seed, session)
 
-def find_contradictions() -> Client:
+
+def find_contradictions(session: Session = None) -> Client:
     """Returns a list of contradictions in the knowledge graph. A contradiction is defined as edges of opposite
-    types (e.g. increases/decreases) existing between the same out node and in node."""
-    return Client().apply_api_function('find_contradictions')
+    types (e.g. increases/decreases) existing between the same out node and in node.
+
+    Use :meth:`ebel_rest.manager.core.Graph.find_contradictions` to find contradictions in a graph which was
+    already fetched."""
+    return Client(session=session).apply_api_function('find_contradictions')
 
 
-def sql(sql_query: str = '') -> Client:
+def sql(sql_query: str = '',
+        params: Union[Mapping, Sequence] = None,
+        page_size: int = None,
+        cursor: str = 'skip',
+        session: Session = None,
+        progress: ProgressCallback = None,
+        cancel: CancellationToken = None) -> Client:
     """Executes an SQL function in the Knowledge Graph.
 
-    :param str sql_query: a valid OrientDB style SQL query for a knowledge graph built by e(BE:L).
+    :param str sql_query: a valid OrientDB style SQL query for a knowledge graph built by e(BE:L). Can contain named
+        (':name') or positional ('?') placeholders.
+    :param params: the values for the placeholders in sql_query, a dict for named and a list for positional ones.
+    :param int page_size: if given, the results are fetched in pages of this size (see :func:`iter_sql`).
+    :param str cursor: pagination method, either 'skip' or 'rid'.
+    :param Session session: Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    :param progress: called with the :class:`ebel_rest.manager.progress.Progress` of each request.
+    :param CancellationToken cancel: token to abort the query.
     :return: Client
     """
-    return Client().apply_api_function(ss_functions.DIRECT_SQL, sql_query)
+    if page_size is None:
+        bound_query = sql_tools.bind_parameters(sql_query, params)
+        return Client(session=session).apply_api_function(ss_functions.DIRECT_SQL, bound_query, progress=progress,
+                                                          cancel=cancel)
+
+    client = Client(session=session)
+    client.function_name = ss_functions.DIRECT_SQL
+    client._data = list(iter_sql(sql_query, params=params, page_size=page_size, cursor=cursor, session=session,
+                                 progress=progress, cancel=cancel))
+    return client
+
+
+def iter_sql(sql_query: str,
+             params: Union[Mapping, Sequence] = None,
+             page_size: int = 10000,
+             cursor: str = 'skip',
+             session: Session = None,
+             progress: ProgressCallback = None,
+             cancel: CancellationToken = None) -> Iterator[dict]:
+    """Iterate over the results of an SQL query page by page, so only one page is held in memory at a time.
+
+    Parameters
+    ----------
+    sql_query: str
+        A valid OrientDB style SQL query without SKIP or LIMIT. Can contain named (':name') or positional ('?')
+        placeholders.
+    params: dict or list
+        The values for the placeholders in sql_query.
+    page_size: int
+        Number of records fetched per request.
+    cursor: {'skip', 'rid'}
+        'skip' pages with SKIP/LIMIT. 'rid' pages by record ID, which stays fast for large offsets but requires a
+        query of the form 'SELECT [projection] FROM <class> [WHERE <condition>]'.
+    session: Session
+        Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+    progress: Callable[[Progress], None]
+        Called with the :class:`ebel_rest.manager.progress.Progress` of each page request.
+    cancel: CancellationToken
+        Token to stop the iteration, which is checked while each page is received.
+
+    Raises
+    ------
+    ValueError
+        If the parameters don't match the placeholders, page_size is smaller than 1 or cursor is unknown.
+    CancelledError
+        If the iteration was cancelled.
+
+    Returns
+    -------
+    Iterator[dict]
+        The records of the result.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be a value greater than 0!")
+
+    if cursor not in ('skip', 'rid'):
+        raise ValueError("cursor must be either 'skip' or 'rid'")
+
+    bound_query = sql_tools.bind_parameters(sql_query, params)
+    if cursor == 'skip':
+        sql_tools.skip_limit_page(bound_query, 0, page_size)  # Check query before the first page is requested
+        return _iter_skip_pages(bound_query, page_size, session, progress, cancel)
+
+    sql_tools.rid_cursor_page(bound_query, sql_tools.FIRST_RID, page_size)
+    return _iter_rid_pages(bound_query, page_size, session, progress, cancel)
+
+
+def _iter_skip_pages(sql_query: str, page_size: int, session: Session = None, progress: ProgressCallback = None,
+                     cancel: CancellationToken = None) -> Iterator[dict]:
+    skip = 0
+    while True:
+        page_query = sql_tools.skip_limit_page(sql_query, skip, page_size)
+        rows = Client(session=session).apply_api_function(ss_functions.DIRECT_SQL, page_query, progress=progress,
+                                                          cancel=cancel).data
+        yield from rows
+
+        if len(rows) < page_size:
+            break
+        skip += page_size
+
+
+def _iter_rid_pages(sql_query: str, page_size: int, session: Session = None, progress: ProgressCallback = None,
+                    cancel: CancellationToken = None) -> Iterator[dict]:
+    last_rid = sql_tools.FIRST_RID
+    while True:
+        page_query = sql_tools.rid_cursor_page(sql_query, last_rid, page_size)
+        rows = Client(session=session).apply_api_function(ss_functions.DIRECT_SQL, page_query, progress=progress,
+                                                          cancel=cancel).data
+        for row in rows:
+            last_rid = row.pop(sql_tools.CURSOR_RID)
+            yield row
+
+        if len(rows) < page_size:
+            break
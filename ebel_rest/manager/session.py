@@ -0,0 +1,288 @@
+"""Sessions hold the connection settings for one database and user."""
+import json
+import time
+import hashlib
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+
+from ebel_rest.manager.cache import ResponseCache
+from ebel_rest.manager.progress import Tracker
+from ebel_rest.manager.profiling import stage
+from ebel_rest.manager.transport import ChunkCallback, Response, Transport, HTTPTransport
+
+VALIDATOR_HEADERS = {'etag': 'If-None-Match', 'last-modified': 'If-Modified-Since'}
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, concurrent callers with the same key share its result.
+
+    If the call raises an exception, all callers waiting for it receive the same exception.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of calls in flight."""
+        return len(self._calls)
+
+    def do(self, key: Hashable, function: Callable):
+        """Call function or, if a call with the same key is in flight, wait for it and return its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class Session:
+    """Connection to one database with its own credentials, transport, cache and settings.
+
+    A session can be passed to every function in :mod:`ebel_rest.manager.query` and
+    :mod:`ebel_rest.manager.statistics` and to :class:`ebel_rest.Exporter`. Sessions don't change any process
+    global state and are safe to share across threads, so several databases or users can be queried in parallel.
+    :func:`ebel_rest.connect` creates the default session, which is used when no session is given.
+
+    Parameters
+    ----------
+    user: str
+        Database username.
+    password: str
+        Database password for specified username.
+    server: str
+        Server or URL where database is hosted.
+    db_name: str
+        Name of database.
+    print_url: bool
+        Boolean to choose whether to print the REST API call.
+    cache: ResponseCache
+        Cache for the responses of the API. If None, responses are not cached.
+    transport: Transport
+        Transport used to send the requests. Defaults to a new :class:`HTTPTransport`, which reuses persistent
+        connections from a bounded pool.
+    max_url_length: int
+        Calls with a longer URL are sent as POST with the arguments in the body.
+    coalesce: bool
+        If True, concurrent identical calls share one request to the server. Together with a cache, only one
+        request is sent when many threads ask for an expired entry at the same time.
+    intern_strings: bool
+        If True, large results are decoded with interned strings and tuples for the involved genes/other of the
+        nodes, which reduces the memory of large graphs and exports (see :func:`ebel_rest.manager.core.decode_result`
+        for the size from which results are interned).
+    mirror: Mirror
+        Local copy of the knowledge graph (see :class:`ebel_rest.manager.mirror.Mirror`) which answers the calls it
+        supports instead of the server.
+    version_function: str
+        Name of a cheap API function, e.g. :data:`ebel_rest.manager.ss_functions.BEL_STATISTICS_SUMMARIZE`, whose
+        response changes whenever the knowledge graph changes. Expired cache entries which were stored with the same
+        response are refreshed without sending the request again. Useful if the server doesn't send ETag or
+        Last-Modified headers, which are used for conditional requests in any case.
+    version_check_interval: float
+        Seconds for which the response of the version function is reused.
+    terms: TermIndex
+        Local index of the terms of the knowledge graph (see :class:`ebel_rest.manager.terms.TermIndex`). If set, the
+        arguments of :func:`ebel_rest.manager.query.annotation` and
+        :func:`ebel_rest.manager.query.causal_correlative_by_gene` are validated before a request is sent.
+    max_workers: int
+        Maximum number of concurrent requests of calls which send many requests, e.g.
+        :func:`ebel_rest.manager.query.paths`. The threads are shared by all these calls, see :attr:`executor`.
+    """
+
+    def __init__(self,
+                 user: str,
+                 password: str,
+                 server: str,
+                 db_name: str,
+                 print_url: bool = False,
+                 cache: ResponseCache = None,
+                 transport: Transport = None,
+                 max_url_length: int = 2048,
+                 coalesce: bool = True,
+                 intern_strings: bool = False,
+                 mirror=None,
+                 version_function: str = None,
+                 version_check_interval: float = 10,
+                 terms=None,
+                 max_workers: int = 8):
+        self.user = user
+        self.__password = password
+        self.server = server
+        self.db_name = db_name
+        self.print_url = print_url
+        self.cache = cache
+        self.transport = transport or HTTPTransport()
+        self.max_url_length = max_url_length
+        self.in_flight = SingleFlight() if coalesce else None
+        self.intern_strings = intern_strings
+        self.mirror = mirror
+        self.version_function = version_function
+        self.version_check_interval = version_check_interval
+        self.terms = terms
+        self.max_workers = max_workers
+        self._version = None
+        self._version_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Session(user={self.user!r}, server={self.server!r}, db_name={self.db_name!r})"
+
+    @property
+    def url_template(self) -> str:
+        return f"{self.server}/function/{self.db_name}/{{function_name}}/{{arguments}}"
+
+    def build_request(self, function_name: str, *args) -> tuple:
+        """Return the URL and body (None for GET requests) of an API call."""
+        parameters = []
+        for arg in args:
+            parameters.append(urllib.parse.quote(str(arg)))
+        url = self.url_template.format(
+            function_name=function_name,
+            arguments='/'.join(parameters))
+
+        body = None
+        if len(url) > self.max_url_length:
+            # Too long for a path segment: POST the arguments as JSON object, the server uses the values in order
+            url = self.url_template.format(function_name=function_name, arguments='').rstrip('/')
+            body = json.dumps({f"arg{i}": str(arg) for i, arg in enumerate(args)}).encode('utf-8')
+
+        return url, body
+
+    def request(self, function_name: str, *args, tracker: Tracker = None) -> bytes:
+        """Call an API function and return the raw response body.
+
+        If a tracker is given, it receives the progress of the transfer and can cancel it. Such calls are not
+        coalesced with concurrent identical calls, so cancelling one doesn't abort the others.
+        """
+        with stage('session.build_url'):
+            url, body = self.build_request(function_name, *args)
+
+        if self.print_url:
+            print(url)
+
+        if tracker is not None:
+            tracker.check()
+
+        if self.cache is not None:
+            with stage('session.cache'):
+                res_body = self.cache.get(self.cache.key(url, body))
+            if res_body is not None:
+                if tracker is not None:
+                    tracker.received(len(res_body), len(res_body))
+                return res_body
+
+        if self.in_flight is None or tracker is not None:
+            return self._fetch(url, body, tracker)
+        return self.in_flight.do((url, body), lambda: self._fetch(url, body))
+
+    def _fetch(self, url: str, body: bytes = None, tracker: Tracker = None) -> bytes:
+        on_chunk = tracker.received if tracker is not None else None
+        if self.cache is None:
+            return self.send(url, body, on_chunk=on_chunk)
+
+        cache_key = self.cache.key(url, body)
+        res_body = self.cache.get(cache_key)  # Another call may have filled the entry in the meantime
+        if res_body is None:
+            res_body = self._revalidate(cache_key, url, body, on_chunk)
+        return res_body
+
+    def _revalidate(self, cache_key: str, url: str, body: bytes = None, on_chunk: ChunkCallback = None) -> bytes:
+        """Fetch a response which is not in the cache or expired.
+
+        An expired entry is refreshed without a download if the knowledge graph version is unchanged or the server
+        answers the conditional request with 304 Not Modified.
+        """
+        stale = self.cache.stale(cache_key)
+        version = self.kg_version() if self.version_function else None
+        headers = {}
+        if stale is not None:
+            stale_body, validators = stale
+            if version is not None and validators.get('kg_version') == version:
+                self.cache.refresh(cache_key)
+                return stale_body
+            headers = {header: validators[name] for name, header in VALIDATOR_HEADERS.items() if name in validators}
+
+        response = self._send(url, body, on_chunk, headers)
+        if response.status == 304 and stale is not None:
+            self.cache.refresh(cache_key)
+            return stale_body
+
+        validators = {name.lower(): value for name, value in response.headers.items()
+                      if name.lower() in VALIDATOR_HEADERS}
+        if version is not None:
+            validators['kg_version'] = version
+        self.cache.set(cache_key, response.body, validators)
+        return response.body
+
+    def kg_version(self) -> Optional[str]:
+        """Return a checksum of the response of the version function, None if no version function is set.
+
+        The response is requested at most once per `version_check_interval` and never cached.
+        """
+        if self.version_function is None:
+            return None
+        with self._version_lock:
+            if self._version is None or time.monotonic() - self._version[0] > self.version_check_interval:
+                url, body = self.build_request(self.version_function)
+                checksum = hashlib.sha256(self.send(url, body)).hexdigest()
+                self._version = (time.monotonic(), checksum)
+            return self._version[1]
+
+    def send(self, url: str, body: bytes = None, on_chunk: ChunkCallback = None) -> bytes:
+        """Send the request to the server and return the response body."""
+        return self._send(url, body, on_chunk).body
+
+    def _send(self, url: str, body: bytes = None, on_chunk: ChunkCallback = None, headers: dict = None) -> Response:
+        kwargs = {} if on_chunk is None else {'on_chunk': on_chunk}  # Transports without progress support
+        if headers:
+            kwargs['headers'] = headers
+        with stage('session.network'):
+            return self.transport.send(url, body=body, user=self.user, password=self.__password, **kwargs)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool with `max_workers` threads for concurrent requests, created on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ebel_rest')
+            return self._executor
+
+    def close(self):
+        """Shut down the thread pool and close the transport of the session."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+        self.transport.close()
+
+    def __enter__(self) -> 'Session':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,343 @@
+"""Edge data of a Graph in shared memory or a memory-mapped file, for parallel analyses in worker processes.
+
+A :class:`SharedGraph` stores the edges in a compact columnar layout: integer coded subjects, objects and relations,
+and string columns as one UTF-8 buffer with offsets. Pickling a SharedGraph only pickles its :class:`SharedHandle`,
+so passing it to a process pool is cheap and each worker attaches to the same memory instead of receiving a copy.
+
+Example
+-------
+    >>> graph = query.belish('p(HGNC:?) increases ?')
+    >>> with graph.share() as shared, ProcessPoolExecutor() as executor:
+    ...     counts = list(executor.map(count_relations, [shared] * 4, range(4)))
+"""
+import os
+import sys
+import json
+import atexit
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ebel_rest.manager.core import Graph
+    from ebel_rest.manager.session import Session
+
+HEADER_SIZE = struct.calcsize('<Q')
+ALIGNMENT = 8
+
+_attached = {}
+
+
+class SharedHandle(NamedTuple):
+    """Picklable reference to the memory of a :class:`SharedGraph`: a shared memory block or a file."""
+    name: Optional[str]
+    path: Optional[str]
+    size: int
+
+
+class StringColumn:
+    """Read-only column of strings stored as one UTF-8 buffer and the offsets of the strings in it.
+
+    If the column is JSON encoded, the values are decoded on access.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, json_encoded: bool = False):
+        self.data = data
+        self.offsets = offsets
+        self.json_encoded = json_encoded
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> Any:
+        value = self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+        return json.loads(value) if self.json_encoded else value
+
+    def tolist(self) -> list:
+        data = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        values = [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+        return [json.loads(value) for value in values] if self.json_encoded else values
+
+
+def _encode_strings(values: Sequence[Any], json_encoded: bool = False) -> Dict[str, np.ndarray]:
+    encoded = [(json.dumps(value) if json_encoded else str(value)).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {'data': np.frombuffer(b''.join(encoded), dtype=np.uint8), 'offsets': offsets}
+
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def _code_dtype(n: int) -> np.dtype:
+    return np.dtype(np.int16 if n < 2 ** 15 else np.int32 if n < 2 ** 31 else np.int64)
+
+
+def _close_shared_memory(shm):
+    """Close a shared memory block. If arrays still use its buffer, the mapping is left to them and unmapped when the
+    last of them is freed."""
+    try:
+        shm.close()
+    except BufferError:
+        if getattr(shm, '_fd', -1) >= 0:
+            os.close(shm._fd)
+            shm._fd = -1
+        shm._buf = shm._mmap = None  # SharedMemory.__del__ would try to release the buffer again
+
+
+class SharedGraph:
+    """Read-only columnar copy of the edges of a Graph in shared memory or a memory-mapped file.
+
+    Use :meth:`publish` (or :meth:`ebel_rest.manager.core.Graph.share`) to create it and pass the SharedGraph or its
+    :attr:`handle` to worker processes, which attach to it without copying the data.
+
+    Columns of the edges
+        'source' and 'target' (codes of the nodes), 'relation' (codes of :attr:`relations`), 'pmid' (-1 if
+        missing), 'edge_id' and the published attributes.
+    Columns of the nodes
+        'node_id', 'bel' and 'class' (codes of :attr:`classes`), the position of a node is its code.
+    """
+
+    def __init__(self, handle: SharedHandle, owner: bool = False, shm=None):
+        self.handle = handle
+        self.owner = owner
+        self._shm = shm
+        self._mmap = None
+        if shm is not None:
+            # The handle of the creating process is kept: on Windows the block is freed when its last handle closes
+            buffer = shm.buf
+        elif handle.name is not None:
+            buffer = self._attach_shared_memory(handle.name)
+        else:
+            self._mmap = np.memmap(handle.path, dtype=np.uint8, mode='r+' if owner else 'r', shape=(handle.size,))
+            buffer = self._mmap
+        self._buffer = np.frombuffer(buffer, dtype=np.uint8, count=handle.size)
+        if not owner:
+            self._buffer.flags.writeable = False
+
+        header_length, = struct.unpack_from('<Q', self._buffer[:HEADER_SIZE].tobytes())
+        self.meta = json.loads(self._buffer[HEADER_SIZE:HEADER_SIZE + header_length].tobytes().decode('utf-8'))
+        self._data_start = _aligned(HEADER_SIZE + header_length)
+        self.relations: List[str] = self.meta['relations']
+        self.classes: List[str] = self.meta['classes']
+        self.attributes: List[str] = [name for name, _ in self.meta['attributes']]
+        self.edges = self._columns(self.meta['edges'])
+        self.nodes = self._columns(self.meta['nodes'])
+
+    def _attach_shared_memory(self, name: str) -> memoryview:
+        from multiprocessing import shared_memory
+
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(name=name)
+        elif sys.version_info >= (3, 13):
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            from multiprocessing import resource_tracker
+
+            # The block belongs to the publishing process, attaching processes must not unlink it when they exit
+            self._shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+        return self._shm.buf
+
+    def _array(self, spec: dict) -> np.ndarray:
+        start = self._data_start + spec['offset']
+        return self._buffer[start:start + spec['nbytes']].view(spec['dtype'])
+
+    def _columns(self, specs: dict) -> Dict[str, Any]:
+        columns = {}
+        for name, spec in specs.items():
+            if 'data' in spec:
+                columns[name] = StringColumn(self._array(spec['data']), self._array(spec['offsets']),
+                                             spec.get('json', False))
+            else:
+                columns[name] = self._array(spec)
+        return columns
+
+    @classmethod
+    def publish(cls, graph: 'Graph', attributes: Sequence[str] = (), path: str = None) -> 'SharedGraph':
+        """Copy the edges of a graph into shared memory or, if a path is given, into a memory-mapped file.
+
+        Parameters
+        ----------
+        graph: Graph
+            The graph to publish.
+        attributes: Sequence[str]
+            Additional edge attributes, e.g. 'evidence' or 'annotation'. Strings are stored as they are, other values
+            JSON encoded. Details of slim graphs are loaded first.
+        path: str
+            File for the data. Memory-mapped files also work on Python 3.7, which has no shared memory module, and
+            can be opened by processes which were not started from this one.
+
+        Returns
+        -------
+        SharedGraph
+            The owning instance, which removes the shared memory block or file in :meth:`unlink`.
+        """
+        if any(attribute not in ('edge_id', 'relation', 'pmid') for attribute in attributes):
+            graph.load_details()
+        edges = graph.edges
+        sources, targets, nodes = graph._node_coding()
+        relations = sorted({edge['relation'] for edge in edges})
+        relation_codes = {relation: code for code, relation in enumerate(relations)}
+        classes = sorted(set(nodes['class']))
+        class_codes = {node_class: code for code, node_class in enumerate(classes)}
+
+        node_dtype = _code_dtype(len(nodes))
+        edge_columns = {
+            'source': sources.astype(node_dtype),
+            'target': targets.astype(node_dtype),
+            'relation': np.array([relation_codes[edge['relation']] for edge in edges],
+                                 dtype=_code_dtype(len(relations))),
+            'pmid': np.array([edge.get('pmid') if edge.get('pmid') is not None else -1 for edge in edges],
+                             dtype=np.int64),
+            'edge_id': _encode_strings([edge['edge_id'] for edge in edges]),
+        }
+        attribute_kinds = []
+        for attribute in attributes:
+            if attribute in edge_columns:
+                continue
+            values = [edge.get(attribute) for edge in edges]
+            json_encoded = not all(isinstance(value, str) for value in values)
+            edge_columns[attribute] = _encode_strings(values, json_encoded)
+            attribute_kinds.append((attribute, json_encoded))
+        node_columns = {
+            'node_id': _encode_strings(nodes['node_id'].tolist()),
+            'bel': _encode_strings(nodes['bel'].tolist()),
+            'class': np.array([class_codes[node_class] for node_class in nodes['class']],
+                              dtype=_code_dtype(len(classes))),
+        }
+
+        arrays = []
+        position = 0
+
+        def layout(columns: dict) -> dict:
+            """Assign each array its offset from the start of the data, which follows the header."""
+            nonlocal position
+            specs = {}
+            for name, column in columns.items():
+                if isinstance(column, dict):
+                    specs[name] = layout(column)
+                    if dict(attribute_kinds).get(name):
+                        specs[name]['json'] = True
+                    continue
+                specs[name] = {'dtype': column.dtype.str, 'offset': position, 'nbytes': column.nbytes}
+                arrays.append((position, column))
+                position = _aligned(position + column.nbytes)
+            return specs
+
+        meta = {'relations': relations, 'classes': classes, 'attributes': attribute_kinds,
+                'edges': layout(edge_columns), 'nodes': layout(node_columns)}
+        header = json.dumps(meta).encode('utf-8')
+        data_start = _aligned(HEADER_SIZE + len(header))
+        size = max(data_start + position, 1)
+
+        if path is None:
+            from multiprocessing import shared_memory
+
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            handle = SharedHandle(shm.name, None, size)
+            buffer = np.frombuffer(shm.buf, dtype=np.uint8, count=size)
+        else:
+            shm = None
+            buffer = np.memmap(path, dtype=np.uint8, mode='w+', shape=(size,))
+            handle = SharedHandle(None, os.path.abspath(path), size)
+
+        buffer[:HEADER_SIZE] = np.frombuffer(struct.pack('<Q', len(header)), dtype=np.uint8)
+        buffer[HEADER_SIZE:HEADER_SIZE + len(header)] = np.frombuffer(header, dtype=np.uint8)
+        for offset, column in arrays:
+            buffer[data_start + offset:data_start + offset + column.nbytes] = column.view(np.uint8).ravel()
+        if shm is None:
+            buffer.flush()
+        del buffer
+        return cls(handle, owner=True, shm=shm)
+
+    @classmethod
+    def attach(cls, handle: SharedHandle) -> 'SharedGraph':
+        """Attach to a published graph, e.g. in a worker process, without copying its data.
+
+        Each process attaches once per handle and later calls return the same instance, which stays attached until
+        it is closed or the process exits. So the memory isn't mapped again for every task of a worker and isn't
+        unmapped while arrays of a previous task are still in use.
+        """
+        shared = _attached.get(handle)
+        if shared is None or shared._buffer is None:
+            shared = _attached[handle] = cls(handle)
+        return shared
+
+    def __reduce__(self):
+        return SharedGraph.attach, (self.handle,)
+
+    def __len__(self) -> int:
+        """Number of edges."""
+        return len(self.edges['source'])
+
+    def edge(self, index: int) -> dict:
+        """Return an edge in the record format of the graph functions, with the published attributes."""
+        source, target = int(self.edges['source'][index]), int(self.edges['target'][index])
+        pmid = int(self.edges['pmid'][index])
+        record = {
+            'edge_id': self.edges['edge_id'][index],
+            'relation': self.relations[self.edges['relation'][index]],
+            'pmid': pmid if pmid >= 0 else None,
+        }
+        for role, node in (('subject', source), ('object', target)):
+            record[f'{role}_id'] = self.nodes['node_id'][node]
+            record[f'{role}_bel'] = self.nodes['bel'][node]
+            record[f'{role}_class'] = self.classes[self.nodes['class'][node]]
+        for attribute in self.attributes:
+            record[attribute] = self.edges[attribute][index]
+        return record
+
+    def to_graph(self, start: int = 0, stop: int = None, session: 'Session' = None) -> 'Graph':
+        """Return a Graph of the edges from start to stop. Without published details the edges are slim, see
+        :meth:`ebel_rest.manager.core.Graph.load_details`."""
+        from ebel_rest.manager.core import Graph
+
+        graph = Graph(session=session)
+        graph.function_name = 'shared_graph'
+        graph._data = [self.edge(index) for index in range(*slice(start, stop).indices(len(self)))]
+        return graph
+
+    def close(self):
+        """Detach from the data. If arrays taken from the columns are still referenced, the memory stays mapped until
+        they are freed."""
+        self.edges, self.nodes, self._buffer = {}, {}, None
+        if self._shm is not None:
+            _close_shared_memory(self._shm)
+            self._shm = None
+        self._mmap = None
+
+    def unlink(self):
+        """Close and remove the shared memory block or file. Only the publishing instance may call this."""
+        if not self.owner:
+            raise ValueError("Only the SharedGraph returned by publish can unlink the data")
+        if self.handle.name is not None:
+            if self._shm is None:
+                from multiprocessing import shared_memory
+
+                self._shm = shared_memory.SharedMemory(name=self.handle.name)
+            self._shm.unlink()
+            self.close()
+        else:
+            self.close()
+            if os.path.exists(self.handle.path):
+                os.remove(self.handle.path)
+
+    def __enter__(self) -> 'SharedGraph':
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+@atexit.register
+def _close_attached():
+    for shared in _attached.values():
+        shared.close()
+    _attached.clear()
@@ -0,0 +1,175 @@
+"""Helpers for building direct SQL queries: parameter binding, rewriting and pagination."""
+import re
+import json
+from typing import Union, Mapping, Sequence
+
+STRING_PATTERN = re.compile(r''''(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"''')
+
+PLACEHOLDER_PATTERN = re.compile(r'''
+    (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    |(?P<named>(?<![\w:]):(?P<name>[A-Za-z_]\w*))
+    |(?P<positional>\?)
+''', re.VERBOSE)
+
+PAGINATION_PATTERN = re.compile(r'\b(SKIP|LIMIT|OFFSET)\s+\d+\s*$', re.IGNORECASE)
+CLAUSE_PATTERN = re.compile(r'\b(ORDER\s+BY|GROUP\s+BY|SKIP|LIMIT)\b', re.IGNORECASE)
+
+SELECT_PATTERN = re.compile(r'''
+    ^\s*SELECT\s+(?P<projection>.*?)\s*
+    \bFROM\s+(?P<target>\S+)
+    (?:\s+WHERE\s+(?P<where>.*?))?\s*$
+''', re.IGNORECASE | re.DOTALL | re.VERBOSE)
+
+CURSOR_RID = 'cursor_rid'
+FIRST_RID = '#-1:-1'
+
+
+def to_literal(value) -> str:
+    """Convert a python value to an OrientDB SQL literal."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return '[' + ', '.join(to_literal(v) for v in value) + ']'
+    if isinstance(value, Mapping):
+        return json.dumps(dict(value))
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def bind_parameters(sql_query: str, params: Union[Mapping, Sequence] = None) -> str:
+    """Replace the placeholders in an SQL query with the given parameters as literals.
+
+    Named placeholders (':name') are bound to a mapping, positional placeholders ('?') to a sequence. Placeholders
+    inside quoted strings are ignored.
+
+    Parameters
+    ----------
+    sql_query: str
+        OrientDB style SQL query with placeholders.
+    params: dict or list
+        The values to bind.
+
+    Raises
+    ------
+    ValueError
+        If a placeholder has no value or not all parameters were used.
+
+    Returns
+    -------
+    str
+        The SQL query with all parameters bound.
+    """
+    if params is None:
+        return sql_query
+
+    named = isinstance(params, Mapping)
+    positional = iter(()) if named else iter(params)
+    used = set()
+
+    def replace(match):
+        if match.group('string'):
+            return match.group()
+
+        if match.group('named'):
+            name = match.group('name')
+            if not named or name not in params:
+                raise ValueError(f"No value given for parameter ':{name}'")
+            used.add(name)
+            return to_literal(params[name])
+
+        if named:
+            raise ValueError("Positional placeholders ('?') require a sequence of parameters")
+        try:
+            value = next(positional)
+        except StopIteration:
+            raise ValueError("Not enough parameters for the positional placeholders") from None
+        return to_literal(value)
+
+    bound = PLACEHOLDER_PATTERN.sub(replace, sql_query)
+
+    if named and set(params) - used:
+        raise ValueError(f"Unused parameters: {', '.join(sorted(set(params) - used))}")
+    if not named and next(positional, used) is not used:
+        raise ValueError("Too many parameters for the positional placeholders")
+
+    return bound
+
+
+def rid_key(rid: str) -> tuple:
+    """Sort key of a record ID in the order of OrientDB, e.g. (20, 3) for '#20:3'."""
+    cluster, position = rid.lstrip('#').split(':')
+    return int(cluster), int(position)
+
+
+def skip_limit_page(sql_query: str, skip: int, limit: int = None) -> str:
+    """Return the SQL query for the page starting at record `skip` with at most `limit` records (all if None)."""
+    if PAGINATION_PATTERN.search(sql_query):
+        raise ValueError("SQL query for pagination must not contain SKIP or LIMIT")
+    page = f"{sql_query.rstrip().rstrip(';')} SKIP {skip}"
+    return page if limit is None else f"{page} LIMIT {limit}"
+
+
+def _mask_strings(sql_query: str) -> str:
+    """Replace the content of quoted strings with spaces, so keywords inside them aren't matched."""
+    return STRING_PATTERN.sub(lambda match: match.group()[0] + ' ' * (len(match.group()) - 2) + match.group()[-1],
+                              sql_query)
+
+
+def _parse_select(sql_query: str) -> dict:
+    """Return the projection, target and condition of a query of the form
+    'SELECT [projection] FROM <class> [WHERE <condition>]'."""
+    sql_query = sql_query.rstrip().rstrip(';')
+    masked = _mask_strings(sql_query)
+    match = SELECT_PATTERN.match(masked)
+    if match is None or CLAUSE_PATTERN.search(masked):
+        raise ValueError("Expected a query of the form 'SELECT [projection] FROM <class> [WHERE <condition>]'")
+    return {name: sql_query[match.start(name):match.end(name)] if match.group(name) is not None else None
+            for name in ('projection', 'target', 'where')}
+
+
+def _build_select(projection: str, target: str, where: str = None) -> str:
+    return f"SELECT {projection} FROM {target}" + (f" WHERE {where}" if where else '')
+
+
+def with_projection(sql_query: str, projection: str) -> str:
+    """Return the query of the form 'SELECT [projection] FROM <class> [WHERE <condition>]' with another projection."""
+    parts = _parse_select(sql_query)
+    return _build_select(projection, parts['target'], parts['where'])
+
+
+def add_condition(sql_query: str, condition: str) -> str:
+    """Return the query of the form 'SELECT [projection] FROM <class> [WHERE <condition>]' with an additional
+    condition joined by AND."""
+    parts = _parse_select(sql_query)
+    where = f"{condition} AND ({parts['where']})" if parts['where'] else condition
+    return _build_select(parts['projection'] or '*', parts['target'], where)
+
+
+def order_by_rid(sql_query: str) -> str:
+    """Return the query of the form 'SELECT [projection] FROM <class> [WHERE <condition>]' ordered by record ID."""
+    _parse_select(sql_query)
+    return f"{sql_query.rstrip().rstrip(';')} ORDER BY @rid ASC"
+
+
+def rid_cursor_page(sql_query: str, last_rid: str, limit: int) -> str:
+    """Return the SQL query for the page of at most `limit` records with a RID greater than `last_rid`.
+
+    The query must have the form 'SELECT [projection] FROM <class> [WHERE <condition>]'. The RID of each record is
+    returned in the column named by `CURSOR_RID`.
+    """
+    try:
+        parts = _parse_select(sql_query)
+    except ValueError:
+        raise ValueError("RID cursor pagination requires a query of the form "
+                         "'SELECT [projection] FROM <class> [WHERE <condition>]'") from None
+
+    projection = parts['projection'] or '*'
+    conditions = f"@rid > {last_rid}"
+    if parts['where']:
+        conditions += f" AND ({parts['where']})"
+
+    return (f"SELECT {projection}, @rid AS {CURSOR_RID} FROM {parts['target']} "
+            f"WHERE {conditions} ORDER BY @rid ASC LIMIT {limit}")
@@ -1,74 +1,79 @@
 from ebel_rest.manager.core import Statistics
+from ebel_rest.manager.session import Session
 from ebel_rest.manager import ss_functions
 
 
-def summarize() -> Statistics:
+def summarize(session: Session = None) -> Statistics:
     """Returns summary statistics on the graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_SUMMARIZE)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_SUMMARIZE)
 
 
-def publication_by_year() -> Statistics:
+def publication_by_year(session: Session = None) -> Statistics:
     """Returns statistics on the number of publications per year in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_PUBLICATION_BY_YEAR)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_PUBLICATION_BY_YEAR)
 
 
-def publication_by_number_of_statements() -> Statistics:
+def publication_by_number_of_statements(session: Session = None) -> Statistics:
     """Returns statistics on the number of statements per publication in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_PUBLICATION_BY_NUMBER_OF_STATEMENTS)
+    return Statistics(session=session).apply_api_function(
+        ss_functions.BEL_STATISTICS_PUBLICATION_BY_NUMBER_OF_STATEMENTS)
 
 
-def last_author_by_number_of_publications() -> Statistics:
+def last_author_by_number_of_publications(session: Session = None) -> Statistics:
     """Returns statistics on the number of publications per author in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_LAST_AUTHOR_BY_NUMBER_OF_PUBLICATIONS)
+    return Statistics(session=session).apply_api_function(
+        ss_functions.BEL_STATISTICS_LAST_AUTHOR_BY_NUMBER_OF_PUBLICATIONS)
 
 
-def last_author_by_number_of_statements() -> Statistics():
+def last_author_by_number_of_statements(session: Session = None) -> Statistics:
     """Returns statistics on the number of statements per author in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_LAST_AUTHOR_BY_NUMBER_OF_STATEMENTS)
+    return Statistics(session=session).apply_api_function(
+        ss_functions.BEL_STATISTICS_LAST_AUTHOR_BY_NUMBER_OF_STATEMENTS)
 
 
-def namespace_by_count() -> Statistics:
+def namespace_by_count(session: Session = None) -> Statistics:
     """Returns the number of nodes for each namespace in KG."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_NAMESPACE_COUNT)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_NAMESPACE_COUNT)
 
 
-def node_namespace_order_by_count() -> Statistics():
+def node_namespace_order_by_count(session: Session = None) -> Statistics:
     """Returns statistics on the frequency of each node type and each namespace in the knowledge graph
     in order of count."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_NODE_NAMESPACE_ORDER_BY_COUNT)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_NODE_NAMESPACE_ORDER_BY_COUNT)
 
 
-def node_namespace_order_by_namespace() -> Statistics():
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_NODE_NAMESPACE_ORDER_BY_NAMESPACE)
+def node_namespace_order_by_namespace(session: Session = None) -> Statistics:
+    return Statistics(session=session).apply_api_function(
+        ss_functions.BEL_STATISTICS_NODE_NAMESPACE_ORDER_BY_NAMESPACE)
 
 
-def edges() -> Statistics():
+def edges(session: Session = None) -> Statistics:
     """Returns statistics on the frequency of each edge type in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_EDGES)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_EDGES)
 
 
-def nodes() -> Statistics():
+def nodes(session: Session = None) -> Statistics:
     """Returns statistics on the frequency of each node type in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_NODES)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_NODES)
 
 
-def total_bel_nodes() -> Statistics():
+def total_bel_nodes(session: Session = None) -> Statistics:
     """Returns the total number of nodes generated from curated statements in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_TOTAL_BEL_NODES)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_TOTAL_BEL_NODES)
 
 
-def total_bel_edges() -> Statistics():
+def total_bel_edges(session: Session = None) -> Statistics:
     """Returns the total number of BEL curated edges in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_TOTAL_STATEMENTS)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_TOTAL_STATEMENTS)
 
 
-def total_publications() -> Statistics():
+def total_publications(session: Session = None) -> Statistics:
     """Returns the total number of publications in the knowledge graph."""
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_TOTAL_PUBLICATIONS)
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_TOTAL_PUBLICATIONS)
 
 
-def subgraphs() -> Statistics():
-    return Statistics().apply_api_function(ss_functions.BEL_STATISTICS_SUBGRAPH)
+def subgraphs(session: Session = None) -> Statistics:
+    return Statistics(session=session).apply_api_function(ss_functions.BEL_STATISTICS_SUBGRAPH)
 
 
 # def edges_by_pmid(pivot: bool = False):
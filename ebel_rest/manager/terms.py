@@ -0,0 +1,220 @@
+"""Local index of the namespaces, names, annotations and gene symbols of a knowledge graph.
+
+The index is built once with a few paged direct SQL queries and cached on disk. It answers prefix and fuzzy searches
+locally and, attached to a session, validates the arguments of :func:`ebel_rest.manager.query.annotation` and
+:func:`ebel_rest.manager.query.causal_correlative_by_gene` before a request is sent.
+
+Example
+-------
+    >>> session = connect(user, password, server, db_name)
+    >>> terms = TermIndex.cached(session=session)
+    >>> terms.prefix('gene', 'APO')
+    ['APOA1', 'APOA2', 'APOB', 'APOE']
+    >>> terms.fuzzy('gene', 'TP35')
+    ['TP53', 'TP63']
+    >>> session.terms = terms
+    >>> query.causal_correlative_by_gene('TP35')
+    ValueError: Unknown gene 'TP35', did you mean: TP53, TP63?
+"""
+import os
+import json
+import gzip
+import time
+import bisect
+import difflib
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from ebel_rest.defaults import terms_path
+from ebel_rest.manager import query
+from ebel_rest.manager.core import Client
+from ebel_rest.manager.session import Session
+
+NODE_TERMS_SQL = ("SELECT namespace, name FROM bel WHERE namespace IS NOT NULL AND name IS NOT NULL "
+                  "GROUP BY namespace, name ORDER BY namespace, name")
+ANNOTATIONS_SQL = "SELECT annotation FROM bel_relation WHERE annotation IS NOT NULL"
+GENES_SQL = "SELECT involved_genes FROM bel WHERE involved_genes IS NOT NULL"
+
+KINDS = ('namespace', 'name', 'annotation', 'annotation_value', 'gene')
+KIND_LABELS = {'namespace': 'namespace', 'name': 'name', 'annotation': 'annotation', 'annotation_value': 'value',
+               'gene': 'gene'}
+
+
+class TermIndex:
+    """Sorted term lists for prefix search (bisect) and fuzzy search (difflib), both case insensitive.
+
+    Parameters
+    ----------
+    terms: dict
+        Terms per kind and namespace, e.g. {'name': {'HGNC': ['APOE', ...]}}. Kinds without namespace ('namespace',
+        'annotation' and 'gene') use the namespace ''.
+    built_at: float
+        Time the terms were collected as seconds since the epoch.
+    """
+
+    def __init__(self, terms: Dict[str, Dict[str, Iterable[str]]], built_at: float = None):
+        self.built_at = built_at if built_at is not None else time.time()
+        self._terms = {}
+        self._keys = {}
+        for kind in KINDS:
+            for namespace, values in terms.get(kind, {}).items():
+                self._add(kind, namespace, values)
+
+    def _add(self, kind: str, namespace: Optional[str], values: Iterable[str]):
+        values = sorted(set(values), key=lambda value: (value.lower(), value))
+        self._terms[(kind, namespace)] = values
+        self._keys[(kind, namespace)] = [value.lower() for value in values]
+
+    def _lists(self, kind: str, namespace: str = None) -> tuple:
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if kind in ('namespace', 'annotation', 'gene'):
+            namespace = ''
+        if (kind, namespace) not in self._terms:
+            if namespace is not None:
+                return [], []
+            # Terms of all namespaces, merged once on first use
+            self._add(kind, None, (value for (k, ns), values in list(self._terms.items())
+                                   if k == kind and ns is not None for value in values))
+        return self._terms[(kind, namespace)], self._keys[(kind, namespace)]
+
+    def terms(self, kind: str, namespace: str = None) -> List[str]:
+        """Return the sorted terms of a kind, for 'name' and 'annotation_value' optionally of one namespace."""
+        return list(self._lists(kind, namespace)[0])
+
+    def contains(self, kind: str, term: str, namespace: str = None) -> bool:
+        """Check if the term is in the index, case sensitive."""
+        values, keys = self._lists(kind, namespace)
+        index = bisect.bisect_left(keys, term.lower())
+        while index < len(keys) and keys[index] == term.lower():
+            if values[index] == term:
+                return True
+            index += 1
+        return False
+
+    def prefix(self, kind: str, prefix: str, namespace: str = None, limit: int = 20) -> List[str]:
+        """Return up to `limit` terms of a kind starting with the prefix, ignoring case."""
+        values, keys = self._lists(kind, namespace)
+        prefix = prefix.lower()
+        start = bisect.bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and end - start < limit and keys[end].startswith(prefix):
+            end += 1
+        return values[start:end]
+
+    def fuzzy(self, kind: str, text: str, namespace: str = None, n: int = 5, cutoff: float = 0.6) -> List[str]:
+        """Return up to n terms of a kind similar to the text, best matches first, ignoring case.
+
+        Parameters
+        ----------
+        kind: {'namespace', 'name', 'annotation', 'annotation_value', 'gene'}
+            Kind of the terms.
+        text: str
+            Possibly misspelled term.
+        namespace: str
+            Only search the names or annotation values of this namespace.
+        n: int
+            Maximum number of matches.
+        cutoff: float
+            Minimal similarity (see :class:`difflib.SequenceMatcher`) between 0 and 1.
+        """
+        values, keys = self._lists(kind, namespace)
+        text = text.lower()
+        # Terms whose length differs too much can't reach the cutoff, so only similar lengths are compared
+        max_length_ratio = 2 / cutoff - 1 if cutoff > 0 else float('inf')
+        candidates = {}
+        for key, value in zip(keys, values):
+            if max(len(key), len(text)) <= max_length_ratio * max(min(len(key), len(text)), 1):
+                candidates.setdefault(key, value)
+        return [candidates[key] for key in difflib.get_close_matches(text, candidates, n=n, cutoff=cutoff)]
+
+    def validate(self, kind: str, term: str, namespace: str = None):
+        """Raise ValueError with suggestions if the term is not in the index."""
+        if self.contains(kind, term, namespace):
+            return
+        suggestions = list(dict.fromkeys([*self.prefix(kind, term, namespace, limit=3),
+                                          *self.fuzzy(kind, term, namespace, n=3)]))
+        where = f" in namespace {namespace!r}" if namespace and kind in ('name', 'annotation_value') else ''
+        hint = f", did you mean: {', '.join(suggestions)}?" if suggestions else ''
+        raise ValueError(f"Unknown {KIND_LABELS[kind]} {term!r}{where}{hint}")
+
+    @classmethod
+    def build(cls, session: Session = None, page_size: int = 10000) -> 'TermIndex':
+        """Collect the terms of the knowledge graph.
+
+        Node namespaces and names are requested grouped by the server, annotations are collected from all edges.
+        Gene symbols are collected from the involved genes of all nodes, so the symbols of every gene namespace (e.g.
+        HGNC, MGI and RGD) are included.
+        """
+        names = {}
+        for row in query.iter_sql(NODE_TERMS_SQL, page_size=page_size, session=session):
+            names.setdefault(row['namespace'], set()).add(str(row['name']))
+
+        annotation_values = {}
+        for row in query.iter_sql(ANNOTATIONS_SQL, page_size=page_size, session=session):
+            for namespace, values in (row.get('annotation') or {}).items():
+                values = values if isinstance(values, list) else [values]
+                annotation_values.setdefault(namespace, set()).update(str(value) for value in values)
+
+        genes = set()
+        for row in query.iter_sql(GENES_SQL, page_size=page_size, session=session):
+            genes.update(str(gene) for gene in row.get('involved_genes') or ())
+
+        return cls({
+            'namespace': {'': names},
+            'name': names,
+            'annotation': {'': annotation_values},
+            'annotation_value': annotation_values,
+            'gene': {'': genes},
+        })
+
+    def save(self, path: str) -> str:
+        """Write the index as gzip compressed JSON and return the path."""
+        terms = {}
+        for (kind, namespace), values in self._terms.items():
+            if namespace is not None:
+                terms.setdefault(kind, {})[namespace] = values
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as index_file:
+            json.dump({'built_at': self.built_at, 'terms': terms}, index_file)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'TermIndex':
+        """Read an index written by :meth:`save`."""
+        with gzip.open(path, 'rt', encoding='utf-8') as index_file:
+            stored = json.load(index_file)
+        return cls(stored['terms'], built_at=stored['built_at'])
+
+    @classmethod
+    def cached(cls, session: Session = None, directory: str = terms_path, max_age: float = 7 * 24 * 3600,
+               page_size: int = 10000) -> 'TermIndex':
+        """Load the index of the session's knowledge graph from the directory or build and save it.
+
+        Parameters
+        ----------
+        session: Session
+            Session to use. Defaults to the session created by :func:`ebel_rest.connect`.
+        directory: str
+            Directory of the cached indexes, one file per server and database.
+        max_age: float
+            Seconds after which the index is built again. If None, a cached index is always used.
+        page_size: int
+            Number of records fetched per request while building the index.
+        """
+        session = Client(session=session).session
+        if session is None:
+            raise ValueError("Not connected: call connect() or pass a Session")
+        digest = hashlib.sha256(f"{session.server}/{session.db_name}".encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(directory, f"{session.db_name}-{digest}.json.gz")
+
+        if os.path.isfile(path):
+            index = cls.load(path)
+            if max_age is None or time.time() - index.built_at <= max_age:
+                return index
+
+        index = cls.build(session=session, page_size=page_size)
+        index.save(path)
+        return index
@@ -0,0 +1,494 @@
+"""Local stand-in for an e(BE:L) server serving a synthetic knowledge graph.
+
+The server implements the '/function/{db}/{name}/{args}' contract used by :class:`ebel_rest.manager.core.Client`
+(GET with arguments as path segments, POST with arguments in a JSON body) with HTTP basic authentication. Results
+carry an ETag and conditional requests with a matching If-None-Match are answered with 304 Not Modified. It is
+used for offline tests and benchmarks.
+
+Direct SQL is answered by :class:`DirectSQL`, which only understands the query shapes generated by ebel_rest and
+doesn't model OrientDB. Tests of the generated SQL against the semantics of a real server replay responses recorded
+from one, see tests/test_replay.
+
+Example
+-------
+    kg = SyntheticKG(n_nodes=1000, n_edges=5000)
+    with StandInServer(kg) as server:
+        connect(server.user, server.password, server.url, server.db_name)
+        query.pmid(kg.pmids[0])
+"""
+import re
+import json
+import time
+import base64
+import hashlib
+import random
+import threading
+import urllib.parse
+from collections import Counter, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ebel_rest.constants import EDGE_ID_PROJECTION, GRAPH_EDGE_PROJECTION
+from ebel_rest.manager import belish
+from ebel_rest.manager.sql_tools import rid_key
+
+NODE_CLASSES = ['protein', 'rna', 'gene', 'complex', 'abundance', 'biological_process', 'pathology']
+NAMESPACES = {
+    'protein': 'HGNC', 'rna': 'HGNC', 'gene': 'HGNC', 'complex': 'GO', 'abundance': 'CHEBI',
+    'biological_process': 'GO', 'pathology': 'MESH',
+}
+FUNCTIONS = {v: k for k, v in belish.NODE_CLASSES.items()}
+RELATIONS = {
+    'increases': 'causal', 'decreases': 'causal', 'directly_increases': 'causal', 'directly_decreases': 'causal',
+    'regulates': 'causal', 'positive_correlation': 'correlative', 'negative_correlation': 'correlative',
+    'association': 'other',
+}
+AUTHORS = ['Hong W', 'Neumann H', 'Ebeling C', 'Schultz B', 'Smith J', 'Meyer A']
+ANNOTATIONS = {'MeSHAnatomy': ['Lung', 'Brain', 'Liver', 'Heart'], 'Species': ['9606', '10090']}
+EVIDENCE_WORDS = "the protein was shown to increase expression of its target in treated cells and tissues".split()
+
+
+class SyntheticKG:
+    """Randomly generated, reproducible knowledge graph.
+
+    Parameters
+    ----------
+    n_nodes: int
+        Number of nodes.
+    n_edges: int
+        Number of edges.
+    n_pmids: int
+        Number of publications the edges are taken from. Defaults to a tenth of the edges.
+    seed: int
+        Seed of the random number generator.
+    """
+
+    def __init__(self, n_nodes: int = 500, n_edges: int = 2000, n_pmids: int = None, seed: int = 42):
+        rng = random.Random(seed)
+        n_pmids = n_pmids or max(1, n_edges // 10)
+
+        self.nodes = []
+        for i in range(n_nodes):
+            node_class = NODE_CLASSES[i % len(NODE_CLASSES)]
+            namespace = NAMESPACES[node_class]
+            name = f"NODE{i}"
+            genes = [name] if namespace == 'HGNC' else []
+            self.nodes.append({
+                'rid': f"#10:{i}",
+                'class': node_class,
+                'namespace': namespace,
+                'name': name,
+                'bel': f'{FUNCTIONS[node_class]}({namespace}:"{name}")',
+                'involved_genes': genes,
+                'involved_other': [] if genes else [name],
+            })
+
+        self.pmids = [10000000 + i for i in range(n_pmids)]
+        publications = {pmid: {'last_author': rng.choice(AUTHORS),
+                               'publication_date': f"{rng.randint(1990, 2022)}-{rng.randint(1, 12):02d}-01",
+                               'title': f"Publication {pmid}"} for pmid in self.pmids}
+
+        self.edges = []
+        for j in range(n_edges):
+            out_node, in_node = rng.sample(self.nodes, 2) if n_nodes > 1 else (self.nodes[0], self.nodes[0])
+            pmid = rng.choice(self.pmids)
+            self.edges.append({
+                'rid': f"#20:{j}",
+                'relation': rng.choice(list(RELATIONS)),
+                'out': out_node,
+                'in': in_node,
+                'pmid': pmid,
+                'annotation': {ns: [rng.choice(values)] for ns, values in ANNOTATIONS.items()},
+                'evidence': ' '.join(rng.choice(EVIDENCE_WORDS) for _ in range(rng.randint(20, 60))),
+                **publications[pmid],
+            })
+
+    @staticmethod
+    def graph_row(edge: dict) -> dict:
+        """Edge in the format of the server side graph functions."""
+        out_node, in_node = edge['out'], edge['in']
+        return {
+            '@rid': edge['rid'],
+            'edge_id': edge['rid'],
+            'relation': edge['relation'],
+            'pmid': edge['pmid'],
+            'subject_bel': out_node['bel'],
+            'object_bel': in_node['bel'],
+            'subject_id': out_node['rid'],
+            'object_id': in_node['rid'],
+            'subject_class': out_node['class'],
+            'object_class': in_node['class'],
+            'subject_involved_genes': out_node['involved_genes'],
+            'subject_involved_other': out_node['involved_other'],
+            'object_involved_genes': in_node['involved_genes'],
+            'object_involved_other': in_node['involved_other'],
+            'annotation': edge['annotation'],
+            'last_author': edge['last_author'],
+            'publication_date': edge['publication_date'],
+            'title': edge['title'],
+            'evidence': edge['evidence'],
+        }
+
+    @staticmethod
+    def export_row(edge: dict, full: bool) -> dict:
+        """Edge in the format of export_slim or export_full."""
+        row = {
+            'out_rid': edge['out']['rid'],
+            'in_rid': edge['in']['rid'],
+            'out_bel': edge['out']['bel'],
+            'in_bel': edge['in']['bel'],
+            'relation': edge['relation'],
+        }
+        if full:
+            row.update({'edge_id': edge['rid'], 'pmid': edge['pmid'], 'annotation': edge['annotation'],
+                        'evidence': edge['evidence'], 'last_author': edge['last_author']})
+        return row
+
+
+def _match_node(node: dict, term) -> bool:
+    if term == belish.WILDCARD:
+        return True
+    if belish.NODE_CLASSES.get(term.function) != node['class']:
+        return False
+    if term.arguments and isinstance(term.arguments[0], belish.NamespaceArgument):
+        argument = term.arguments[0]
+        if argument.namespace != node['namespace']:
+            return False
+        return argument.name in (belish.WILDCARD, node['name'])
+    return True
+
+
+def _relation_matches(relation: str, edge_class: str) -> bool:
+    return edge_class in ('', 'bel_relation', belish.WILDCARD, relation, RELATIONS[relation])
+
+
+class ServerFunctions:
+    """Implementation of the server side functions on a synthetic knowledge graph."""
+
+    def __init__(self, kg: SyntheticKG):
+        self.kg = kg
+        self.by_rid = {edge['rid']: edge for edge in kg.edges}
+
+    def call(self, name: str, args: list) -> list:
+        func = getattr(self, name, None)
+        if func is None or name.startswith('_') or name == 'call':
+            raise KeyError(f"Unknown function {name!r}")
+        return func(*args)
+
+    def _graph(self, edges) -> list:
+        return [self.kg.graph_row(edge) for edge in edges]
+
+    def bel_by_pmid(self, pmid):
+        return self._graph(e for e in self.kg.edges if str(e['pmid']) == str(pmid))
+
+    def bel_by_annotation(self, namespace, name=''):
+        return self._graph(e for e in self.kg.edges
+                           if namespace in e['annotation'] and (not name or name in e['annotation'][namespace]))
+
+    def bel_by_subgraph(self, subgraph_name=''):
+        return self._graph(e for e in self.kg.edges
+                           if any(subgraph_name in values for values in e['annotation'].values()))
+
+    def bel_by_last_author(self, author, edge_class='', node_class='', exclude_namespace=''):
+        def matches(e):
+            return all([e['last_author'] == author,
+                        _relation_matches(e['relation'], edge_class),
+                        not node_class or node_class in (e['out']['class'], e['in']['class']),
+                        exclude_namespace not in (e['out']['namespace'], e['in']['namespace'])])
+        return self._graph(filter(matches, self.kg.edges))
+
+    def bel_causal_correlative_by_gene(self, gene_symbol):
+        return self._graph(e for e in self.kg.edges
+                           if all([RELATIONS[e['relation']] in ('causal', 'correlative'),
+                                   gene_symbol in (e['out']['name'], e['in']['name'])]))
+
+    def bel_path(self, source, target, num_range):
+        min_edges, max_edges = (int(x) for x in num_range.split('-'))
+        outgoing = defaultdict(list)
+        for edge in self.kg.edges:
+            outgoing[edge['out']['name']].append(edge)
+
+        found = {}
+        queue = deque([(source, [])])
+        while queue:
+            name, path = queue.popleft()
+            if name == target and min_edges <= len(path):
+                found.update((edge['rid'], edge) for edge in path)
+            if len(path) < max_edges:
+                for edge in outgoing[name]:
+                    if edge not in path:
+                        queue.append((edge['in']['name'], path + [edge]))
+        return self._graph(found.values())
+
+    def belish_helper(self, statement):
+        pattern = belish.parse(statement)
+        return self._graph(e for e in self.kg.edges
+                           if all([_relation_matches(e['relation'], pattern.relation),
+                                   _match_node(e['out'], pattern.subject),
+                                   _match_node(e['in'], pattern.object)]))
+
+    def all_pmids(self):
+        return [{'pmid': pmid} for pmid in sorted({e['pmid'] for e in self.kg.edges})]
+
+    def export_full(self):
+        return [self.kg.export_row(edge, True) for edge in self.kg.edges]
+
+    def export_slim(self):
+        return [self.kg.export_row(edge, False) for edge in self.kg.edges]
+
+    def bel_statistics_summarize(self):
+        return [{'metric': 'number_of_statements', 'value': len(self.kg.edges)},
+                {'metric': 'number_of_nodes', 'value': len(self.kg.nodes)},
+                {'metric': 'number_of_publications', 'value': len({e['pmid'] for e in self.kg.edges})},
+                {'metric': 'number_of_last_authors', 'value': len({e['last_author'] for e in self.kg.edges})},
+                {'metric': 'number_of_namespaces', 'value': len({n['namespace'] for n in self.kg.nodes})}]
+
+    def bel_statistics_edges(self):
+        counts = Counter(e['relation'] for e in self.kg.edges)
+        return [{'number_of_edges': v, 'edge_class': k} for k, v in counts.most_common()]
+
+    def bel_statistics_nodes(self):
+        counts = Counter(n['class'] for n in self.kg.nodes)
+        return [{'number_of_nodes': v, 'node_class': k} for k, v in counts.most_common()]
+
+    def bel_statistics_namespace_count(self):
+        counts = Counter(n['namespace'] for n in self.kg.nodes)
+        return [{'namespace': k, 'number_of_nodes': v} for k, v in counts.most_common()]
+
+    def bel_statistics_publication_by_year(self):
+        years = {e['pmid']: int(e['publication_date'][:4]) for e in self.kg.edges}
+        counts = Counter(years.values())
+        return [{'publication_year': k, 'number_of_publications': v} for k, v in sorted(counts.items())]
+
+    def direct_sql(self, sql_query):
+        return DirectSQL(self).execute(sql_query)
+
+
+class DirectSQL:
+    """Minimal interpreter for the direct SQL queries generated by ebel_rest.
+
+    Supports 'SELECT pmid FROM bel_relation ... GROUP BY pmid', the queries of the term index
+    (:mod:`ebel_rest.manager.terms`) and projections of the edge ID followed by columns of
+    :data:`ebel_rest.constants.GRAPH_EDGE_PROJECTION` on an edge class with conditions joined by AND, an extra
+    '@rid AS cursor_rid' projection, 'ORDER BY @rid' and SKIP/LIMIT. The name of the object is available as
+    'in.name as object_name'.
+    """
+
+    GRAPH_COLUMNS = {column: column.rsplit(' as ', 1)[-1] for column in GRAPH_EDGE_PROJECTION.split(', ')}
+    GRAPH_COLUMNS['in.name as object_name'] = 'object_name'
+
+    CONDITION_PATTERNS = [
+        (re.compile(r"^(out|in) INSTANCEOF '(\w+)'$"), lambda e, m: e[m[1]]['class'] == m[2]),
+        (re.compile(r"^(out|in)\.(namespace|name) = '((?:[^'\\]|\\.)*)'$"),
+         lambda e, m: e[m[1]][m[2]] == m[3].replace("\\'", "'")),
+        (re.compile(r"^@rid > #(-?\d+):(-?\d+)$"), lambda e, m: rid_key(e['rid']) > (int(m[1]), int(m[2]))),
+        (re.compile(r"^@rid < #(-?\d+):(-?\d+)$"), lambda e, m: rid_key(e['rid']) < (int(m[1]), int(m[2]))),
+        (re.compile(r"^@rid IN \[(.*)\]$"), lambda e, m: e['rid'] in set(re.findall(r"#\d+:\d+", m[1]))),
+        (re.compile(r"^out IN \[(.*)\]$"), lambda e, m: e['out']['rid'] in set(re.findall(r"#\d+:\d+", m[1]))),
+        (re.compile(r"^pmid = (\d+)$"), lambda e, m: e['pmid'] == int(m[1])),
+        (re.compile(r"^citation\.last_author = '((?:[^'\\]|\\.)*)'$"),
+         lambda e, m: e['last_author'] == m[1].replace("\\'", "'")),
+        (re.compile(r"^out INSTANCEOF '(\w+)' OR in INSTANCEOF '(\w+)'$"),
+         lambda e, m: m[1] in (e['out']['class'], e['in']['class'])),
+        (re.compile(r"^(out|in)\.namespace <> '((?:[^'\\]|\\.)*)'$"),
+         lambda e, m: e[m[1]]['namespace'] != m[2].replace("\\'", "'")),
+        (re.compile(r"^annotation CONTAINSKEY '((?:[^'\\]|\\.)*)'$"),
+         lambda e, m: m[1].replace("\\'", "'") in e['annotation']),
+        (re.compile(r"^annotation\['((?:[^'\\]|\\.)*)'\] CONTAINS '((?:[^'\\]|\\.)*)'$"),
+         lambda e, m: m[2].replace("\\'", "'") in e['annotation'].get(m[1].replace("\\'", "'"), [])),
+        (re.compile(r"^annotation\.values\(\) CONTAINS \(@this CONTAINS '((?:[^'\\]|\\.)*)'$"),
+         lambda e, m: any(m[1].replace("\\'", "'") in values for values in e['annotation'].values())),
+        (re.compile(r"^@this INSTANCEOF '(\w+)' OR @this INSTANCEOF '(\w+)'$"),
+         lambda e, m: _relation_matches(e['relation'], m[1]) or _relation_matches(e['relation'], m[2])),
+        (re.compile(r"^out\.involved_genes CONTAINS '((?:[^'\\]|\\.)*)' OR in\.involved_genes CONTAINS '\1'$"),
+         lambda e, m: m[1].replace("\\'", "'") in e['out']['involved_genes'] + e['in']['involved_genes']),
+    ]
+
+    def __init__(self, functions: ServerFunctions):
+        self.functions = functions
+
+    def execute(self, sql_query: str) -> list:
+        sql_query = sql_query.strip()
+        skip, limit = 0, None
+        match = re.search(r'(?:\s+SKIP\s+(\d+))?(?:\s+LIMIT\s+(\d+))?$', sql_query)
+        if match.group(0):
+            skip, limit = int(match.group(1) or 0), match.group(2) and int(match.group(2))
+            sql_query = sql_query[:match.start()]
+
+        rows = self._select(sql_query)
+        return rows[skip:None if limit is None else skip + limit]
+
+    def _select(self, sql_query: str) -> list:
+        if re.match(r'^SELECT pmid FROM bel_relation\b.*\bGROUP BY pmid', sql_query):
+            return self.functions.all_pmids()
+
+        if re.match(r'^SELECT namespace, name FROM bel\b.*\bGROUP BY namespace, name', sql_query):
+            terms = sorted({(n['namespace'], n['name']) for n in self.functions.kg.nodes})
+            return [{'namespace': namespace, 'name': name} for namespace, name in terms]
+
+        if re.match(r'^SELECT annotation FROM bel_relation\b', sql_query):
+            return [{'annotation': e['annotation']} for e in self.functions.kg.edges]
+
+        if re.match(r'^SELECT involved_genes FROM bel\b', sql_query):
+            return [{'involved_genes': n['involved_genes']} for n in self.functions.kg.nodes if n['involved_genes']]
+
+        match = re.match(r'^SELECT (?P<projection>.*?) FROM (?P<target>\w+)(?: WHERE (?P<where>.*?))?'
+                         r'(?P<order> ORDER BY @rid ASC)?$', sql_query)
+        if match is None or not match['projection'].startswith(EDGE_ID_PROJECTION):
+            raise ValueError(f"Unsupported SQL query: {sql_query}")
+
+        projection = match['projection']
+        cursor = projection.endswith(', @rid AS cursor_rid')
+        columns = projection[:-len(', @rid AS cursor_rid')].split(', ') if cursor else projection.split(', ')
+        unknown = [column for column in columns if column not in self.GRAPH_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unsupported projection: {', '.join(unknown)}")
+        fields = [self.GRAPH_COLUMNS[column] for column in columns]
+
+        conditions = []
+        for condition in re.split(r'\s+AND\s+', match['where'] or '') if match['where'] else []:
+            condition = condition.strip().lstrip('(').rstrip(')')
+            for pattern, predicate in self.CONDITION_PATTERNS:
+                condition_match = pattern.match(condition)
+                if condition_match:
+                    conditions.append((predicate, condition_match))
+                    break
+            else:
+                raise ValueError(f"Unsupported condition: {condition}")
+
+        edges = [e for e in self.functions.kg.edges if _relation_matches(e['relation'], match['target'])]
+        edges = [e for e in edges if all(predicate(e, m) for predicate, m in conditions)]
+        if match['order']:
+            edges.sort(key=lambda e: rid_key(e['rid']))
+
+        rows = self.functions._graph(edges) if len(fields) > 1 else [{'edge_id': e['rid']} for e in edges]
+        for row, edge in zip(rows, edges):
+            row['object_name'] = edge['in']['name']
+        rows = [{field: row[field] for field in fields} for row in rows]
+        if cursor:
+            for row in rows:
+                row['cursor_rid'] = row['edge_id']
+        return rows
+
+
+class StandInServer:
+    """HTTP server answering API calls from a synthetic knowledge graph in a background thread.
+
+    Parameters
+    ----------
+    kg: SyntheticKG
+        The knowledge graph to serve.
+    db_name: str
+        Name of the database in the URL.
+    user: str
+        Username for basic authentication.
+    password: str
+        Password for basic authentication.
+    latency: float
+        Seconds to wait before each response is sent.
+    """
+
+    def __init__(self, kg: SyntheticKG = None, db_name: str = 'synthetic', user: str = 'user',
+                 password: str = 'password', latency: float = 0):
+        self.kg = kg or SyntheticKG()
+        self.db_name = db_name
+        self.user = user
+        self.password = password
+        self.latency = latency
+        self.functions = ServerFunctions(self.kg)
+        self.requests = []
+        self.client_addresses = set()
+        self.not_modified = 0
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StandInServer':
+        server = self
+        expected_auth = 'Basic ' + base64.b64encode(f"{self.user}:{self.password}".encode()).decode()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, with Nagle's algorithm the body of a kept alive connection
+            # waits for the delayed ACK of the client (about 40 ms)
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, status: int, payload: dict, headers: dict = None):
+                body = json.dumps(payload).encode('utf-8')
+                if status == 200:
+                    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        server.not_modified += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+                    headers = {'ETag': etag, **(headers or {})}
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for header, value in (headers or {}).items():
+                    self.send_header(header, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, args_from_body: bool):
+                server.client_addresses.add(self.client_address)
+                length = int(self.headers.get('Content-Length') or 0)
+                request_body = self.rfile.read(length) if length else b''
+                if self.headers.get('Authorization') != expected_auth:
+                    self._respond(401, {'errors': ['Unauthorized']}, {'WWW-Authenticate': 'Basic realm="OrientDB"'})
+                    return
+
+                parts = [urllib.parse.unquote(p) for p in urllib.parse.urlsplit(self.path).path.split('/')[1:]]
+                if len(parts) < 3 or parts[0] != 'function' or parts[1] != server.db_name:
+                    self._respond(404, {'errors': [f"Not found: {self.path}"]})
+                    return
+
+                name, args = parts[2], parts[3:]
+                while args and args[-1] == '':  # Trailing slash of a call without (or with empty last) arguments
+                    args.pop()
+                if args_from_body:
+                    args = list(json.loads(request_body or b'{}').values())
+                server.requests.append((self.command, name, args))
+
+                if server.latency:
+                    time.sleep(server.latency)
+                try:
+                    result = server.functions.call(name, args)
+                except KeyError as e:
+                    self._respond(404, {'errors': [str(e)]})
+                except (ValueError, TypeError) as e:
+                    self._respond(500, {'errors': [str(e)]})
+                else:
+                    self._respond(200, {'result': result})
+
+            def do_GET(self):
+                self._handle(args_from_body=False)
+
+            def do_POST(self):
+                self._handle(args_from_body=True)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
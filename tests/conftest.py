@@ -0,0 +1,30 @@
+"""Shared fixtures for the tests."""
+import pytest
+
+from ebel_rest.manager.core import Connector, connect
+from ebel_rest.testing import StandInServer, SyntheticKG
+
+CONNECTOR_SETTINGS = [k for k in vars(Connector) if not k.startswith('_')]
+
+
+@pytest.fixture(scope='session')
+def stand_in_server():
+    """Stand-in e(BE:L) server with a small synthetic knowledge graph."""
+    with StandInServer(SyntheticKG(n_nodes=200, n_edges=1000)) as server:
+        yield server
+
+
+@pytest.fixture
+def stand_in(stand_in_server):
+    """Connect to the stand-in server for one test and restore the previous connection afterwards.
+
+    The default session of the connection is available as `Connector.session`.
+    """
+    settings = {k: getattr(Connector, k) for k in CONNECTOR_SETTINGS}
+    connect(stand_in_server.user, stand_in_server.password, stand_in_server.url, stand_in_server.db_name)
+    stand_in_server.requests.clear()
+    stand_in_server.not_modified = 0
+    yield stand_in_server
+    Connector.session.close()
+    for k, v in settings.items():
+        setattr(Connector, k, v)
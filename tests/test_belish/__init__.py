@@ -0,0 +1 @@
+"""Collection of tests for the belish submodule."""
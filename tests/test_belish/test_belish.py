@@ -0,0 +1,53 @@
+"""Testing module for belish"""
+import pytest
+
+from ebel_rest.manager import belish
+
+
+class TestBelish:
+
+    def test_canonical_equivalent_statements(self):
+        key = belish.canonical('p(HGNC:"ACE2") increases p(?)')
+        assert belish.canonical('proteinAbundance(HGNC:ACE2)  ->  p( ? )') == key
+        assert belish.canonical('p(HGNC:"ACE2") increases p(?)') == 'p(HGNC:"ACE2") increases p(?)'
+
+    def test_camel_case_relation(self):
+        pattern = belish.parse('complex(p(HGNC:A), p(HGNC:"B C")) directlyIncreases bp(GO:"x")')
+        assert pattern.relation == 'directly_increases'
+        assert str(pattern.subject) == 'complex(p(HGNC:"A"), p(HGNC:"B C"))'
+
+    def test_wildcards(self):
+        pattern = belish.parse('p(HGNC:"ACE2") ? ?')
+        assert pattern.relation == belish.WILDCARD
+        assert pattern.object == belish.WILDCARD
+
+    @pytest.mark.parametrize('statement,message', [
+        ('p(HGNC:ACE2', "Unexpected end of statement, expected ')'"),
+        ('x(HGNC:A) -> ?', "Unknown BEL function 'x' at position 0"),
+        ('p(?) foo p(?)', "Unknown relation 'foo' at position 5"),
+        ('? ? ? ?', "Unexpected '?' at position 6"),
+    ])
+    def test_invalid_statements(self, statement, message):
+        with pytest.raises(ValueError) as e:
+            belish.parse(statement)
+        assert str(e.value) == message
+
+    def test_to_sql(self):
+        sql = belish.to_sql('p(HGNC:ACE2) -> path(?)')
+        assert sql.startswith('SELECT ')
+        assert sql.endswith("FROM increases WHERE out INSTANCEOF 'protein' AND out.namespace = 'HGNC' "
+                            "AND out.name = 'ACE2' AND in INSTANCEOF 'pathology'")
+        assert belish.to_sql('? ? ?').endswith('FROM bel_relation')
+
+    def test_to_sql_quoting(self):
+        assert "out.name = 'O\\'Brien'" in belish.to_sql('p(HGNC:"O\'Brien") ? ?')
+
+    def test_to_sql_not_compilable(self):
+        assert belish.to_sql('complex(p(HGNC:A), p(HGNC:B)) -> ?') is None
+        assert belish.to_sql('act(p(HGNC:A)) -> ?') is None
+
+    def test_compiled_query_cache(self):
+        belish.to_sql('p(HGNC:"TREM2") ? ?')
+        hits = belish._compile.cache_info().hits
+        belish.to_sql('proteinAbundance(HGNC:TREM2) ? ?')
+        assert belish._compile.cache_info().hits == hits + 1
@@ -0,0 +1,129 @@
+"""Testing module for cache"""
+import os
+import time
+
+from ebel_rest import query
+from ebel_rest.manager import ss_functions
+from ebel_rest.manager.cache import ResponseCache
+from ebel_rest.manager.core import Connector
+from ebel_rest.manager.session import Session
+from ebel_rest.manager.transport import Response, Transport
+
+
+class VersionedTransport(Transport):
+    """Answers every request with the current body and its version as ETag, 304 if the ETag is unchanged."""
+
+    def __init__(self):
+        self.version = 1
+        self.requests = []
+
+    def send(self, url, body=None, user=None, password=None, headers=None):
+        self.requests.append((url, headers))
+        etag = f'"{self.version}"'
+        if (headers or {}).get('If-None-Match') == etag:
+            return Response(b'', 304, {'ETag': etag})
+        return Response(f'{{"result": [{self.version}]}}'.encode(), 200, {'ETag': etag})
+
+
+class TestResponseCache:
+
+    def test_memory(self):
+        cache = ResponseCache(ttl=60)
+        key = cache.key('http://server/function/db/bel_by_pmid/1')
+        assert cache.get(key) is None
+        cache.set(key, b'{"result": []}')
+        assert cache.get(key) == b'{"result": []}'
+
+    def test_key_includes_body(self):
+        url = 'http://server/function/db/direct_sql'
+        assert ResponseCache.key(url, b'a') != ResponseCache.key(url, b'b')
+
+    def test_expiry(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.set('key', b'body')
+        time.sleep(0.02)
+        assert cache.get('key') is None
+
+    def test_max_entries(self):
+        cache = ResponseCache(max_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key.encode())
+        assert len(cache) == 2
+        assert cache.get('a') is None
+
+    def test_stale_and_refresh(self, tmp_path):
+        cache = ResponseCache(ttl=0.01, directory=str(tmp_path))
+        cache.set('abcdef', b'body', {'etag': '"1"'})
+        time.sleep(0.02)
+        assert cache.get('abcdef') is None
+        assert ResponseCache(directory=str(tmp_path)).stale('abcdef') == (b'body', {'etag': '"1"'})
+
+        cache.refresh('abcdef')
+        assert cache.get('abcdef') == b'body'
+        assert ResponseCache(ttl=0.01, directory=str(tmp_path)).get('abcdef') == b'body'
+
+    def test_disk(self, tmp_path):
+        ResponseCache(directory=str(tmp_path)).set('abcdef', b'body')
+        assert os.path.isfile(os.path.join(str(tmp_path), 'ab', 'abcdef'))
+
+        cache = ResponseCache(directory=str(tmp_path))
+        assert cache.get('abcdef') == b'body'
+        cache.clear()
+        assert ResponseCache(directory=str(tmp_path)).get('abcdef') is None
+
+
+class TestRevalidation:
+
+    @staticmethod
+    def session(transport, **kwargs):
+        return Session('user', 'password', 'http://server', 'db', cache=ResponseCache(ttl=0.1), transport=transport,
+                       **kwargs)
+
+    def test_etag(self):
+        transport = VersionedTransport()
+        session = self.session(transport)
+        assert session.request('bel_by_pmid', 1) == b'{"result": [1]}'
+        time.sleep(0.15)
+        assert session.request('bel_by_pmid', 1) == b'{"result": [1]}'
+        assert transport.requests[-1][1] == {'If-None-Match': '"1"'}
+        assert session.request('bel_by_pmid', 1) == b'{"result": [1]}'
+        assert len(transport.requests) == 2
+
+        transport.version = 2
+        time.sleep(0.15)
+        assert session.request('bel_by_pmid', 1) == b'{"result": [2]}'
+
+    def test_kg_version(self):
+        transport = VersionedTransport()
+        session = self.session(transport, version_function=ss_functions.BEL_STATISTICS_SUMMARIZE,
+                               version_check_interval=0)
+        session.request(ss_functions.BEL_BY_PMID, 1)
+        time.sleep(0.15)
+        assert session.request(ss_functions.BEL_BY_PMID, 1) == b'{"result": [1]}'
+        assert [url.split('/')[-2] for url, _ in transport.requests] == [ss_functions.BEL_STATISTICS_SUMMARIZE,
+                                                                         ss_functions.BEL_BY_PMID,
+                                                                         ss_functions.BEL_STATISTICS_SUMMARIZE]
+
+        transport.version = 2
+        time.sleep(0.15)
+        assert session.request(ss_functions.BEL_BY_PMID, 1) == b'{"result": [2]}'
+
+
+class TestSessionCache:
+
+    def test_cache(self, stand_in):
+        Connector.session.cache = ResponseCache(ttl=60)
+        pmid = stand_in.kg.pmids[2]
+        first = query.pmid(pmid)
+        second = query.pmid(pmid)
+        assert first == second
+        assert len(stand_in.requests) == 1
+
+    def test_cache_revalidation(self, stand_in):
+        Connector.session.cache = ResponseCache(ttl=0.01)
+        pmid = stand_in.kg.pmids[3]
+        first = query.pmid(pmid)
+        time.sleep(0.02)
+        assert query.pmid(pmid) == first
+        assert len(stand_in.requests) == 2
+        assert stand_in.not_modified == 1
@@ -0,0 +1,57 @@
+"""Testing module for the command line interface"""
+import json
+
+import pytest
+
+from ebel_rest import cli
+from ebel_rest.manager import query
+
+
+class TestCli:
+
+    def test_resolve_spec(self):
+        name, func, args, kwargs = cli.resolve_spec({'function': 'query.pmid', 'args': [30310104]})
+        assert name == 'query.pmid'
+        assert func is query.pmid
+        assert args == [30310104]
+        assert kwargs == {}
+
+    @pytest.mark.parametrize('name', ['query.foo', 'os.remove', 'query._iter_skip_pages', 'pmid', 'query.Graph',
+                                      'query.Client', 'query.Session', 'query.iter_sql', 'statistics.Statistics'])
+    def test_resolve_unknown_spec(self, name):
+        with pytest.raises(ValueError):
+            cli.resolve_spec({'function': name})
+
+    def test_read_specs(self, tmp_path):
+        specs = [{'function': 'query.pmid', 'args': [1]}, {'function': 'statistics.summarize'}]
+        lines_path = tmp_path / 'specs.jsonl'
+        lines_path.write_text('\n'.join(json.dumps(spec) for spec in specs) + '\n')
+        list_path = tmp_path / 'specs.json'
+        list_path.write_text(json.dumps(specs))
+        assert cli.read_specs(str(lines_path)) == cli.read_specs(str(list_path)) == specs
+
+    def test_timer(self):
+        timer = cli.Timer()
+        assert timer.run('add', lambda a, b: a + b, 1, 2) == 3
+        assert timer.summary().startswith('tasks: 1, total: ')
+
+    def test_missing_connection_settings(self, monkeypatch):
+        for var in ('EBEL_REST_USER', 'EBEL_REST_PASSWORD', 'EBEL_REST_SERVER', 'EBEL_REST_DB'):
+            monkeypatch.delenv(var, raising=False)
+        with pytest.raises(SystemExit):
+            cli.main(['export', 'graph.csv', 'csv'])
+
+    def test_batch_failures(self, stand_in, tmp_path, capsys):
+        pmid = stand_in.kg.pmids[0]
+        input_path = tmp_path / 'pmids.txt'
+        input_path.write_text(f"{pmid}\nnot-a-pmid\n{pmid}\n")
+        output_path = tmp_path / 'edges.csv'
+        connection = ['--user', stand_in.user, '--password', stand_in.password, '--server', stand_in.url,
+                      '--db', stand_in.db_name]
+        assert cli.main(connection + ['batch', 'pmid', str(input_path), str(output_path)]) == 1
+
+        out, err = capsys.readouterr()
+        assert "pmid('not-a-pmid',) failed" in err
+        assert out.startswith('queries: 2, failed: 1, ')
+        edges = sum(e['pmid'] == pmid for e in stand_in.kg.edges)
+        assert len(output_path.read_text().splitlines()) == 1 + 2 * edges
@@ -4,7 +4,10 @@ import pytest
 import pandas as pd
 
 from ebel_rest import connect
-from ebel_rest import query
+from ebel_rest import query, Exporter
+from ebel_rest.constants import GRAPH_EDGE_PROJECTION, OPPOSITE_RELATIONS
+from ebel_rest.manager import core, ss_functions
+from ebel_rest.manager.core import Connector, Graph
 from ..constants import USER, PASSWORD, DATABASE, SERVER
 
 
@@ -72,3 +75,91 @@ class TestCore:
         with pytest.raises(IOError) as e:
             graph1 + not_graph
         assert str(e.value) == err_msg
+
+
+class TestGraphStandIn:
+
+    def test_data_not_copied(self, stand_in, tmp_path):
+        graph = query.pmid(stand_in.kg.pmids[0])
+        assert graph.data is graph.data is graph._data
+        assert all(not k.startswith('@') for row in graph._data for k in row)
+
+        exporter = Exporter(str(tmp_path / 'graph.json'), 'json')
+        exporter.get_data()
+        assert len(exporter.odb_results) == len(stand_in.kg.edges)
+
+    def test_find_contradictions(self, stand_in):
+        graph = Graph().apply_api_function(ss_functions.DIRECT_SQL,
+                                           f"SELECT {GRAPH_EDGE_PROJECTION} FROM bel_relation")
+        opposites = OPPOSITE_RELATIONS
+        conflicts = graph.find_contradictions()
+        assert isinstance(conflicts, Graph)
+        assert conflicts.session is graph.session
+
+        relations = {}
+        for edge in graph.edges:
+            relations.setdefault((edge['subject_id'], edge['object_id']), set()).add(edge['relation'])
+        expected = {e['edge_id'] for e in graph.edges if any(
+            {e['relation'], opposite} == {a, b} for a, b in opposites
+            for opposite in relations[(e['subject_id'], e['object_id'])])}
+        assert len(expected) > 0
+        assert conflicts.edge_ids == expected
+
+    def test_intern_strings(self, stand_in, monkeypatch):
+        graph = query.pmid(stand_in.kg.pmids[0])
+        Connector.session.intern_strings = True
+        small = query.pmid(stand_in.kg.pmids[0])
+        assert isinstance(small.data[0]['subject_involved_genes'], list)  # Below MIN_INTERNED_RESPONSE_SIZE
+
+        monkeypatch.setattr(core, 'MIN_INTERNED_RESPONSE_SIZE', 0)
+        interned = query.pmid(stand_in.kg.pmids[0])
+
+        assert interned.edge_ids == graph.edge_ids
+        row = interned.data[0]
+        assert isinstance(row['subject_involved_genes'], tuple)
+        assert isinstance(row['annotation'][next(iter(row['annotation']))], list)
+        assert {k: list(v) if isinstance(v, tuple) else v for k, v in row.items()} == graph.data[0]
+
+        relations = {}
+        for row in interned.data:
+            assert relations.setdefault(row['relation'], row['relation']) is row['relation']
+        assert all(not k.startswith('@') for row in interned.data for k in row)
+
+    def test_conversions(self, stand_in):
+        graph = Graph().apply_api_function(ss_functions.DIRECT_SQL,
+                                           f"SELECT {GRAPH_EDGE_PROJECTION} FROM bel_relation")
+        edges = graph.to_edgelist_frame(['pmid'])
+        nodes = graph.to_node_frame()
+        assert list(edges.columns) == ['source', 'target', 'edge_id', 'relation', 'pmid']
+        assert len(edges) == len(graph)
+        assert nodes['node_id'].is_unique
+        first = graph.edges[0]
+        assert nodes['node_id'][edges['source'][0]] == first['subject_id']
+        assert nodes['bel'][edges['target'][0]] == first['object_bel']
+        assert graph.to_edgelist_frame(['pmid']) is edges
+
+        graph._data = graph._data[:10]
+        assert len(graph.to_edgelist_frame()) == 10
+
+    def test_to_networkx(self, stand_in):
+        pytest.importorskip('networkx')
+        graph = query.pmid(stand_in.kg.pmids[0])
+        nx_graph = graph.to_networkx(['pmid'])
+        edge = graph.edges[0]
+        assert nx_graph.number_of_edges() == len(graph)
+        assert nx_graph.nodes[edge['subject_id']] == {'bel': edge['subject_bel'], 'class': edge['subject_class']}
+        assert nx_graph.edges[edge['subject_id'], edge['object_id'], edge['edge_id']] == \
+            {'relation': edge['relation'], 'pmid': edge['pmid']}
+        assert graph.to_networkx(['pmid']) is nx_graph
+
+    def test_to_igraph(self, stand_in):
+        pytest.importorskip('igraph')
+        graph = query.pmid(stand_in.kg.pmids[0])
+        ig_graph = graph.to_igraph()
+        edge = graph.edges[0]
+        assert ig_graph.is_directed()
+        assert ig_graph.ecount() == len(graph)
+        assert ig_graph.vcount() == len({e['subject_id'] for e in graph.edges} | {e['object_id'] for e in graph.edges})
+        ig_edge = ig_graph.es.find(edge_id=edge['edge_id'])
+        assert ig_graph.vs[ig_edge.source]['name'] == edge['subject_id']
+        assert ig_edge['relation'] == edge['relation']
@@ -0,0 +1,73 @@
+"""Parallel export tests against the stand-in server."""
+import os
+import threading
+import pytest
+
+from ebel_rest import Exporter
+from ebel_rest.manager import export
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """Write graphs of any size in parallel, also on machines with a single CPU."""
+    monkeypatch.setattr(Exporter, 'min_parallel_edges', 0)
+    monkeypatch.setattr(export, '_cpu_count', lambda: 4)
+
+
+class TestParallelExport:
+
+    @pytest.mark.parametrize('output_format, delim', [('lst', ' '), ('sif', '\t'), ('csv', ',')])
+    def test_parallel_export(self, stand_in, parallel, tmp_path, output_format, delim):
+        exporter = Exporter(str(tmp_path / 'sequential'), output_format, graph_delim=delim,
+                            mapping_path=str(tmp_path / 'map.csv'))
+        exporter.get_data()
+        sequential, _ = exporter.write_results()
+
+        exporter.graph_path = str(tmp_path / 'parallel')
+        exporter.workers = 3
+        parallel, _ = exporter.write_results()
+
+        with open(sequential) as sequential_file, open(parallel) as parallel_file:
+            sequential_lines = sequential_file.read().splitlines()
+            parallel_lines = parallel_file.read().splitlines()
+        assert sorted(parallel_lines) == sorted(sequential_lines)
+        if output_format == 'lst':
+            assert parallel_lines == sequential_lines  # Partitioned by position
+        assert len(sequential_lines) > 0
+        assert sorted(os.listdir(tmp_path)) == ['map.csv', 'parallel', 'sequential']
+
+    def test_small_graph_written_serially(self, stand_in, tmp_path, monkeypatch):
+        monkeypatch.setattr(export, '_cpu_count', lambda: 4)
+        exporter = Exporter(str(tmp_path / 'graph.csv'), 'csv', mapping_path=str(tmp_path / 'map.csv'), workers=4)
+        exporter.get_data()
+        assert len(exporter.odb_results) < Exporter.min_parallel_edges
+
+        def no_pool(*args, **kwargs):
+            raise AssertionError("process pool started")
+
+        monkeypatch.setattr(export, 'ProcessPoolExecutor', no_pool)
+        assert os.path.getsize(exporter.write_results()[0]) > 0
+
+        monkeypatch.setattr(export, '_cpu_count', lambda: 1)
+        monkeypatch.setattr(Exporter, 'min_parallel_edges', 0)
+        assert os.path.getsize(exporter.write_results()[0]) > 0
+
+    def test_without_fork(self, stand_in, parallel, tmp_path, monkeypatch):
+        exporter = Exporter(str(tmp_path / 'sequential'), 'csv', mapping_path=str(tmp_path / 'map.csv'))
+        exporter.get_data()
+        sequential, _ = exporter.write_results()
+
+        monkeypatch.setattr(export.multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+        exporter.graph_path = str(tmp_path / 'parallel')
+        exporter.workers = 2
+        parallel, _ = exporter.write_results()
+        with open(sequential) as sequential_file, open(parallel) as parallel_file:
+            assert sorted(parallel_file.read().splitlines()) == sorted(sequential_file.read().splitlines())
+
+    def test_no_fork_with_threads(self, stand_in, monkeypatch):
+        assert threading.active_count() > 1  # The stand-in server runs in a thread
+        assert export._mp_context().get_start_method() != 'fork'
+
+        monkeypatch.setattr(export.threading, 'active_count', lambda: 1)
+        monkeypatch.setattr(export.multiprocessing, 'get_all_start_methods', lambda: ['fork', 'spawn'])
+        assert export._mp_context().get_start_method() == 'fork'
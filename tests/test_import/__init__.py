@@ -0,0 +1 @@
+"""Collection of tests for importing the package."""
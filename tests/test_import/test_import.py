@@ -0,0 +1,41 @@
+"""Testing module for the import of the package"""
+import os
+import sys
+import json
+import subprocess
+
+IMPORT_TIME_BUDGET = 0.5  # seconds
+HEAVY_MODULES = ['pandas', 'numpy', 'graphviz', 'IPython']
+
+SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import ebel_rest
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+def import_in_subprocess(home: str) -> dict:
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT], env=env)
+    return json.loads(output)
+
+
+class TestImport:
+
+    def test_no_heavy_dependencies(self, tmp_path):
+        assert import_in_subprocess(str(tmp_path))['loaded'] == []
+
+    def test_import_time_budget(self, tmp_path):
+        elapsed = min(import_in_subprocess(str(tmp_path))['elapsed'] for _ in range(3))
+        assert elapsed < IMPORT_TIME_BUDGET
+
+    def test_no_directories_created(self, tmp_path):
+        import_in_subprocess(str(tmp_path))
+        assert os.listdir(str(tmp_path)) == []
+
+    def test_lazy_submodule(self):
+        import ebel_rest
+        from ebel_rest.manager import local_statistics
+        assert ebel_rest.local_statistics is local_statistics
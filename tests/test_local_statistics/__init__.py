@@ -0,0 +1 @@
+"""Collection of tests for the local_statistics submodule."""
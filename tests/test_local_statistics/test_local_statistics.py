@@ -0,0 +1,95 @@
+"""Testing module for local_statistics"""
+import os
+import json
+
+import pytest
+
+from ebel_rest.manager.core import Graph
+from ebel_rest.manager.local_statistics import LocalStatistics
+
+SERVER_STATISTICS = os.path.join(os.path.dirname(__file__), 'server_statistics.json')
+
+EDGES = [
+    {'edge_id': '#1:0', 'subject_id': '#10:0', 'object_id': '#10:1', 'subject_class': 'protein',
+     'object_class': 'protein', 'subject_bel': 'p(HGNC:"ACE2")', 'object_bel': 'p(HGNC:"AGTR1")',
+     'relation': 'increases', 'pmid': 1, 'last_author': 'Hong W', 'publication_date': '2019-05-01'},
+    {'edge_id': '#1:1', 'subject_id': '#10:1', 'object_id': '#11:0', 'subject_class': 'protein',
+     'object_class': 'pathology', 'subject_bel': 'p(HGNC:"AGTR1")', 'object_bel': 'path(MESH:"Fibrosis")',
+     'relation': 'decreases', 'pmid': 1, 'last_author': 'Hong W', 'publication_date': '2019-05-01'},
+    {'edge_id': '#1:2', 'subject_id': '#10:0', 'object_id': '#11:0', 'subject_class': 'protein',
+     'object_class': 'pathology', 'subject_bel': 'p(HGNC:"ACE2")', 'object_bel': 'path(MESH:"Fibrosis")',
+     'relation': 'increases', 'pmid': 2, 'last_author': 'Neumann H', 'publication_date': '2020'},
+    {'edge_id': '#1:2', 'subject_id': '#10:0', 'object_id': '#11:0', 'subject_class': 'protein',
+     'object_class': 'pathology', 'subject_bel': 'p(HGNC:"ACE2")', 'object_bel': 'path(MESH:"Fibrosis")',
+     'relation': 'increases', 'pmid': 2, 'last_author': 'Neumann H', 'publication_date': '2020'},
+]
+
+
+def as_graph(edges):
+    graph = Graph()
+    graph._data = edges
+    return graph
+
+
+class TestLocalStatistics:
+    stats = LocalStatistics(as_graph(EDGES))
+
+    def test_duplicates_removed(self):
+        assert len(self.stats.frame) == 3
+
+    def test_edges(self):
+        table = self.stats.edges().table
+        assert table.columns.tolist() == ['number_of_edges', 'edge_class']
+        assert table.iloc[0].tolist() == [2, 'increases']
+
+    def test_nodes(self):
+        table = self.stats.nodes().table
+        assert dict(zip(table['node_class'], table['number_of_nodes'])) == {'protein': 2, 'pathology': 1}
+
+    def test_namespace_by_count(self):
+        table = self.stats.namespace_by_count().table
+        assert len(table.columns) == 2
+        assert dict(zip(table['namespace'], table['number_of_nodes'])) == {'HGNC': 2, 'MESH': 1}
+
+    def test_publication_by_year(self):
+        table = self.stats.publication_by_year().table
+        assert table.values.tolist() == [[2019, 1], [2020, 1]]
+
+    def test_publication_by_number_of_statements(self):
+        table = self.stats.publication_by_number_of_statements().table
+        assert table.iloc[0]['pmid'] == 1
+        assert table.iloc[0]['number_of_statements'] == 2
+
+    def test_last_author_by_number_of_statements(self):
+        table = self.stats.last_author_by_number_of_statements().table
+        assert table.iloc[0].tolist() == ['Hong W', 2]
+
+    def test_summarize(self):
+        assert self.stats.summarize().table.shape == (5, 2)
+
+    def test_subgraph(self):
+        sub = LocalStatistics(as_graph(EDGES[:1]))
+        assert sub.total_bel_edges().data == [{'number_of_stmts': 1}]
+        assert sub.total_bel_nodes().data == [{'number_of_bel_nodes': 2}]
+
+    def test_export_file(self, tmp_path):
+        exported = [{'out_rid': e['subject_id'], 'in_rid': e['object_id'], 'out_bel': e['subject_bel'],
+                     'in_bel': e['object_bel'], 'relation': e['relation']} for e in EDGES]
+        path = tmp_path / 'export.json'
+        path.write_text(json.dumps(exported))
+        stats = LocalStatistics(str(path))
+        assert stats.namespace_by_count().table['number_of_nodes'].sum() == 3
+
+    def test_server_columns(self):
+        with open(SERVER_STATISTICS, encoding='utf-8') as fixture:
+            recorded = json.load(fixture)['functions']
+        edges = [dict(edge, title=f"Publication {edge['pmid']}", journal='Nature') for edge in EDGES]
+        stats = LocalStatistics(as_graph(edges))
+        for function_name, row in recorded.items():
+            data = getattr(stats, function_name)().data
+            assert list(data[0]) == list(row), function_name
+
+    def test_missing_columns(self):
+        with pytest.raises(ValueError) as e:
+            LocalStatistics([{'relation': 'increases'}]).last_author_by_number_of_statements()
+        assert str(e.value) == "Edges are missing the following columns: last_author"
@@ -0,0 +1 @@
+"""Collection of tests for the manager submodule that run without a server."""
@@ -0,0 +1,27 @@
+"""Testing module for the local Graph methods"""
+import pytest
+
+from ebel_rest.manager.core import Graph
+
+
+def edge(edge_id, subject_id, relation, object_id):
+    return {'edge_id': edge_id, 'subject_id': subject_id, 'object_id': object_id, 'relation': relation}
+
+
+class TestGraph:
+
+    def test_find_contradictions_local(self):
+        graph = Graph()
+        graph._data = [
+            edge('#1:0', 'a', 'increases', 'b'),
+            edge('#1:1', 'a', 'directly_decreases', 'b'),
+            edge('#1:2', 'b', 'decreases', 'a'),
+            edge('#1:3', 'a', 'positive_correlation', 'c'),
+            edge('#1:4', 'a', 'increases', 'c'),
+        ]
+        assert graph.find_contradictions().edge_ids == {'#1:0', '#1:1'}
+        assert graph.find_contradictions([('increases', 'positive_correlation')]).edge_ids == {'#1:3', '#1:4'}
+        graph._data = []
+        assert len(graph.find_contradictions()) == 0
+        with pytest.raises(ValueError):
+            graph.find_contradictions([('increases',)])
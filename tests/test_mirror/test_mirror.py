@@ -0,0 +1,137 @@
+"""Testing module for mirror"""
+import pytest
+
+from ebel_rest import Session, query
+from ebel_rest.manager import sql_tools
+from ebel_rest.manager.mirror import Mirror
+from ebel_rest.testing import StandInServer, SyntheticKG
+
+
+@pytest.fixture
+def server():
+    """Stand-in server with its own knowledge graph, which the tests can change."""
+    with StandInServer(SyntheticKG(n_nodes=100, n_edges=400)) as server:
+        yield server
+
+
+@pytest.fixture
+def session(server):
+    with Session(server.user, server.password, server.url, server.db_name) as session:
+        yield session
+
+
+@pytest.fixture
+def mirror(session, tmp_path):
+    with Mirror(str(tmp_path / 'kg.sqlite'), session=session) as mirror:
+        yield mirror
+
+
+class TestMirror:
+
+    def test_sync(self, server, mirror, tmp_path):
+        assert mirror.last_sync is None
+        assert mirror.sync(page_size=150) == {'added': 400, 'removed': 0}
+        assert len(mirror) == 400
+        assert mirror.last_sync is not None
+
+        with Mirror(str(tmp_path / 'kg.sqlite')) as reopened:
+            assert len(reopened) == 400
+
+    def test_incremental_sync(self, server, mirror):
+        mirror.sync()
+        removed = server.kg.edges[:3]
+        del server.kg.edges[:3]
+        for position, edge in enumerate(server.kg.edges[:2], start=1000):
+            server.kg.edges.append(dict(edge, rid=f"#20:{position}"))
+
+        server.requests.clear()
+        assert mirror.sync(page_size=1000) == {'added': 2, 'removed': 0}
+        assert len(server.requests) == 1  # One page of new edges above the highest record ID, no IDs of all edges
+        assert "@rid > #20:399" in server.requests[0][2][0]
+        assert len(mirror) == 400 + 2
+
+        server.requests.clear()
+        assert mirror.sync(page_size=1000, check_removed=True) == {'added': 0, 'removed': 3}
+        assert len(server.requests) == 2  # The page of new edges and one page of IDs
+        assert len(mirror) == 400 - 3 + 2
+        assert all(mirror.answer('bel_by_pmid', edge['pmid']) is not None for edge in removed)
+        assert mirror.sync() == {'added': 0, 'removed': 0}
+
+    def test_sync_clusters(self, server, mirror):
+        mirror.sync()
+        edges = server.kg.edges
+        edges.insert(0, dict(edges[0], rid="#19:5"))
+        edges.append(dict(edges[1], rid="#21:0"))
+        mirror._insert([dict(mirror.answer('bel_by_pmid', edges[0]['pmid'])[0], edge_id="#19:3")])
+
+        server.requests.clear()
+        assert mirror.sync() == {'added': 2, 'removed': 0}
+        assert [r[2][0].split(' WHERE ', 1)[1] for r in server.requests] == [
+            "@rid > #-1:-1 AND (@rid > #19:3 AND @rid < #20:0) ORDER BY @rid ASC LIMIT 10000",
+            "@rid > #-1:-1 AND (@rid > #20:399) ORDER BY @rid ASC LIMIT 10000",
+        ]
+
+    def test_overlapping_sync(self, server, mirror):
+        mirror.sync()
+        rows = [mirror.answer('bel_by_pmid', pmid)[0] for pmid in server.kg.pmids[:3]]
+        assert mirror._insert(rows) == 3
+        assert len(mirror) == 400
+        gene = next(node['name'] for node in server.kg.nodes if node['involved_genes'])
+        assert len(mirror.answer('bel_causal_correlative_by_gene', gene)) == len(query.causal_correlative_by_gene(
+            gene, session=mirror.session))
+
+    def test_answers(self, server, session, mirror):
+        mirror.sync()
+        kg = server.kg
+        author = kg.edges[0]['last_author']
+        gene = next(node['name'] for node in kg.nodes if node['involved_genes'])
+        calls = [
+            (query.pmid, (kg.pmids[0],)),
+            (query.annotation, ('MeSHAnatomy', 'Lung')),
+            (query.annotation, ('Species',)),
+            (query.subgraph, ('Brain',)),
+            (query.last_author, (author,)),
+            (query.causal_correlative_by_gene, (gene,)),
+        ]
+        expected = [func(*args, session=session) for func, args in calls]
+
+        session.mirror = mirror
+        server.requests.clear()
+        for (func, args), graph in zip(calls, expected):
+            answered = func(*args, session=session)
+            assert answered.edge_ids == graph.edge_ids
+            assert sorted(answered.data, key=lambda x: x['edge_id']) == sorted(graph.data, key=lambda x: x['edge_id'])
+        assert server.requests == []
+
+        # Limits and slim results are selected from the mirror in the order of the pushed down queries
+        for (func, args), graph in zip(calls, expected):
+            ordered = sorted(graph.edges, key=lambda e: sql_tools.rid_key(e['edge_id']))
+            assert func(*args, offset=1, limit=2, session=session).edges == ordered[1:3]
+            assert func(*args, sample=2, seed=1, session=session).edge_ids <= graph.edge_ids
+        assert query.pmid(kg.pmids[0], slim=True, session=session).edge_ids == expected[0].edge_ids
+        assert server.requests == []
+
+        # Calls the mirror can't answer go to the server
+        assert len(query.last_author(author, 'causal', session=session)) > 0
+        assert len(server.requests) == 1
+
+    def test_sync_page_by_page(self, server, mirror, monkeypatch):
+        iter_sql = query.iter_sql
+        locked = []
+
+        def failing_iter_sql(*args, **kwargs):
+            for i, row in enumerate(iter_sql(*args, **kwargs)):
+                locked.append(mirror._lock.locked())
+                if i == 250:
+                    raise ConnectionResetError("connection lost")
+                yield row
+
+        monkeypatch.setattr(query, 'iter_sql', failing_iter_sql)
+        with pytest.raises(ConnectionResetError):
+            mirror.sync(page_size=100)
+        assert not any(locked)  # Pages are fetched without locking the mirror
+        assert len(mirror) == 200  # Complete pages are kept
+
+        monkeypatch.setattr(query, 'iter_sql', iter_sql)
+        assert mirror.sync(page_size=100) == {'added': 200, 'removed': 0}
+        assert len(mirror) == 400
@@ -0,0 +1,101 @@
+"""Testing module for profiling"""
+import os
+import sys
+import subprocess
+import threading
+
+import pytest
+
+from ebel_rest import query, Exporter
+from ebel_rest.manager import profiling
+from ebel_rest.manager.profiling import Profiler, stage
+
+
+class TestProfiling:
+
+    def test_stages(self, stand_in, tmp_path):
+        pmids = stand_in.kg.pmids
+        with Profiler() as profiler:
+            graph = query.pmid(pmids[0]) + query.pmid(pmids[1])
+            graph.table
+            Exporter(str(tmp_path / 'graph.csv'), 'csv', mapping_path=str(tmp_path / 'map.csv')).export()
+
+        stages = profiler.stages
+        assert stages[('client.bel_by_pmid',)].calls == 2
+        assert stages[('client.bel_by_pmid', 'session.network')].calls == 2
+        assert stages[('client.bel_by_pmid', 'client.decode')].calls == 2
+        assert ('graph.union',) in stages
+        assert ('table.table',) in stages
+        assert ('export.get_data', 'client.export_slim', 'session.network') in stages
+        assert ('export.write_results', 'export.prepare') in stages
+
+        outer = stages[('client.bel_by_pmid',)]
+        assert outer.children_wall <= outer.wall
+        assert outer.self_wall == outer.wall - outer.children_wall
+
+        report = profiler.report(sort='self')
+        assert 'session.network' in report
+        with pytest.raises(ValueError):
+            profiler.report(sort='unknown')
+
+        collapsed = profiler.write_collapsed(str(tmp_path / 'profile.folded'))
+        with open(collapsed) as collapsed_file:
+            lines = collapsed_file.read().splitlines()
+        assert 'client.bel_by_pmid;session.network' in [line.rsplit(' ', 1)[0] for line in lines]
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+    def test_inactive(self, stand_in):
+        assert profiling.active_profiler() is None
+        assert stage('anything') is stage('other')
+        with Profiler() as profiler:
+            pass
+        query.pmid(stand_in.kg.pmids[0])
+        assert profiler.stages == {}
+
+    def test_memory_and_cpu_profile(self, stand_in):
+        with Profiler(memory=True, cpu_profile=True) as profiler:
+            query.pmid(stand_in.kg.pmids[0])
+        assert profiler.stages[('client.bel_by_pmid', 'client.decode')].memory_peak > 0
+        assert profiler.stats is not None and profiler.stats.total_calls > 0
+
+    def test_threads(self):
+        with Profiler() as profiler:
+            def work():
+                with stage('outer'):
+                    with stage('inner'):
+                        pass
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert profiler.stages[('outer',)].calls == 4
+        assert profiler.stages[('outer', 'inner')].calls == 4
+
+    def test_environment_variable(self, tmp_path):
+        path = str(tmp_path / 'profile.folded')
+        code = "from ebel_rest.manager.profiling import stage\nwith stage('script'):\n    pass\n"
+        env = dict(os.environ, EBEL_REST_PROFILE=path)
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        assert 'script' in result.stderr
+        with open(path) as collapsed_file:
+            assert collapsed_file.read().startswith('script ')
+
+    def test_nested_memory_peak(self):
+        with Profiler(memory=True) as profiler:
+            with stage('outer'):
+                block = bytearray(50 * 2 ** 20)
+                del block
+                with stage('inner'):
+                    small = bytearray(2 ** 20)
+                    del small
+        assert profiler.stages[('outer',)].memory_peak >= 50 * 2 ** 20
+        assert 2 ** 20 <= profiler.stages[('outer', 'inner')].memory_peak < 10 * 2 ** 20
+
+        with Profiler(memory=True) as profiler:
+            with stage('outer'):
+                with stage('inner'):
+                    block = bytearray(20 * 2 ** 20)
+                    del block
+        assert profiler.stages[('outer',)].memory_peak >= profiler.stages[('outer', 'inner')].memory_peak
+        assert profiler._memory_frames == []
@@ -0,0 +1,91 @@
+"""Testing module for progress"""
+import os
+import threading
+
+import pytest
+
+from ebel_rest import query, Exporter
+from ebel_rest.constants import GRAPH_EDGE_PROJECTION
+from ebel_rest.manager import ss_functions
+from ebel_rest.manager.core import Client, Connector
+from ebel_rest.manager.progress import CancellationToken, CancelledError, Progress, tqdm_progress
+from ebel_rest.manager.transport import CHUNK_SIZE, RecordingTransport, ReplayTransport
+
+FULL_GRAPH_SQL = f"SELECT {GRAPH_EDGE_PROJECTION} FROM bel_relation"
+
+
+class TestProgress:
+
+    def test_progress(self, stand_in):
+        reports = []
+        client = Client().apply_api_function(ss_functions.DIRECT_SQL, FULL_GRAPH_SQL, progress=reports.append)
+        assert all(isinstance(report, Progress) for report in reports)
+        received = [report.bytes_received for report in reports]
+        assert received == sorted(received)
+        assert len(reports) > 3
+
+        last = reports[-1]
+        assert last.done and not any(report.done for report in reports[:-1])
+        assert last.records == len(client.data) == len(stand_in.kg.edges)
+        assert last.bytes_received == last.bytes_total > CHUNK_SIZE
+        assert last.elapsed >= reports[0].elapsed
+
+    def test_cancel_during_transfer(self, stand_in):
+        token = CancellationToken()
+
+        def cancel_after_first_chunk(progress: Progress):
+            if progress.bytes_received > 0:
+                token.cancel()
+
+        with pytest.raises(CancelledError):
+            query.sql(FULL_GRAPH_SQL, progress=cancel_after_first_chunk, cancel=token)
+
+        # The aborted connection is dropped, the next call uses a new one
+        assert len(query.sql(FULL_GRAPH_SQL).data) == len(stand_in.kg.edges)
+
+    def test_cancel_before_request(self, stand_in):
+        token = CancellationToken()
+        token.cancel()
+        with pytest.raises(CancelledError):
+            query.path('a', 'b', cancel=token)
+        assert stand_in.requests == []
+
+    def test_iter_sql(self, stand_in):
+        reports = []
+        rows = list(query.iter_sql(FULL_GRAPH_SQL, page_size=300, progress=reports.append))
+        assert len(rows) == len(stand_in.kg.edges)
+        assert [r.records for r in reports if r.done] == [300, 300, 300, 100]
+
+    def test_export(self, stand_in, tmp_path):
+        graph_path = str(tmp_path / 'graph.json')
+        reports = []
+        exporter = Exporter(graph_path, 'json', mapping_path=str(tmp_path / 'map.csv'), progress=reports.append)
+        assert exporter.export() == (graph_path, str(tmp_path / 'map.csv'))
+        assert reports[-1].done
+
+        token = CancellationToken()
+        token.cancel()
+        exporter = Exporter(str(tmp_path / 'cancelled.json'), 'json', cancel=token)
+        with pytest.raises(CancelledError):
+            exporter.export()
+        assert not os.path.exists(tmp_path / 'cancelled.json')
+
+    def test_replay_cancel(self, stand_in, tmp_path):
+        archive = str(tmp_path / 'workload.jsonl.gz')
+        Connector.session.transport = RecordingTransport(archive)
+        query.sql(FULL_GRAPH_SQL)
+        Connector.session.transport.close()
+
+        # Replaying the response takes about 5 seconds, cancel it after a short time
+        replay = ReplayTransport(archive)
+        replay.bandwidth = len(replay._responses[next(iter(replay._responses))][0].body) / 5
+        Connector.session.transport = replay
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+        with pytest.raises(CancelledError):
+            query.sql(FULL_GRAPH_SQL, cancel=token)
+
+    def test_tqdm_progress(self, stand_in):
+        pytest.importorskip('tqdm')
+        update = tqdm_progress('test', disable=True)
+        query.sql(FULL_GRAPH_SQL, progress=update)
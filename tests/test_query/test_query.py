@@ -1,8 +1,12 @@
 """Testing module for query"""
 import pytest
+import numpy as np
 
 from ebel_rest import connect
 from ebel_rest import query
+from ebel_rest.constants import GRAPH_EDGE_PROJECTION
+from ebel_rest.manager import ss_functions
+from ebel_rest.testing import rid_key
 from ..constants import USER, PASSWORD, DATABASE, SERVER
 
 
@@ -60,6 +64,39 @@ class TestQuery:
         assert type(q) == list
         assert len(q) > 0
 
+    def test_list_pmids_as_array(self):
+        q = query.list_pmids(as_array=True)
+        assert isinstance(q, np.ndarray)
+        assert q.dtype == np.int64
+        assert len(q) > 0
+
+    def test_iter_pmids_paged(self):
+        paged = list(query.iter_pmids(page_size=50))
+        assert len(paged) > 0
+        assert all(isinstance(pmid, int) for pmid in paged)
+        assert sorted(paged) == sorted(query.list_pmids())
+
+    def test_belish_invalid_statement(self):
+        with pytest.raises(ValueError) as e:
+            query.belish('p(HGNC:"ACE2") foo ?')
+        assert str(e.value) == "Unknown relation 'foo' at position 15"
+
+    def test_belish_sql(self):
+        q = query.belish('p(HGNC:"ACE2") ? ?', use_sql=True)
+        assert q.function_name == 'direct_sql'
+        assert len(q.table.index) > 0
+
+    def test_sql_params(self):
+        csql = "SELECT name as bel_name FROM protein WHERE namespace = :namespace LIMIT 1"
+        q = query.sql(csql, params={'namespace': 'HGNC'})
+        assert len(q.table.index) == 1
+
+    def test_iter_sql(self):
+        csql = "SELECT name FROM protein WHERE namespace = ?"
+        paged = list(query.iter_sql(csql, params=['HGNC'], page_size=100))
+        rid_paged = list(query.iter_sql(csql, params=['HGNC'], page_size=100, cursor='rid'))
+        assert len(paged) == len(rid_paged) > 0
+
     # TODO Current version of test KG (COVID) too large. Need to make smaller test DB
     # def test_find_contradictions(self):
     #     q = query.find_contradictions()
@@ -69,3 +106,186 @@ class TestQuery:
 
 
 # TODO write tests for "subgraph"
+
+
+class TestQueryStandIn:
+
+    def test_list_pmids(self, stand_in):
+        pmids = query.list_pmids(as_array=True)
+        assert pmids.dtype == np.int64
+        assert pmids.tolist() == list(query.iter_pmids(page_size=7)) == sorted({e['pmid'] for e in stand_in.kg.edges})
+
+    def test_iter_sql(self, stand_in):
+        sql = "SELECT {} FROM causal WHERE out INSTANCEOF :cls"
+        sql = sql.format(GRAPH_EDGE_PROJECTION)
+        full = query.sql(sql, params={'cls': 'protein'})
+        skip_pages = list(query.iter_sql(sql, params={'cls': 'protein'}, page_size=50))
+        rid_pages = list(query.iter_sql(sql, params={'cls': 'protein'}, page_size=50, cursor='rid'))
+        assert len(full.data) > 50
+        assert {r['edge_id'] for r in skip_pages} == {r['edge_id'] for r in rid_pages} == \
+            {r['edge_id'] for r in full.data}
+        assert 'cursor_rid' not in rid_pages[0]
+
+    def test_belish_sql(self, stand_in):
+        statement = 'p(HGNC:?) increases ?'
+        assert query.belish(statement).edge_ids == query.belish(statement, use_sql=True).edge_ids
+
+    def test_belish_statement_sent(self, stand_in):
+        statement = 'proteinAbundance(HGNC:?)  ->  ?'
+        full = query.belish(statement)
+        assert stand_in.requests == [('GET', ss_functions.BELISH, [statement])]
+        assert full.edge_ids == query.belish('p(HGNC:?) increases ?').edge_ids
+
+        stand_in.requests.clear()
+        limited = query.belish(statement, validate=False, limit=3)
+        assert stand_in.requests == [('GET', ss_functions.BELISH, [statement])]  # Not parsed and pushed down
+        assert limited.edges == full.edges[:3]
+        with pytest.raises(ValueError):
+            query.belish(statement, validate=False, slim=True)
+        assert len(query.belish(statement, validate=False, use_sql=True, slim=True)) == len(full)
+
+    def test_limit_pushdown(self, stand_in):
+        pmid = stand_in.kg.pmids[0]
+        ordered = sorted(query.pmid(pmid).edges, key=lambda e: rid_key(e['edge_id']))
+        stand_in.requests.clear()
+        page = query.pmid(pmid, limit=2, offset=1)
+        assert page.edges == ordered[1:3]
+        assert page.function_name == ss_functions.BEL_BY_PMID
+        assert [r[1] for r in stand_in.requests] == [ss_functions.DIRECT_SQL]
+        assert stand_in.requests[0][2][0].endswith('ORDER BY @rid ASC SKIP 1 LIMIT 2')
+
+        author = stand_in.kg.edges[0]['last_author']
+        full = query.last_author(author, node_class='protein', exclude_namespace='MGI')
+        assert full.edge_ids == query.last_author(author, node_class='protein', exclude_namespace='MGI',
+                                                  offset=0).edge_ids
+
+        statement = 'p(HGNC:?) increases ?'
+        assert len(query.belish(statement, limit=3)) == 3
+        assert query.belish(statement, offset=0).edge_ids == query.belish(statement).edge_ids
+
+    def test_annotation_and_gene_pushdown(self, stand_in):
+        gene = next(node['name'] for node in stand_in.kg.nodes if node['involved_genes'])
+        calls = [
+            (query.annotation, ('MeSHAnatomy', 'Lung')),
+            (query.annotation, ('Species',)),
+            (query.subgraph, ('Brain',)),
+            (query.causal_correlative_by_gene, (gene,)),
+        ]
+        for func, args in calls:
+            ordered = sorted(func(*args).edges, key=lambda e: rid_key(e['edge_id']))
+            assert len(ordered) > 3
+            stand_in.requests.clear()
+            assert func(*args, offset=1, limit=2).edges == ordered[1:3]
+            assert [r[1] for r in stand_in.requests] == [ss_functions.DIRECT_SQL]
+            assert func(*args, offset=0).edges == ordered
+            assert func(*args, sample=3, seed=1).edge_ids <= {e['edge_id'] for e in ordered}
+
+            slim = func(*args, slim=True)
+            assert slim.edge_ids == {e['edge_id'] for e in ordered}
+            assert all('evidence' not in row for row in slim.data)
+
+    def test_sample(self, stand_in):
+        statement = 'p(HGNC:?) increases ?'
+        sample = query.belish(statement, sample=5, seed=1)
+        assert len(sample) == 5
+        assert sample.edge_ids <= query.belish(statement).edge_ids
+        assert query.belish(statement, sample=5, seed=1).edge_ids == sample.edge_ids
+        assert len(query.pmid(stand_in.kg.pmids[0], sample=10 ** 6)) == len(query.pmid(stand_in.kg.pmids[0]))
+
+        subgraph = stand_in.kg.edges[0]['annotation']
+        name = next(iter(next(iter(subgraph.values()))))
+        full = query.subgraph(name)
+        assert query.subgraph(name, offset=1, limit=2).edges == full.edges[1:3]
+        assert query.subgraph(name, sample=3, seed=2).edge_ids <= full.edge_ids
+
+        with pytest.raises(ValueError):
+            query.pmid(stand_in.kg.pmids[0], limit=-1)
+
+    def test_paths(self, stand_in):
+        edges = stand_in.kg.edges
+        pairs = [(edges[i]['out']['name'], edges[i]['in']['name']) for i in range(3)]
+        graph = query.paths(pairs + pairs[:1], max_edges=2)
+        single = {pair: query.path(*pair, max_edges=2) for pair in pairs}
+        assert graph.edge_ids == set().union(*(g.edge_ids for g in single.values()))
+        assert len(graph.data) == len(graph.edge_ids)
+        for pair, pair_graph in single.items():
+            assert all(pair in graph.pairs[edge_id] for edge_id in pair_graph.edge_ids)
+
+        stand_in.requests.clear()
+        new_pair = (edges[3]['out']['name'], edges[3]['in']['name'])
+        overlapping = query.paths(pairs[1:] + [new_pair], max_edges=2)
+        assert stand_in.requests == [('GET', ss_functions.BEL_PATH, [*new_pair, '1-2'])]
+        assert overlapping.edge_ids >= single[pairs[1]].edge_ids
+
+        with pytest.raises(ValueError):
+            query.paths(pairs, min_edges=0)
+
+    def test_paths_memo_copies(self, stand_in):
+        edges = stand_in.kg.edges
+        pairs = [(edges[i]['out']['name'], edges[i]['in']['name']) for i in range(2)]
+        first = query.paths(pairs, max_edges=2)
+        expected = [dict(row) for row in first.data]
+        for row in first.edges:  # Like _render_graph, which changes the node IDs in place
+            row['subject_id'] = row['subject_id'].replace(':', '.')
+        assert query.paths(pairs, max_edges=2).data == expected
+
+    def test_paths_memo_bounds(self, monkeypatch):
+        memo = query._PathMemo(max_entries=2, ttl=10)
+        now = [0]
+        monkeypatch.setattr(query.time, 'monotonic', lambda: now[0])
+        memo['a'], memo['b'] = 1, 2
+        assert memo['a'] == 1
+        memo['c'] = 3
+        assert set(memo) == {'a', 'c'}
+        now[0] = 11
+        with pytest.raises(KeyError):
+            memo['a']
+        assert len(memo) == 1
+
+    def test_paths_shared_source(self, stand_in):
+        source = max(stand_in.kg.nodes, key=lambda n: sum(e['out']['rid'] == n['rid'] for e in stand_in.kg.edges))
+        targets = [n['name'] for n in stand_in.kg.nodes[:40] if n['name'] != source['name']]
+        pairs = [(source['name'], target) for target in targets]
+        single = [query.path(*pair, min_edges=2, max_edges=3) for pair in pairs]
+
+        stand_in.requests.clear()
+        graph = query.paths(pairs, min_edges=2, max_edges=3, memo={})
+        assert {r[1] for r in stand_in.requests} == {ss_functions.DIRECT_SQL}
+        assert len(stand_in.requests) == 3
+        assert graph.edge_ids == set().union(*(g.edge_ids for g in single))
+        assert all(sorted(row) == sorted(single[0].data[0]) for row in graph.data)
+        for pair, pair_graph in zip(pairs, single):
+            assert {e for e, served in graph.pairs.items() if pair in served} == pair_graph.edge_ids
+
+        monkeypatch = pytest.MonkeyPatch()
+        monkeypatch.setattr(query, 'PATH_TRAVERSAL_MAX_EDGES', 1)
+        try:
+            stand_in.requests.clear()
+            assert query.paths(pairs, min_edges=2, max_edges=3, memo={}).edge_ids == graph.edge_ids
+            assert len(stand_in.requests) == 1 + len(pairs)
+        finally:
+            monkeypatch.undo()
+
+    def test_slim(self, stand_in):
+        pmid = stand_in.kg.pmids[0]
+        full = query.pmid(pmid)
+        slim = query.pmid(pmid, slim=True)
+        assert slim.edge_ids == full.edge_ids
+        assert all('evidence' not in row for row in slim.data)
+        assert slim.table.sort_index().equals(full.table.sort_index())
+
+        edge_id = next(iter(slim.edge_ids))
+        stand_in.requests.clear()
+        assert slim.select([edge_id])[0] == next(row for row in full.data if row['edge_id'] == edge_id)
+        assert stand_in.requests[0][2][0].endswith(f"WHERE @rid IN [{edge_id}]")
+        assert sum('evidence' in row for row in slim.data) == 1
+
+        assert slim.table_all_columns.sort_index().equals(full.table_all_columns.sort_index())
+        stand_in.requests.clear()
+        again = query.pmid(pmid, slim=True)
+        assert again.to_edgelist_frame(['evidence'])['evidence'].notna().all()
+        assert len(stand_in.requests) == 1  # Details are cached per edge for the session
+
+        statement = 'p(HGNC:?) increases ?'
+        slim = query.belish(statement, slim=True, limit=5)
+        assert len(slim) == 5 and all('evidence' not in row for row in slim.data)
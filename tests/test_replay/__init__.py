@@ -0,0 +1 @@
+"""Collection of tests of the generated SQL against responses recorded from a real server."""
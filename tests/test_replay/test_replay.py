@@ -0,0 +1,89 @@
+"""Testing module for the generated SQL against responses recorded from the public COVID-19 knowledge graph.
+
+The stand-in server only understands the SQL which ebel_rest generates, so these tests check the limit, offset,
+sample and slim pushdown, the RID cursor pagination and the queries of the term index against the semantics of a
+real OrientDB server: each call with generated SQL is compared with the server side function it replaces.
+
+The responses are replayed from covid.jsonl.gz. To record the archive again (e.g. after the generated SQL changed),
+run the tests with access to the server:
+
+    $ EBEL_REST_RECORD=1 python -m pytest tests/test_replay
+
+The tests are skipped if the archive doesn't exist.
+"""
+import os
+
+import pytest
+
+from ebel_rest import Session, query
+from ebel_rest.manager import sql_tools, terms
+from ebel_rest.manager.transport import HTTPTransport, RecordingTransport, ReplayTransport
+from ebel_rest.testing import rid_key
+from ..constants import USER, PASSWORD, DATABASE, SERVER
+
+ARCHIVE = os.path.join(os.path.dirname(__file__), 'covid.jsonl.gz')
+RECORD_ENV = 'EBEL_REST_RECORD'
+
+PMID = 32408336
+AUTHOR = 'Münch C'
+GENE = 'ACE2'
+STATEMENT = 'p(HGNC:"ACE2") increases ?'
+
+QUERIES = {
+    'pmid': (query.pmid, (PMID,)),
+    'last_author': (query.last_author, (AUTHOR, 'causal', 'protein', 'CHEBI')),
+    'belish': (query.belish, (STATEMENT,)),
+    'annotation': (query.annotation, ('MeSHAnatomy', 'Lysosomes')),
+    'annotation_namespace': (query.annotation, ('MeSHAnatomy',)),
+    'subgraph': (query.subgraph, ('Lysosomes',)),
+    'causal_correlative_by_gene': (query.causal_correlative_by_gene, (GENE,)),
+}
+
+
+@pytest.fixture(scope='module')
+def session():
+    if os.environ.get(RECORD_ENV):
+        if os.path.exists(ARCHIVE):
+            os.remove(ARCHIVE)
+        transport = RecordingTransport(ARCHIVE, transport=HTTPTransport())
+    elif os.path.exists(ARCHIVE):
+        transport = ReplayTransport(ARCHIVE)
+    else:
+        pytest.skip(f"No recorded responses in {ARCHIVE}, set {RECORD_ENV}=1 to record them")
+    with Session(USER, PASSWORD, SERVER, DATABASE, transport=transport) as session:
+        yield session
+
+
+class TestReplay:
+
+    @pytest.mark.parametrize('name', list(QUERIES))
+    def test_pushdown(self, session, name):
+        func, args = QUERIES[name]
+        full = func(*args, session=session)
+        ordered = sorted(full.edge_ids, key=rid_key)
+        assert len(ordered) > 3
+
+        assert func(*args, offset=0, session=session).edge_ids == full.edge_ids
+        assert func(*args, offset=1, limit=2, session=session).edge_ids == set(ordered[1:3])
+        assert func(*args, sample=3, seed=1, session=session).edge_ids <= full.edge_ids
+        assert func(*args, slim=True, session=session).edge_ids == full.edge_ids
+
+    def test_cursors(self, session):
+        sql = "SELECT @rid.asString() as edge_id FROM bel_relation WHERE pmid = ?"
+        skip_pages = [row['edge_id'] for row in query.iter_sql(sql, [PMID], page_size=100, session=session)]
+        rid_pages = [row['edge_id'] for row in query.iter_sql(sql, [PMID], page_size=100, cursor='rid',
+                                                              session=session)]
+        assert len(skip_pages) > 100
+        assert rid_pages == sorted(rid_pages, key=rid_key)
+        assert set(skip_pages) == set(rid_pages) == query.pmid(PMID, session=session).edge_ids
+
+    def test_term_queries(self, session):
+        rows = query.sql(sql_tools.skip_limit_page(terms.NODE_TERMS_SQL, 0, 100), session=session).data
+        pairs = [(row['namespace'], row['name']) for row in rows]
+        assert len(pairs) == len(set(pairs)) == 100 and pairs == sorted(pairs)
+
+        rows = query.sql(sql_tools.skip_limit_page(terms.ANNOTATIONS_SQL, 0, 100), session=session).data
+        assert all(isinstance(row['annotation'], dict) for row in rows)
+
+        rows = query.sql(sql_tools.skip_limit_page(terms.GENES_SQL, 0, 100), session=session).data
+        assert rows and all(isinstance(row['involved_genes'], list) for row in rows)
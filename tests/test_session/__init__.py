@@ -0,0 +1 @@
+"""Collection of tests for the session submodule."""
@@ -0,0 +1,164 @@
+"""Testing module for session"""
+import time
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ebel_rest import Session, query, statistics, Exporter
+from ebel_rest.manager.cache import ResponseCache
+from ebel_rest.manager.core import Client, Connector
+from ebel_rest.manager.session import SingleFlight
+
+
+@pytest.fixture
+def session(stand_in_server):
+    stand_in_server.requests.clear()
+    stand_in_server.client_addresses.clear()
+    with Session(stand_in_server.user, stand_in_server.password, stand_in_server.url,
+                 stand_in_server.db_name) as session:
+        yield session
+
+
+class TestSession:
+
+    def test_explicit_session_without_connect(self, session, stand_in_server, monkeypatch):
+        monkeypatch.setattr(Connector, 'session', None)
+        pmid = stand_in_server.kg.pmids[0]
+        graph = query.pmid(pmid, session=session)
+        assert len(graph) > 0
+        assert statistics.summarize(session=session).table.shape == (5, 2)
+
+        with pytest.raises(ValueError) as e:
+            query.pmid(pmid)
+        assert str(e.value) == "Not connected: call connect() or pass a Session"
+
+    def test_graph_operations_keep_session(self, session, stand_in_server):
+        graph1 = query.pmid(stand_in_server.kg.pmids[0], session=session)
+        graph2 = query.pmid(stand_in_server.kg.pmids[1], session=session)
+        assert (graph1 + graph2).session is session
+
+    def test_no_global_opener(self, session, stand_in_server):
+        opener = urllib.request._opener
+        query.pmid(stand_in_server.kg.pmids[0], session=session)
+        assert urllib.request._opener is opener
+
+    def test_persistent_connection(self, session, stand_in_server):
+        for pmid in stand_in_server.kg.pmids[:5]:
+            query.pmid(pmid, session=session)
+        assert len(stand_in_server.requests) == 5
+        assert len(stand_in_server.client_addresses) == 1
+
+    def test_parallel_sessions(self, session, stand_in_server):
+        wrong = Session(stand_in_server.user, 'wrong', stand_in_server.url, stand_in_server.db_name)
+        pmids = stand_in_server.kg.pmids[:20]
+
+        def run(pmid_session):
+            pmid, pmid_session = pmid_session
+            try:
+                return query.pmid(pmid, session=pmid_session).edge_ids
+            except urllib.error.HTTPError as e:
+                return e.code
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(run, [(pmid, s) for pmid in pmids for s in (session, wrong)]))
+
+        expected = [query.pmid(pmid, session=session).edge_ids for pmid in pmids]
+        assert results[0::2] == expected
+        assert results[1::2] == [401] * len(pmids)
+        wrong.close()
+
+    def test_post_fallback(self, session, stand_in_server):
+        session.max_url_length = 10
+        pmid = stand_in_server.kg.pmids[1]
+        assert len(query.pmid(pmid, session=session)) > 0
+        assert stand_in_server.requests[-1] == ('POST', 'bel_by_pmid', [str(pmid)])
+
+    def test_shared_executor(self, stand_in_server, monkeypatch):
+        edges = stand_in_server.kg.edges
+        path = query.path
+        threads = set()
+
+        def recording_path(*args, **kwargs):
+            threads.add(threading.current_thread())
+            return path(*args, **kwargs)
+
+        monkeypatch.setattr(query, 'path', recording_path)
+        with Session(stand_in_server.user, stand_in_server.password, stand_in_server.url, stand_in_server.db_name,
+                     max_workers=2) as session:
+            for start in range(0, 12, 4):
+                pairs = [(edges[i]['out']['name'], edges[i]['in']['name']) for i in range(start, start + 4)]
+                query.paths(pairs, max_edges=1, session=session)
+            executor = session.executor
+        assert 1 <= len(threads) <= 2  # The calls share the threads of the session
+        assert executor._shutdown and session._executor is None
+
+    def test_exporter_session(self, session, tmp_path):
+        exporter = Exporter(str(tmp_path / 'graph.lst'), 'lst', mapping_path=str(tmp_path / 'map.tsv'),
+                            session=session)
+        exporter.export()
+        assert (tmp_path / 'graph.lst').stat().st_size > 0
+
+    def test_repr_hides_password(self, session):
+        assert 'password' not in repr(session)
+
+    def test_client_without_session(self, monkeypatch):
+        monkeypatch.setattr(Connector, 'session', None)
+        assert Client().url_template is None
+
+
+class TestSingleFlight:
+
+    @staticmethod
+    def herd(function, n=8):
+        barrier = threading.Barrier(n)
+
+        def run(_):
+            barrier.wait()
+            return function()
+
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            return list(executor.map(run, range(n)))
+
+    def test_concurrent_calls_coalesced(self, session, stand_in_server, monkeypatch):
+        monkeypatch.setattr(stand_in_server, 'latency', 0.3)
+        results = self.herd(lambda: statistics.summarize(session=session).data)
+        assert len(stand_in_server.requests) == 1
+        assert all(result == results[0] for result in results)
+        assert len(session.in_flight) == 0
+
+    def test_coalesce_disabled(self, stand_in_server, monkeypatch):
+        monkeypatch.setattr(stand_in_server, 'latency', 0.3)
+        stand_in_server.requests.clear()
+        with Session(stand_in_server.user, stand_in_server.password, stand_in_server.url, stand_in_server.db_name,
+                     coalesce=False) as session:
+            self.herd(lambda: statistics.summarize(session=session), n=4)
+        assert len(stand_in_server.requests) == 4
+
+    def test_expired_cache_entry(self, session, stand_in_server, monkeypatch):
+        session.cache = ResponseCache(ttl=0.1)
+        statistics.summarize(session=session)
+        time.sleep(0.2)
+        monkeypatch.setattr(stand_in_server, 'latency', 0.3)
+        self.herd(lambda: statistics.summarize(session=session))
+        assert len(stand_in_server.requests) == 2
+
+    def test_errors_shared(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fail():
+            calls.append(1)
+            time.sleep(0.2)
+            raise ValueError("failed")
+
+        def run():
+            try:
+                flight.do('key', fail)
+            except ValueError as e:
+                return str(e)
+
+        assert self.herd(run, n=4) == ["failed"] * 4
+        assert len(calls) == 1
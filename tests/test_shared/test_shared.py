@@ -0,0 +1,89 @@
+"""Testing module for shared"""
+import pickle
+from multiprocessing import shared_memory
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from ebel_rest import query
+from ebel_rest.manager.shared import SharedGraph, _close_attached
+
+
+def count_relations(shared: SharedGraph, part: int, parts: int) -> Counter:
+    """Count the relations of every parts-th edge, run in a worker process."""
+    codes = shared.edges['relation'][part::parts]
+    return Counter({shared.relations[code]: int(n) for code, n in zip(*np.unique(codes, return_counts=True))})
+
+
+class TestSharedGraph:
+
+    def test_publish(self, stand_in):
+        graph = query.belish('p(HGNC:?) increases ?')
+        with graph.share(attributes=['evidence', 'annotation']) as shared:
+            assert len(shared) == len(graph.edges)
+            assert len(pickle.dumps(shared)) < 200
+            expected = {row['edge_id']: row for row in graph.edges}
+            for index in range(len(shared)):
+                record = shared.edge(index)
+                assert record == {k: expected[record['edge_id']][k] for k in record}
+            assert shared.to_graph(session=graph.session).edge_ids == graph.edge_ids
+            assert shared.edges['edge_id'].tolist() == [row['edge_id'] for row in graph.edges]
+
+    def test_publish_keeps_creating_handle(self, stand_in, monkeypatch):
+        created = []
+
+        class RecordingSharedMemory(shared_memory.SharedMemory):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                created.append(self)
+
+        monkeypatch.setattr(shared_memory, 'SharedMemory', RecordingSharedMemory)
+        graph = query.pmid(stand_in.kg.pmids[0])
+        with graph.share() as shared:
+            assert created == [shared._shm]  # Not closed and attached again
+            assert shared.edges['edge_id'].tolist() == [row['edge_id'] for row in graph.edges]
+        assert len(created) == 1
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared.handle.name)
+
+    def test_close_with_arrays(self, stand_in):
+        graph = query.pmid(stand_in.kg.pmids[0])
+        shared = SharedGraph.publish(graph)
+        sources = shared.edges['source']
+        edge_ids = shared.edges['edge_id']
+        expected = sources.tolist()
+        shared.close()  # Arrays of the columns are still referenced
+        assert shared._shm is None
+        assert sources.tolist() == expected
+        assert edge_ids.tolist() == [row['edge_id'] for row in graph.edges]
+        shared.close()
+        shared.unlink()
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared.handle.name)
+
+        with SharedGraph.publish(graph) as owner:
+            codes = SharedGraph.attach(owner.handle).edges['relation']
+            _close_attached()
+            assert len(codes) == len(graph.edges)
+
+    def test_workers(self, stand_in):
+        graph = query.belish('? ? ?')
+        expected = Counter(row['relation'] for row in graph.edges)
+        with graph.share() as shared, ProcessPoolExecutor(max_workers=2) as executor:
+            counts = executor.map(count_relations, [shared] * 3, range(3), [3] * 3)
+            assert sum(counts, Counter()) == expected
+
+    def test_memmap(self, stand_in, tmp_path):
+        graph = query.pmid(stand_in.kg.pmids[0])
+        path = tmp_path / 'graph.shared'
+        with graph.share(path=str(path)) as shared:
+            attached = pickle.loads(pickle.dumps(shared))
+            assert not attached.owner
+            assert attached.to_graph(session=graph.session).edge_ids == graph.edge_ids
+            with pytest.raises(ValueError):
+                attached.edges['source'][0] = 1
+            with pytest.raises(ValueError):
+                attached.unlink()
+        assert not path.exists()
@@ -0,0 +1,67 @@
+"""Testing module for sql_tools"""
+import pytest
+
+from ebel_rest.manager import belish, sql_tools
+
+
+class TestSqlTools:
+
+    def test_bind_named(self):
+        sql = "SELECT FROM protein WHERE name = :name AND namespace IN :ns AND bel <> ':name'"
+        bound = sql_tools.bind_parameters(sql, {'name': "O'Brien", 'ns': ['HGNC', 'MGI']})
+        assert bound == ("SELECT FROM protein WHERE name = 'O\\'Brien' AND namespace IN ['HGNC', 'MGI'] "
+                         "AND bel <> ':name'")
+
+    def test_bind_positional(self):
+        bound = sql_tools.bind_parameters("SELECT FROM #12:3 WHERE pmid = ? AND x = ?", [123, None])
+        assert bound == "SELECT FROM #12:3 WHERE pmid = 123 AND x = null"
+
+    def test_bind_errors(self):
+        with pytest.raises(ValueError) as e:
+            sql_tools.bind_parameters("SELECT FROM bel WHERE name = :name", {'names': 'x'})
+        assert str(e.value) == "No value given for parameter ':name'"
+
+        with pytest.raises(ValueError) as e:
+            sql_tools.bind_parameters("SELECT FROM bel WHERE name = ?", [1, 2])
+        assert str(e.value) == "Too many parameters for the positional placeholders"
+
+    def test_skip_limit_page(self):
+        assert sql_tools.skip_limit_page("SELECT FROM bel;", 20, 10) == "SELECT FROM bel SKIP 20 LIMIT 10"
+        with pytest.raises(ValueError):
+            sql_tools.skip_limit_page("SELECT FROM bel LIMIT 5", 0, 10)
+
+    def test_rid_cursor_page(self):
+        page = sql_tools.rid_cursor_page("SELECT name FROM protein WHERE namespace = 'HGNC'", '#12:3', 100)
+        assert page == ("SELECT name, @rid AS cursor_rid FROM protein WHERE @rid > #12:3 AND (namespace = 'HGNC') "
+                        "ORDER BY @rid ASC LIMIT 100")
+        page = sql_tools.rid_cursor_page("SELECT FROM protein", sql_tools.FIRST_RID, 10)
+        assert page == "SELECT *, @rid AS cursor_rid FROM protein WHERE @rid > #-1:-1 ORDER BY @rid ASC LIMIT 10"
+
+        with pytest.raises(ValueError):
+            sql_tools.rid_cursor_page("SELECT name FROM protein ORDER BY name", sql_tools.FIRST_RID, 10)
+
+    def test_select_rewrites(self):
+        sql = "SELECT name FROM protein WHERE namespace = 'HGNC'"
+        assert sql_tools.with_projection(sql, "@rid") == "SELECT @rid FROM protein WHERE namespace = 'HGNC'"
+        assert sql_tools.add_condition(sql, "@rid IN [#1:2]") == ("SELECT name FROM protein WHERE @rid IN [#1:2] AND "
+                                                                 "(namespace = 'HGNC')")
+        assert sql_tools.order_by_rid(sql) == f"{sql} ORDER BY @rid ASC"
+        assert sql_tools.skip_limit_page("SELECT FROM bel", 5) == "SELECT FROM bel SKIP 5"
+
+        with pytest.raises(ValueError):
+            sql_tools.add_condition("SELECT FROM bel LIMIT 5", "pmid = 1")
+
+    def test_keywords_in_strings(self):
+        sql = belish.to_sql('p(HGNC:"SKIP") ? ?')
+        assert sql_tools.order_by_rid(sql) == f"{sql} ORDER BY @rid ASC"
+
+        sql = sql_tools.bind_parameters("SELECT FROM bel_relation WHERE citation.last_author = :author",
+                                        {'author': 'Limit A'})
+        page = sql_tools.rid_cursor_page(sql, sql_tools.FIRST_RID, 10)
+        assert page == ("SELECT *, @rid AS cursor_rid FROM bel_relation WHERE @rid > #-1:-1 AND "
+                        "(citation.last_author = 'Limit A') ORDER BY @rid ASC LIMIT 10")
+
+        sql = "SELECT name FROM protein WHERE name = 'FROM x WHERE y ORDER BY z'"
+        assert sql_tools.with_projection(sql, "@rid") == sql.replace("SELECT name", "SELECT @rid")
+        with pytest.raises(ValueError):
+            sql_tools.order_by_rid("SELECT FROM protein WHERE name = 'LIMIT' LIMIT 5")
@@ -0,0 +1 @@
+"""Collection of tests which run against the stand-in server."""
@@ -0,0 +1,15 @@
+"""Testing module for the client against the stand-in server"""
+from ebel_rest import query, statistics
+
+
+class TestStandIn:
+
+    def test_pmid(self, stand_in):
+        pmid = stand_in.kg.pmids[0]
+        graph = query.pmid(pmid)
+        expected = {e['rid'] for e in stand_in.kg.edges if e['pmid'] == pmid}
+        assert graph.edge_ids == expected
+        assert all(not k.startswith('@') for k in graph.data[0])
+
+    def test_statistics(self, stand_in):
+        assert statistics.summarize().table.shape == (5, 2)
@@ -0,0 +1,91 @@
+"""Testing module for terms"""
+import pytest
+
+from ebel_rest import query
+from ebel_rest.manager.core import Connector
+from ebel_rest.manager.terms import TermIndex
+
+TERMS = {
+    'namespace': {'': ['HGNC', 'MGI']},
+    'name': {'HGNC': ['APOE', 'APOA1', 'TP53', 'TP63'], 'MGI': ['Apoe', 'Trp53']},
+    'annotation': {'': ['MeSHAnatomy']},
+    'annotation_value': {'MeSHAnatomy': ['Lung', 'Brain']},
+    'gene': {'': ['APOE', 'APOA1', 'TP53', 'TP63']},
+}
+
+
+class TestTermIndex:
+
+    def test_prefix(self):
+        terms = TermIndex(TERMS)
+        assert terms.prefix('gene', 'apo') == ['APOA1', 'APOE']
+        assert terms.prefix('name', 'apo') == ['APOA1', 'APOE', 'Apoe']
+        assert terms.prefix('name', 'apo', namespace='MGI') == ['Apoe']
+        assert terms.prefix('gene', 'TP', limit=1) == ['TP53']
+        assert terms.prefix('name', 'x', namespace='CHEBI') == []
+
+    def test_fuzzy(self):
+        terms = TermIndex(TERMS)
+        assert set(terms.fuzzy('gene', 'TP35')) == {'TP53', 'TP63'}
+        assert terms.fuzzy('annotation_value', 'lugn', namespace='MeSHAnatomy') == ['Lung']
+        assert terms.fuzzy('gene', 'completely different') == []
+
+    def test_validate(self):
+        terms = TermIndex(TERMS)
+        assert terms.contains('name', 'Apoe', namespace='MGI')
+        assert not terms.contains('gene', 'apoe')
+        terms.validate('gene', 'TP53')
+
+        with pytest.raises(ValueError) as e:
+            terms.validate('gene', 'TP35')
+        assert str(e.value).startswith("Unknown gene 'TP35', did you mean: ")
+
+        with pytest.raises(ValueError) as e:
+            terms.validate('annotation_value', 'Lunge', namespace='MeSHAnatomy')
+        assert str(e.value) == "Unknown value 'Lunge' in namespace 'MeSHAnatomy', did you mean: Lung?"
+
+        with pytest.raises(ValueError):
+            terms.prefix('symbol', 'TP')
+
+    def test_save_load(self, tmp_path):
+        terms = TermIndex(TERMS)
+        terms.prefix('name', 'A')  # Creates the merged list, which is not saved
+        loaded = TermIndex.load(terms.save(str(tmp_path / 'terms.json.gz')))
+        assert loaded.built_at == terms.built_at
+        for kind, namespaces in TERMS.items():
+            for namespace in namespaces:
+                assert loaded.terms(kind, namespace) == terms.terms(kind, namespace)
+
+    def test_cached(self, stand_in, tmp_path):
+        terms = TermIndex.cached(directory=str(tmp_path))
+        assert set(terms.terms('namespace')) == {n['namespace'] for n in stand_in.kg.nodes}
+        assert set(terms.terms('gene')) == {gene for n in stand_in.kg.nodes for gene in n['involved_genes']}
+        assert set(terms.terms('annotation_value', 'Species')) == {'9606', '10090'}
+
+        stand_in.requests.clear()
+        assert TermIndex.cached(directory=str(tmp_path)).terms('gene') == terms.terms('gene')
+        assert stand_in.requests == []
+
+    def test_genes_of_all_namespaces(self, stand_in, monkeypatch):
+        nodes = [dict(rid='#11:0', namespace='MGI', name='Apoe', involved_genes=['Apoe']),
+                 dict(rid='#11:1', namespace='RGD', name='Trp53', involved_genes=['Trp53']),
+                 dict(rid='#11:2', namespace='GO', name='complex', involved_genes=['APP', 'Apoe'])]
+        monkeypatch.setattr(stand_in.kg, 'nodes', stand_in.kg.nodes + nodes)
+        terms = TermIndex.build()
+        terms.validate('gene', 'Apoe')
+        terms.validate('gene', 'Trp53')
+        terms.validate('gene', 'APP')
+
+    def test_query_validation(self, stand_in, tmp_path):
+        Connector.session.terms = TermIndex.cached(directory=str(tmp_path))
+        gene = Connector.session.terms.terms('gene')[0]
+        stand_in.requests.clear()
+
+        with pytest.raises(ValueError):
+            query.causal_correlative_by_gene(gene + 'X')
+        with pytest.raises(ValueError):
+            query.annotation('MeSHAnatomy', 'Lugn')
+        assert stand_in.requests == []
+
+        assert len(query.causal_correlative_by_gene(gene)) > 0
+        assert len(query.annotation('MeSHAnatomy', 'Lung')) > 0